@@ -2,7 +2,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
 from parking_app import (
-    cars_data, save_data, calculate_cost,
+    records, save_data, calculate_cost, start_loading, wait_for_data,
     add_car as original_add_car,
     remove_car as original_remove_car,
     show_current_cars as original_show_current_cars,
@@ -86,7 +86,7 @@ class ParkingAppGUI:
 
         def submit():
             car_number = number_entry.get()
-            car = next((c for c in cars_data if c['car_number'] == car_number and not c['exit_time']), None)
+            car = records.find_active(car_number)
 
             if not car:
                 messagebox.showerror("Ошибка", "Автомобиль не найден")
@@ -94,23 +94,18 @@ class ParkingAppGUI:
                 return
 
             exit_time = datetime.now()
-            entry_time = datetime.fromisoformat(str(car['entry_time'])) if isinstance(car['entry_time'], str) else car[
-                'entry_time']
             cost = calculate_cost(
-                entry_time,
+                car['entry_time'],
                 exit_time,
                 car['hourly_rate'],
                 car['discount']
             )
 
-            car['exit_time'] = exit_time
-            car['debt'] = cost
-            car['payment_status'] = 'Не оплачено'
+            records.register_exit(car, exit_time, cost)
             save_data()
 
             if messagebox.askyesno("Оплата", f"Стоимость: {cost:.2f} руб.\nОплатить сейчас?"):
-                car['payment_status'] = 'Оплачено'
-                car['debt'] = 0.0
+                records.register_payment(car)
                 save_data()
                 messagebox.showinfo("Успех", "Оплачено успешно")
             else:
@@ -131,19 +126,17 @@ class ParkingAppGUI:
         tree.heading("entry_time", text="Время въезда")
         tree.heading("cost", text="Текущая стоимость")
 
-        for car in cars_data:
-            if not car['exit_time']:
-                entry_time = datetime.fromisoformat(str(car['entry_time'])) if isinstance(car['entry_time'], str) else \
-                car['entry_time']
-                now = datetime.now()
-                cost = calculate_cost(entry_time, now, car['hourly_rate'], car['discount'])
-                tree.insert("", "end", values=(
-                    car['car_brand'],
-                    car['car_number'],
-                    car['owner_name'],
-                    entry_time.strftime("%d.%m.%Y %H:%M"),
-                    f"{cost:.2f} руб."
-                ))
+        now = datetime.now()
+        for car in records.current():
+            entry_time = car['entry_time']
+            cost = calculate_cost(entry_time, now, car['hourly_rate'], car['discount'])
+            tree.insert("", "end", values=(
+                car['car_brand'],
+                car['car_number'],
+                car['owner_name'],
+                entry_time.strftime("%d.%m.%Y %H:%M"),
+                f"{cost:.2f} руб."
+            ))
 
         tree.pack(fill=tk.BOTH, expand=True)
         ttk.Scrollbar(window, orient=tk.VERTICAL, command=tree.yview).pack(side=tk.RIGHT, fill=tk.Y)
@@ -161,20 +154,15 @@ class ParkingAppGUI:
         tree.heading("cost", text="Стоимость")
         tree.heading("status", text="Статус")
 
-        for car in cars_data:
-            if car['exit_time']:
-                entry = datetime.fromisoformat(str(car['entry_time'])) if isinstance(car['entry_time'], str) else car[
-                    'entry_time']
-                exit = datetime.fromisoformat(str(car['exit_time'])) if isinstance(car['exit_time'], str) else car[
-                    'exit_time']
-                tree.insert("", "end", values=(
-                    car['car_brand'],
-                    car['car_number'],
-                    entry.strftime("%d.%m.%Y %H:%M"),
-                    exit.strftime("%d.%m.%Y %H:%M"),
-                    f"{car.get('cost', 0):.2f} руб.",
-                    car['payment_status']
-                ))
+        for car in original_show_history():
+            tree.insert("", "end", values=(
+                car['car_brand'],
+                car['car_number'],
+                car['entry_time'].strftime("%d.%m.%Y %H:%M"),
+                car['exit_time'].strftime("%d.%m.%Y %H:%M"),
+                f"{car.get('cost', 0):.2f} руб.",
+                car['payment_status']
+            ))
 
         tree.pack(fill=tk.BOTH, expand=True)
         ttk.Scrollbar(window, orient=tk.VERTICAL, command=tree.yview).pack(side=tk.RIGHT, fill=tk.Y)
@@ -196,19 +184,15 @@ class ParkingAppGUI:
         tree.pack(fill=tk.BOTH, expand=True)
 
         def search():
-            term = search_entry.get().lower()
             tree.delete(*tree.get_children())
-            for car in cars_data:
-                if (term in car['car_number'].lower() or
-                        term in car['car_brand'].lower() or
-                        term in car['owner_name'].lower()):
-                    status = "На стоянке" if not car['exit_time'] else "Уехал"
-                    tree.insert("", "end", values=(
-                        car['car_brand'],
-                        car['car_number'],
-                        car['owner_name'],
-                        status
-                    ))
+            for car in records.search(search_entry.get()):
+                status = "На стоянке" if not car['exit_time'] else "Уехал"
+                tree.insert("", "end", values=(
+                    car['car_brand'],
+                    car['car_number'],
+                    car['owner_name'],
+                    status
+                ))
 
         ttk.Button(window, text="Искать", command=search).pack(pady=10)
 
@@ -222,15 +206,14 @@ class ParkingAppGUI:
 
         def submit():
             car_number = number_entry.get()
-            car = next((c for c in cars_data if c['car_number'] == car_number and c['debt'] > 0), None)
+            car = records.find_debt(car_number)
 
             if not car:
                 messagebox.showinfo("Информация", "Нет задолженности")
                 window.destroy()
                 return
 
-            car['payment_status'] = 'Оплачено'
-            car['debt'] = 0.0
+            records.register_payment(car)
             save_data()
             messagebox.showinfo("Успех", "Задолженность погашена")
             window.destroy()
@@ -238,7 +221,7 @@ class ParkingAppGUI:
         ttk.Button(window, text="Оплатить", command=submit).pack(pady=10)
 
     def show_debtors(self):
-        debtors = [c for c in cars_data if c['payment_status'] == 'Не оплачено' and c['debt'] > 0]
+        debtors = records.debtors()
 
         window = tk.Toplevel(self.root)
         window.title("Список должников")
@@ -261,31 +244,11 @@ class ParkingAppGUI:
         tree.pack(fill=tk.BOTH, expand=True)
 
 
-def add_car(brand, number, owner, discount):
-    try:
-        discount = int(discount)
-        if not (0 <= discount <= 100):
-            return "Скидка должна быть от 0 до 100%"
-    except ValueError:
-        return "Неверный формат скидки"
-
-    car = {
-        "car_brand": brand,
-        "car_number": number,
-        "owner_name": owner,
-        "entry_time": datetime.now(),
-        "hourly_rate": 100,
-        "discount": discount,
-        "exit_time": None,
-        "payment_status": "Не оплачено",
-        "debt": 0.0
-    }
-    cars_data.append(car)
-    save_data()
-    return f"Автомобиль {brand} {number} добавлен"
-
-
 if __name__ == "__main__":
+    # Файл данных читается в фоне, пока строится окно
+    start_loading()
     root = tk.Tk()
     app = ParkingAppGUI(root)
+    # Обработчики кнопок читают записи без ожидания, поэтому к началу цикла событий данные нужны
+    wait_for_data()
     root.mainloop()
\ No newline at end of file
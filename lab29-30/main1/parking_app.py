@@ -1,20 +1,174 @@
 # parking_app.py
 import os
 import json
-import datetime
+import threading
 from datetime import datetime
 
 data_file = "parking_data.json"
+# Список заполняется при загрузке, но сам объект не меняется:
+# модули, импортировавшие cars_data, видят загруженные данные
 cars_data = []
 
-if os.path.exists(data_file):
-    with open(data_file, "r", encoding="utf-8") as file:
-        cars_data = json.load(file)
-else:
-    cars_data = []
+UNPAID = "Не оплачено"
+PAID = "Оплачено"
+
+_loaded = threading.Event()
+_load_lock = threading.Lock()
+_loader = None
+
+
+def _parse_time(value):
+    # В файле время хранится строкой (json.dump с default=str), в памяти — datetime
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+
+class CarRecords:
+    """
+    Записи о стоянках (словари из cars_data) с индексами по номеру
+
+    Время въезда и выезда разбирается один раз при загрузке, поэтому
+    выезд и оплата не перебирают все записи и не разбирают строки.
+    Изменять записи нужно через методы хранилища, иначе индексы устареют.
+    Записи только добавляются, поэтому порядковый номер записи не меняется
+    и выборки возвращаются в порядке cars_data, как при переборе списка.
+    """
+
+    def __init__(self, records):
+        self.records = records
+        # id(запись) -> порядковый номер в records
+        self._positions = {}
+        # Номер -> записи в порядке добавления
+        self._active = {}
+        self._unpaid = {}
+        # id(запись) -> запись для неоплаченных записей с долгом
+        self._debtors = {}
+        # Номер, марка и владелец в нижнем регистре для поиска подстроки
+        self._search_keys = []
+
+    def rebuild(self):
+        """Разбор времени и построение индексов по текущему содержимому records"""
+        self._positions.clear()
+        self._active.clear()
+        self._unpaid.clear()
+        self._debtors.clear()
+        self._search_keys.clear()
+        for car in self.records:
+            car["entry_time"] = _parse_time(car["entry_time"])
+            car["exit_time"] = _parse_time(car["exit_time"])
+            self._index(car)
+
+    def _index(self, car):
+        self._positions[id(car)] = len(self._search_keys)
+        self._search_keys.append(
+            "\0".join((car["car_number"], car["car_brand"], car["owner_name"])).lower()
+        )
+        if car["exit_time"] is None:
+            self._active.setdefault(car["car_number"], []).append(car)
+        if car["payment_status"] == UNPAID:
+            self._unpaid.setdefault(car["car_number"], []).append(car)
+            if car["debt"] > 0:
+                self._debtors[id(car)] = car
+
+    @staticmethod
+    def _discard(index, car):
+        cars = index.get(car["car_number"])
+        if cars is not None:
+            cars.remove(car)
+            if not cars:
+                del index[car["car_number"]]
+
+    def _ordered(self, cars):
+        return sorted(cars, key=lambda car: self._positions[id(car)])
+
+    def add(self, car):
+        """Добавление записи"""
+        car["entry_time"] = _parse_time(car["entry_time"])
+        car["exit_time"] = _parse_time(car["exit_time"])
+        self.records.append(car)
+        self._index(car)
+
+    def find_active(self, car_number):
+        """Первая запись автомобиля, который сейчас на стоянке"""
+        cars = self._active.get(car_number)
+        return cars[0] if cars else None
+
+    def find_unpaid(self, car_number):
+        """Первая неоплаченная запись по номеру (в том числе без долга)"""
+        cars = self._unpaid.get(car_number)
+        return cars[0] if cars else None
+
+    def find_debt(self, car_number):
+        """Первая неоплаченная запись по номеру с долгом"""
+        return next((car for car in self._unpaid.get(car_number, ()) if car["debt"] > 0), None)
+
+    def register_exit(self, car, exit_time, debt):
+        """Выезд: запись перестаёт быть активной и получает долг"""
+        self._discard(self._active, car)
+        if car["payment_status"] != UNPAID:
+            self._unpaid.setdefault(car["car_number"], []).append(car)
+            self._unpaid[car["car_number"]].sort(key=lambda item: self._positions[id(item)])
+        car["exit_time"] = exit_time
+        car["debt"] = debt
+        car["payment_status"] = UNPAID
+        if debt > 0:
+            self._debtors[id(car)] = car
+        else:
+            self._debtors.pop(id(car), None)
+
+    def register_payment(self, car):
+        """Оплата записи"""
+        if car["payment_status"] == UNPAID:
+            self._discard(self._unpaid, car)
+        self._debtors.pop(id(car), None)
+        car["payment_status"] = PAID
+        car["debt"] = 0.0
+
+    def current(self):
+        """Автомобили на стоянке"""
+        return self._ordered(car for cars in self._active.values() for car in cars)
+
+    def debtors(self):
+        """Неоплаченные записи с долгом"""
+        return self._ordered(self._debtors.values())
+
+    def search(self, search_term):
+        """Записи, у которых номер, марка или владелец содержат строку"""
+        term = search_term.lower()
+        return [car for car, key in zip(self.records, self._search_keys) if term in key]
+
+
+records = CarRecords(cars_data)
+
+
+def _load():
+    with _load_lock:
+        if _loaded.is_set():
+            return
+        if os.path.exists(data_file):
+            with open(data_file, "r", encoding="utf-8") as file:
+                cars_data[:] = json.load(file)
+        records.rebuild()
+        _loaded.set()
+
+
+def start_loading():
+    """Запуск загрузки данных в фоновом потоке (например, пока строится окно)"""
+    global _loader
+    if _loader is None and not _loaded.is_set():
+        _loader = threading.Thread(target=_load, name="loader", daemon=True)
+        _loader.start()
+
+
+def wait_for_data():
+    """Ожидание загрузки данных; если загрузка не запускалась, данные читаются сразу"""
+    if not _loaded.is_set():
+        _load()
 
 
 def save_data():
+    wait_for_data()
     with open(data_file, "w", encoding="utf-8") as file:
         json.dump(cars_data, file, ensure_ascii=False, indent=4, default=str)
 
@@ -45,55 +199,52 @@ def add_car(brand, number, owner, discount):
         "hourly_rate": 100,
         "discount": discount,
         "exit_time": None,
-        "payment_status": "Не оплачено",
+        "payment_status": UNPAID,
         "debt": 0.0
     }
-    cars_data.append(car)
+    wait_for_data()
+    records.add(car)
     save_data()
     return f"Автомобиль {brand} {number} добавлен"
 
 
 def remove_car(car_number):
-    for i, car in enumerate(cars_data):
-        if car["car_number"] == car_number and car["exit_time"] is None:
-            exit_time = datetime.now()
-            entry_time = datetime.fromisoformat(str(car["entry_time"])) if isinstance(car["entry_time"], str) else car[
-                "entry_time"]
-            cost = calculate_cost(entry_time, exit_time, car["hourly_rate"], car["discount"])
-            cars_data[i]["exit_time"] = exit_time
-            cars_data[i]["debt"] = cost
-            cars_data[i]["payment_status"] = "Не оплачено"
-            save_data()
-            return cost
-    return None
+    wait_for_data()
+    car = records.find_active(car_number)
+    if car is None:
+        return None
+    exit_time = datetime.now()
+    cost = calculate_cost(car["entry_time"], exit_time, car["hourly_rate"], car["discount"])
+    records.register_exit(car, exit_time, cost)
+    save_data()
+    return cost
 
 
 def show_current_cars():
-    return [car for car in cars_data if car["exit_time"] is None]
+    wait_for_data()
+    return records.current()
 
 
 def show_history():
+    wait_for_data()
     return [car for car in cars_data if car["exit_time"] is not None]
 
 
 def search_car(search_term):
-    return [
-        car for car in cars_data
-        if (search_term.lower() in car["car_number"].lower() or
-            search_term.lower() in car["car_brand"].lower() or
-            search_term.lower() in car["owner_name"].lower())
-    ]
+    wait_for_data()
+    return records.search(search_term)
 
 
 def pay_debt(car_number):
-    for i, car in enumerate(cars_data):
-        if car["car_number"] == car_number and car["payment_status"] == "Не оплачено":
-            cars_data[i]["payment_status"] = "Оплачено"
-            cars_data[i]["debt"] = 0.0
-            save_data()
-            return True
-    return False
+    wait_for_data()
+    car = records.find_unpaid(car_number)
+    if car is None:
+        return False
+    records.register_payment(car)
+    save_data()
+    return True
 
 
 def show_debtors():
-    return [car for car in cars_data if car["payment_status"] == "Не оплачено" and car["debt"] > 0]
\ No newline at end of file
+    wait_for_data()
+    return records.debtors()
@@ -0,0 +1,142 @@
+"""
+Сравнение расхода памяти Car и CompactCar
+
+Каждый класс замеряется в отдельном процессе, чтобы прирост резидентной
+памяти (RSS) не искажался памятью, освобождённой после предыдущего замера.
+
+Запуск из каталога parking_app:
+    python -m benchmarks.car_memory --count 1000000
+"""
+
+import sys
+import random
+import argparse
+import subprocess
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+from models.car import Car
+from models.compact_car import CompactCar
+
+
+BRANDS = ["Лада", "Toyota", "Kia", "Hyundai", "Mercedes", "BMW", "Volkswagen", "Skoda"]
+CAR_CLASSES = {"Car": Car, "CompactCar": CompactCar}
+
+
+def read_rss() -> int:
+    """Текущий резидентный объём памяти процесса в байтах (только Linux)"""
+    status = Path("/proc/self/status")
+    if not status.exists():
+        return 0
+    for line in status.read_text().splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1]) * 1024
+    return 0
+
+
+def make_cars(car_class, count: int) -> list:
+    """
+    Создание истории стоянки со случайными данными
+
+    Клиентов в пять раз меньше, чем записей: постоянные клиенты
+    приезжают повторно с тем же номером и ФИО.
+
+    Args:
+        car_class: Car или CompactCar
+        count: Количество записей
+
+    Returns:
+        Список автомобилей
+    """
+    rng = random.Random(42)
+    start = datetime(2020, 1, 1)
+    customers = max(1, count // 5)
+    cars = []
+    for _ in range(count):
+        customer = rng.randrange(customers)
+        entry_time = start + timedelta(seconds=rng.randrange(10 ** 8), microseconds=rng.randrange(10 ** 6))
+        paid = rng.random() < 0.9
+        cars.append(car_class(
+            car_brand=BRANDS[customer % len(BRANDS)],
+            car_number=f"А{customer % 1000:03d}ВС{customer // 1000:03d}",
+            owner_name=f"Владелец {customer}",
+            entry_time=entry_time,
+            hourly_rate=100.0,
+            discount=rng.choice((0, 5, 10)),
+            exit_time=entry_time + timedelta(minutes=rng.randrange(10, 600)),
+            payment_status="Оплачено" if paid else "Не оплачено",
+            debt=0.0 if paid else 150.0,
+            cost=150.0,
+            id=entry_time.strftime("%Y%m%d%H%M%S")
+        ))
+    return cars
+
+
+def measure(class_name: str, count: int) -> dict:
+    """
+    Замер памяти, занимаемой count записями (в текущем процессе)
+
+    Args:
+        class_name: Имя класса из CAR_CLASSES
+        count: Количество записей
+
+    Returns:
+        Словарь с результатами замера
+    """
+    car_class = CAR_CLASSES[class_name]
+
+    rss_before = read_rss()
+    cars = make_cars(car_class, count)
+    rss_after = read_rss()
+    del cars
+
+    tracemalloc.start()
+    cars = make_cars(car_class, count)
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "class": class_name,
+        "count": len(cars),
+        "rss_delta_bytes": rss_after - rss_before,
+        "traced_bytes": traced,
+        "traced_bytes_per_record": traced / count
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сравнение расхода памяти Car и CompactCar")
+    parser.add_argument("--count", type=int, default=1_000_000, help="Количество записей")
+    parser.add_argument("--class", dest="class_name", choices=CAR_CLASSES,
+                        help="Замерить один класс в текущем процессе")
+    args = parser.parse_args()
+
+    if args.class_name:
+        result = measure(args.class_name, args.count)
+        print(f"{result['rss_delta_bytes']} {result['traced_bytes']}")
+        return 0
+
+    rss_results, traced_results = {}, {}
+    for class_name in CAR_CLASSES:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.car_memory", "--count", str(args.count), "--class", class_name],
+            capture_output=True, text=True, check=True
+        ).stdout.split()
+        rss, traced = int(output[0]), int(output[1])
+        rss_results[class_name] = rss
+        traced_results[class_name] = traced
+        print(f"{class_name:>10}: RSS +{rss / 2 ** 20:8.1f} МБ "
+              f"({rss / args.count:.0f} байт на запись), "
+              f"по tracemalloc {traced / 2 ** 20:.1f} МБ")
+
+    # RSS читается только в Linux, а на малом количестве записей прирост может быть нулевым
+    if all(rss > 0 for rss in rss_results.values()):
+        results, source = rss_results, "по RSS"
+    else:
+        results, source = traced_results, "по tracemalloc"
+    print(f"CompactCar занимает в {results['Car'] / results['CompactCar']:.1f} раза меньше памяти ({source})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
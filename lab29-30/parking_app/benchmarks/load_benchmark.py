@@ -0,0 +1,283 @@
+"""
+Нагрузочный тест ParkingService на разных объёмах истории и хранилищах
+
+Для каждого хранилища и размера истории создаётся синтетическая история
+стоянок (утренний и вечерний пики въездов, логнормальная длительность
+стоянки, около 10% неоплаченных записей), затем через ParkingService
+выполняются въезды, выезды, оплаты, поиск и выборка должников. Для каждой
+операции считаются операции в секунду и задержки p50/p99, для хранилища —
+время загрузки и размер файлов. Результат выводится в JSON, чтобы
+сравнивать хранилища и версии между собой.
+
+Запуск из каталога parking_app:
+    python -m benchmarks.load_benchmark --sizes 1000,100000,1000000 --storage journal,sqlite --output results.json
+"""
+
+import sys
+import json
+import math
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List
+from models.car import Car
+from models.id_generator import IdGenerator
+from services.storage_service import BaseStorageService, StorageService
+from services.journal_storage_service import JournalStorageService
+from services.sqlite_storage_service import SQLiteStorageService
+from services.binary_storage_service import BinaryStorageService
+from services.partitioned_storage_service import PartitionedStorageService
+from services.ledger_storage_service import LedgerStorageService
+from services.write_behind_storage_service import WriteBehindStorageService, DURABILITY_LEVELS, DURABILITY_SYNC
+from services.parking_service import ParkingService
+
+
+BRANDS = ["Лада", "Toyota", "Kia", "Hyundai", "Mercedes", "BMW", "Volkswagen", "Skoda"]
+LETTERS = "АВЕКМНОРСТУХ"
+
+STORAGE_FACTORIES: Dict[str, Callable[[Path], BaseStorageService]] = {
+    "json": lambda directory: StorageService(str(directory / "parking_data.json")),
+    "journal": lambda directory: JournalStorageService(str(directory / "parking_data.json")),
+    "sqlite": lambda directory: SQLiteStorageService(str(directory / "parking_data.db")),
+    "binary": lambda directory: BinaryStorageService(str(directory / "parking_data.bin")),
+    "partitioned": lambda directory: PartitionedStorageService(str(directory / "parking_data.json")),
+    "ledger": lambda directory: LedgerStorageService(str(directory / "parking_ledger.json")),
+}
+
+
+def plate(number: int) -> str:
+    """Номер автомобиля вида А123ВС777 по порядковому номеру"""
+    letters = len(LETTERS)
+    return (f"{LETTERS[number % letters]}{number // letters % 1000:03d}"
+            f"{LETTERS[number // 12000 % letters]}{LETTERS[number // 144000 % letters]}"
+            f"{77 + number // 1728000:03d}")
+
+
+def generate_history(count: int, seed: int = 42, now: datetime = None) -> List[Car]:
+    """
+    Синтетическая история стоянки
+
+    Въезды распределены по последним двум годам с пиками около 9 и 18 часов,
+    длительность стоянки логнормальная (медиана около двух часов).
+    Клиентов в пять раз меньше, чем записей. Около 2% машин ещё на стоянке,
+    около 10% завершённых стоянок не оплачены.
+
+    Args:
+        count: Количество записей
+        seed: Начальное значение генератора случайных чисел
+        now: Момент, к которому относится история (по умолчанию — сейчас)
+
+    Returns:
+        Список автомобилей в порядке въезда
+    """
+    rng = random.Random(seed)
+    if now is None:
+        now = datetime.now()
+    first_day = now - timedelta(days=730)
+    customers = max(1, count // 5)
+
+    cars = []
+    on_lot = set()
+    for _ in range(count):
+        customer = rng.randrange(customers)
+        hour = rng.gauss(9, 1.5) if rng.random() < 0.55 else rng.gauss(18, 2)
+        entry_time = first_day + timedelta(days=rng.randrange(729), hours=min(max(hour, 0), 23.9),
+                                           microseconds=rng.randrange(10 ** 6))
+        stay = timedelta(hours=min(rng.lognormvariate(math.log(2), 0.8), 72))
+        car = Car(
+            car_brand=BRANDS[customer % len(BRANDS)],
+            car_number=plate(customer),
+            owner_name=f"Клиент {customer}",
+            entry_time=entry_time,
+            hourly_rate=rng.choice((50.0, 100.0, 150.0)),
+            discount=rng.choice((0, 0, 0, 5, 10, 20))
+        )
+
+        if rng.random() < 0.02 and customer not in on_lot:
+            on_lot.add(customer)
+            car.entry_time = now - timedelta(minutes=rng.randrange(10, 600))
+        else:
+            car.exit_time = entry_time + stay
+            car.cost = car.calculate_current_cost()
+            if rng.random() < 0.9:
+                car.payment_status = "Оплачено"
+            else:
+                car.debt = car.cost
+        cars.append(car)
+
+    cars.sort(key=lambda car: car.entry_time)
+    # Время въезда части машин сдвинуто выше, поэтому идентификаторы выдаются заново в порядке въезда
+    generator = IdGenerator()
+    for car in cars:
+        car.id = generator.new_id(car.entry_time)
+    return cars
+
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    """Перцентиль по отсортированным значениям (ближайший ранг)"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, math.ceil(percent / 100 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+def run_operation(name: str, calls: List[Callable[[], object]], time_budget: float) -> dict:
+    """
+    Выполнение серии вызовов с замером задержки каждого
+
+    Args:
+        name: Название операции
+        calls: Вызовы
+        time_budget: Максимальное время серии в секундах (серия обрывается, если его не хватило)
+
+    Returns:
+        Словарь с количеством операций, ops/sec и задержками p50/p99 в миллисекундах
+    """
+    latencies = []
+    started = time.perf_counter()
+    for call in calls:
+        call_started = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - call_started)
+        if time.perf_counter() - started > time_budget:
+            break
+    total = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "operation": name,
+        "count": len(latencies),
+        "complete": len(latencies) == len(calls),
+        "seconds": round(total, 4),
+        "ops_per_sec": round(len(latencies) / total, 1) if total > 0 else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 4),
+    }
+
+
+def storage_size(directory: Path) -> int:
+    """Суммарный размер файлов хранилища в каталоге"""
+    return sum(path.stat().st_size for path in directory.rglob("*") if path.is_file())
+
+
+def benchmark(storage: str, count: int, ops: int, durability: str, time_budget: float) -> dict:
+    """
+    Замер одного хранилища на истории из count записей
+
+    Args:
+        storage: Имя хранилища из STORAGE_FACTORIES
+        count: Размер истории
+        ops: Количество въездов, выездов, оплат и поисков
+        durability: Уровень надёжности записи
+        time_budget: Ограничение времени на серию одной операции в секундах
+
+    Returns:
+        Результаты замера
+    """
+    directory = Path(tempfile.mkdtemp(prefix=f"parking_bench_{storage}_"))
+    try:
+        history = generate_history(count)
+        started = time.perf_counter()
+        STORAGE_FACTORIES[storage](directory).save_data(history)
+        seed_seconds = time.perf_counter() - started
+        del history
+
+        storage_service = STORAGE_FACTORIES[storage](directory)
+        if durability != DURABILITY_SYNC:
+            storage_service = WriteBehindStorageService(storage_service, durability)
+
+        started = time.perf_counter()
+        parking_service = ParkingService(storage_service)
+        load_seconds = time.perf_counter() - started
+
+        rng = random.Random(7)
+        # Номера новых машин не пересекаются с номерами из истории
+        numbers = [f"Н{i:06d}ЕХ" for i in range(ops)]
+        terms = [rng.choice((plate(rng.randrange(max(1, count // 5)))[:4], f"Клиент {rng.randrange(1000)}", "Toyota"))
+                 for _ in range(ops)]
+
+        operations = [
+            run_operation("add_car", [
+                lambda number=number: parking_service.add_car(rng.choice(BRANDS), number, "Новый клиент", 0)
+                for number in numbers
+            ], time_budget),
+            run_operation("remove_car", [
+                lambda number=number: parking_service.remove_car(number) for number in numbers
+            ], time_budget),
+            run_operation("pay_for_parking", [
+                lambda number=number: parking_service.pay_for_parking(number) for number in numbers
+            ], time_budget),
+            run_operation("search_cars", [
+                lambda term=term: parking_service.search_cars(term, limit=50) for term in terms
+            ], time_budget),
+            run_operation("get_debtors", [
+                parking_service.get_debtors for _ in range(max(1, ops // 100))
+            ], time_budget),
+        ]
+
+        started = time.perf_counter()
+        parking_service.close()
+        close_seconds = time.perf_counter() - started
+
+        return {
+            "storage": storage,
+            "durability": durability,
+            "records": count,
+            "seed_seconds": round(seed_seconds, 4),
+            "load_seconds": round(load_seconds, 4),
+            "close_seconds": round(close_seconds, 4),
+            "file_size_bytes": storage_size(directory),
+            "operations": operations,
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест ParkingService")
+    parser.add_argument("--sizes", default="1000,100000,1000000",
+                        help="Размеры истории через запятую")
+    parser.add_argument("--storage", default="journal",
+                        help=f"Хранилища через запятую: {', '.join(STORAGE_FACTORIES)}")
+    parser.add_argument("--ops", type=int, default=1000, help="Количество операций каждого вида")
+    parser.add_argument("--durability", choices=DURABILITY_LEVELS, default=DURABILITY_SYNC,
+                        help="Уровень надёжности записи")
+    parser.add_argument("--time-budget", type=float, default=60.0,
+                        help="Ограничение времени на серию одной операции, секунд")
+    parser.add_argument("--output", help="Файл для результатов (по умолчанию — стандартный вывод)")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    storages = args.storage.split(",")
+    unknown = [storage for storage in storages if storage not in STORAGE_FACTORIES]
+    if unknown:
+        parser.error(f"Неизвестные хранилища: {', '.join(unknown)}")
+
+    results = []
+    for storage in storages:
+        for count in sizes:
+            print(f"{storage}: {count} записей...", file=sys.stderr)
+            results.append(benchmark(storage, count, args.ops, args.durability, args.time_budget))
+
+    report = json.dumps({
+        "started": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "ops": args.ops,
+        "results": results,
+    }, ensure_ascii=False, indent=4)
+
+    if args.output:
+        Path(args.output).write_text(report, encoding="utf-8")
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,24 +1,139 @@
 import sys
-from services.storage_service import StorageService
-from services.parking_service import ParkingService
-from ui.gui_ui import ParkingGUI  # Импорт нового GUI
+import argparse
+import threading
+from concurrent.futures import Future
+from services.write_behind_storage_service import DURABILITY_LEVELS, DURABILITY_SYNC
+from services.storage_factory import STORAGE_TYPES, create_storage_service
+from utils.profiling import StartupProfile
+
+# Хранилища (см. storage_factory), интерфейс и NumPy импортируются при первом использовании:
+# для запуска киоска важен каждый десяток миллисекунд
+
+
+def load_parking_service(args: argparse.Namespace, profile: StartupProfile):
+    """
+    Создание хранилища и загрузка данных в ParkingService
+
+    Args:
+        args: Аргументы командной строки
+        profile: Профиль запуска
+
+    Returns:
+        Сервис автостоянки или, если заданы стоянки (--lots), MultiLotService
+    """
+    with profile.phase("импорт хранилища"):
+        storage_service = None if args.lots else create_storage_service(args.storage, args.durability)
+    with profile.phase("импорт сервиса"):
+        from services.parking_service import ParkingService
+        tariffs = None
+        if args.tariffs:
+            from services.tariff import TariffBook
+            tariffs = TariffBook.from_file(args.tariffs)
+    with profile.phase("загрузка данных"):
+        if args.lots:
+            from services.lot_service import open_lots
+            return open_lots(args.lots.split(","), args.storage, args.durability, tariffs=tariffs)
+        return ParkingService(storage_service, tariffs)
+
+
+def start_loading(args: argparse.Namespace, profile: StartupProfile) -> Future:
+    """
+    Запуск загрузки данных в фоновом потоке
+
+    Args:
+        args: Аргументы командной строки
+        profile: Профиль запуска
+
+    Returns:
+        Future, результатом которого станет сервис автостоянки
+    """
+    future = Future()
+
+    def load():
+        try:
+            future.set_result(load_parking_service(args, profile))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=load, name="loader", daemon=True).start()
+    return future
+
 
 def main():
-    print("Запуск приложения 'Автостоянка'...")
+    parser = argparse.ArgumentParser(description="Автостоянка")
+    parser.add_argument("--storage", choices=STORAGE_TYPES, default="journal",
+                        help="Тип хранилища данных")
+    parser.add_argument("--durability", choices=DURABILITY_LEVELS, default=DURABILITY_SYNC,
+                        help="Уровень надёжности записи: sync — сразу, batched/async — пачками в фоне")
+    parser.add_argument("--ui", choices=("gui", "http"), default="gui",
+                        help="Интерфейс: окно приложения или HTTP API для нескольких терминалов")
+    parser.add_argument("--host", default="127.0.0.1", help="Адрес HTTP API")
+    parser.add_argument("--port", type=int, default=8080, help="Порт HTTP API")
+    parser.add_argument("--lots",
+                        help="Стоянки через запятую (только с --ui http): у каждой своё хранилище в data/<стоянка>")
+    parser.add_argument("--tariffs", help="JSON-файл с тарифами (по умолчанию — почасовая ставка автомобиля)")
+    parser.add_argument("--migrate-ids", action="store_true",
+                        help="Перевести записи со старыми идентификаторами на новые и выйти")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Запустить приложение, вывести время этапов запуска и выйти")
+    args = parser.parse_args()
+    if args.lots and args.ui != "http":
+        parser.error("несколько стоянок (--lots) поддерживаются только с --ui http")
 
-    try:
-        storage_service = StorageService("data/parking_data.json")
-        parking_service = ParkingService(storage_service)
+    if args.migrate_ids:
+        from services.id_migration import migrate_ids
+        storage_service = create_storage_service(args.storage)
+        try:
+            count = migrate_ids(storage_service)
+        except IOError as e:
+            print(f"Ошибка при переводе идентификаторов: {e}")
+            return 1
+        finally:
+            storage_service.close()
+        print(f"Новые идентификаторы получили записей: {count}")
+        return 0
 
+    print("Запуск приложения 'Автостоянка'...")
+    profile = StartupProfile(args.profile_startup)
+    # Данные читаются, пока импортируется и строится интерфейс
+    service_future = start_loading(args, profile)
 
-        gui = ParkingGUI(parking_service)
-        gui.run()
+    try:
+        if args.ui == "http":
+            with profile.phase("импорт HTTP API"):
+                from ui.http_api import run_server
+            parking_service = service_future.result()
+            if args.profile_startup:
+                profile.report()
+            else:
+                run_server(parking_service, args.host, args.port)
+        else:
+            with profile.phase("импорт интерфейса"):
+                from ui.gui_ui import ParkingGUI
+                from ui.dispatcher import DeferredService
+            with profile.phase("построение окна"):
+                gui = ParkingGUI(DeferredService(service_future))
+                gui.root.update()
+            if args.profile_startup:
+                with profile.phase("ожидание данных"):
+                    service_future.result()
+                gui.dispatcher.shutdown()
+                gui.root.destroy()
+                profile.report()
+            else:
+                gui.run()
 
     except Exception as e:
         print(f"Произошла непредвиденная ошибка: {e}")
         return 1
+    finally:
+        # Хранилище закрывается и после ошибки интерфейса, иначе пропали бы отложенные
+        # изменения; exception() дожидается загрузки, если она ещё идёт
+        if service_future.exception() is None:
+            service_future.result().close()
 
     return 0
 
-if __name__ == "main":
-    sys.exit(main())
\ No newline at end of file
+
+if __name__ == "__main__":
+    sys.exit(main())
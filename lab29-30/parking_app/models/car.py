@@ -2,9 +2,75 @@
 Модель данных для представления автомобиля на стоянке
 """
 
-from datetime import datetime
-from dataclasses import dataclass, field
-from typing import Optional
+import struct
+from datetime import datetime, timedelta
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from models.id_generator import new_id, stable_id, is_generated_id
+
+
+# Числовая часть двоичной записи: время въезда и выезда в микросекундах от эпохи,
+# ставка, стоимость, долг, скидка и код статуса оплаты
+RECORD_STRUCT = struct.Struct("<qqdddBB")
+NO_EXIT_TIME = -2 ** 63
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+PAYMENT_STATUS_CODES = {"Не оплачено": 0, "Оплачено": 1}
+PAYMENT_STATUSES = {code: status for status, code in PAYMENT_STATUS_CODES.items()}
+
+
+def datetime_to_epoch_us(value: datetime) -> int:
+    """Время в микросекундах от эпохи (без учёта часового пояса)"""
+    return (value - EPOCH) // MICROSECOND
+
+
+def epoch_us_to_datetime(value: int) -> datetime:
+    """Время из микросекунд от эпохи"""
+    return EPOCH + timedelta(microseconds=value)
+
+
+def legacy_id(car_number: str, entry_time: datetime) -> str:
+    """
+    Идентификатор записи, сохранённой без него (старые форматы данных)
+
+    Вычисляется по номеру и точному времени въезда, поэтому при каждой
+    загрузке и каждом импорте одна и та же запись получает один и тот же
+    идентификатор.
+
+    Args:
+        car_number: Номер автомобиля
+        entry_time: Время въезда
+
+    Returns:
+        Идентификатор в формате IdGenerator
+    """
+    return stable_id(entry_time, f"{car_number}|{entry_time.isoformat()}")
+
+
+def record_key(car_id: Optional[str], car_number: str, entry_time: str) -> str:
+    """
+    Ключ записи в хранилище
+
+    Идентификатор генератора уникален и служит ключом сам по себе. Старые
+    идентификаторы (время въезда с точностью до секунды) могут совпадать
+    у разных машин, поэтому для них к ключу добавляются номер и точное
+    время въезда — до миграции идентификаторов. Для записи без
+    идентификатора ключом служит legacy_id — тот же, что получит Car.
+
+    Args:
+        car_id: Идентификатор записи
+        car_number: Номер автомобиля
+        entry_time: Время въезда в формате ISO
+
+    Returns:
+        Ключ записи
+    """
+    if is_generated_id(car_id):
+        return car_id
+    if not car_id:
+        return legacy_id(car_number, datetime.fromisoformat(entry_time))
+    return f"{car_id}|{car_number}|{entry_time}"
 
 
 @dataclass
@@ -20,7 +86,17 @@ class Car:
     payment_status: str = "Не оплачено"
     debt: float = 0.0
     cost: float = 0.0
-    id: str = field(default_factory=lambda: datetime.now().strftime("%Y%m%d%H%M%S"))
+    # Если не задан, создаётся по времени въезда: порядок идентификаторов совпадает с порядком въездов
+    id: Optional[str] = None
+
+    def __post_init__(self):
+        if self.id is None:
+            self.id = new_id(self.entry_time)
+
+    @property
+    def key(self) -> str:
+        """Ключ записи в хранилище (см. record_key)"""
+        return record_key(self.id, self.car_number, self.entry_time.isoformat())
 
     def calculate_current_cost(self, current_time: datetime = None) -> float:
         """Расчет текущей стоимости стоянки"""
@@ -71,16 +147,18 @@ class Car:
     @classmethod
     def from_dict(cls, data: dict) -> 'Car':
         """Создание объекта из словаря"""
+        entry_time = datetime.fromisoformat(data["entry_time"])
         car = cls(
             car_brand=data["car_brand"],
             car_number=data["car_number"],
             owner_name=data["owner_name"],
-            entry_time=datetime.fromisoformat(data["entry_time"]),
+            entry_time=entry_time,
             hourly_rate=data["hourly_rate"],
             discount=data["discount"],
             payment_status=data["payment_status"],
             debt=data["debt"],
-            id=data.get("id", datetime.now().strftime("%Y%m%d%H%M%S"))
+            # Запись без идентификатора при каждой загрузке получает один и тот же
+            id=data.get("id") or legacy_id(data["car_number"], entry_time)
         )
 
         if data["exit_time"]:
@@ -90,3 +168,46 @@ class Car:
             car.cost = data["cost"]
 
         return car
+
+    def to_record(self) -> tuple:
+        """Числовые поля объекта для двоичной записи RECORD_STRUCT"""
+        return (
+            datetime_to_epoch_us(self.entry_time),
+            datetime_to_epoch_us(self.exit_time) if self.exit_time else NO_EXIT_TIME,
+            self.hourly_rate,
+            self.cost,
+            self.debt,
+            self.discount,
+            PAYMENT_STATUS_CODES[self.payment_status]
+        )
+
+    def record_strings(self) -> Tuple[str, str, str, str]:
+        """Строковые поля объекта для двоичной записи"""
+        return self.id, self.car_brand, self.car_number, self.owner_name
+
+    @classmethod
+    def from_record(cls, record: tuple, strings: Tuple[str, str, str, str]) -> 'Car':
+        """
+        Создание объекта из двоичной записи
+
+        Args:
+            record: Числовые поля, распакованные RECORD_STRUCT
+            strings: Строковые поля в порядке record_strings
+
+        Returns:
+            Объект автомобиля
+        """
+        entry_us, exit_us, hourly_rate, cost, debt, discount, status_code = record
+        return cls(
+            car_brand=strings[1],
+            car_number=strings[2],
+            owner_name=strings[3],
+            entry_time=epoch_us_to_datetime(entry_us),
+            hourly_rate=hourly_rate,
+            discount=discount,
+            exit_time=None if exit_us == NO_EXIT_TIME else epoch_us_to_datetime(exit_us),
+            payment_status=PAYMENT_STATUSES[status_code],
+            debt=debt,
+            cost=cost,
+            id=strings[0]
+        )
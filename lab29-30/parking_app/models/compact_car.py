@@ -0,0 +1,147 @@
+"""
+Компактное представление автомобиля для больших историй стоянки
+"""
+
+import sys
+from datetime import datetime
+from typing import Optional
+from models.car import (
+    Car, datetime_to_epoch_us, epoch_us_to_datetime, record_key,
+    PAYMENT_STATUS_CODES, PAYMENT_STATUSES
+)
+from models.id_generator import new_id
+
+
+US_PER_HOUR = 3600 * 10 ** 6
+
+
+class CompactCar:
+    """
+    Автомобиль на стоянке с экономным расходом памяти
+
+    Вместо __dict__ используются __slots__, время хранится целым числом
+    микросекунд от эпохи, статус оплаты — кодом. Марка, номер и владелец
+    интернируются, поэтому повторные визиты одного клиента не копируют
+    строки. Интерфейс совпадает с Car: entry_time, exit_time и
+    payment_status доступны как свойства.
+    """
+
+    __slots__ = ("car_brand", "car_number", "owner_name", "hourly_rate", "discount",
+                 "debt", "cost", "id", "_entry_us", "_exit_us", "_status")
+
+    def __init__(self, car_brand: str, car_number: str, owner_name: str,
+                 entry_time: datetime, hourly_rate: float, discount: int,
+                 exit_time: Optional[datetime] = None, payment_status: str = "Не оплачено",
+                 debt: float = 0.0, cost: float = 0.0, id: Optional[str] = None):
+        self.car_brand = sys.intern(car_brand)
+        self.car_number = sys.intern(car_number)
+        self.owner_name = sys.intern(owner_name)
+        self.hourly_rate = hourly_rate
+        self.discount = discount
+        self.debt = debt
+        self.cost = cost
+        self.id = id if id is not None else new_id(entry_time)
+        self.entry_time = entry_time
+        self.exit_time = exit_time
+        self.payment_status = payment_status
+
+    @property
+    def entry_time(self) -> datetime:
+        return epoch_us_to_datetime(self._entry_us)
+
+    @entry_time.setter
+    def entry_time(self, value: datetime):
+        self._entry_us = datetime_to_epoch_us(value)
+
+    @property
+    def exit_time(self) -> Optional[datetime]:
+        return None if self._exit_us is None else epoch_us_to_datetime(self._exit_us)
+
+    @exit_time.setter
+    def exit_time(self, value: Optional[datetime]):
+        self._exit_us = None if value is None else datetime_to_epoch_us(value)
+
+    @property
+    def key(self) -> str:
+        """Ключ записи в хранилище (см. record_key)"""
+        return record_key(self.id, self.car_number, self.entry_time.isoformat())
+
+    @property
+    def payment_status(self) -> str:
+        return PAYMENT_STATUSES[self._status]
+
+    @payment_status.setter
+    def payment_status(self, value: str):
+        self._status = PAYMENT_STATUS_CODES[value]
+
+    def __repr__(self) -> str:
+        return (f"CompactCar(car_brand={self.car_brand!r}, car_number={self.car_number!r}, "
+                f"owner_name={self.owner_name!r}, entry_time={self.entry_time!r}, "
+                f"exit_time={self.exit_time!r}, payment_status={self.payment_status!r}, id={self.id!r})")
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CompactCar):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def _end_us(self, current_time: Optional[datetime]) -> int:
+        """Момент окончания стоянки в микросекундах"""
+        if self._exit_us is not None:
+            return self._exit_us
+        if current_time is None:
+            current_time = datetime.now()
+        return datetime_to_epoch_us(current_time)
+
+    def calculate_current_cost(self, current_time: datetime = None) -> float:
+        """Расчет текущей стоимости стоянки"""
+        hours = (self._end_us(current_time) - self._entry_us) / US_PER_HOUR
+        cost = hours * self.hourly_rate
+        discount_amount = cost * (self.discount / 100)
+        final_cost = cost - discount_amount
+        return max(0, round(final_cost, 2))
+
+    def get_duration(self, current_time: datetime = None) -> float:
+        """Расчет длительности пребывания на стоянке в часах"""
+        return round((self._end_us(current_time) - self._entry_us) / US_PER_HOUR, 2)
+
+    def to_dict(self) -> dict:
+        """Преобразование объекта в словарь для сохранения"""
+        return self.to_car().to_dict()
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'CompactCar':
+        """Создание объекта из словаря"""
+        return cls.from_car(Car.from_dict(data))
+
+    def to_car(self) -> Car:
+        """Преобразование в обычный объект Car"""
+        return Car(
+            car_brand=self.car_brand,
+            car_number=self.car_number,
+            owner_name=self.owner_name,
+            entry_time=self.entry_time,
+            hourly_rate=self.hourly_rate,
+            discount=self.discount,
+            exit_time=self.exit_time,
+            payment_status=self.payment_status,
+            debt=self.debt,
+            cost=self.cost,
+            id=self.id
+        )
+
+    @classmethod
+    def from_car(cls, car: Car) -> 'CompactCar':
+        """Создание компактного объекта из Car"""
+        return cls(
+            car_brand=car.car_brand,
+            car_number=car.car_number,
+            owner_name=car.owner_name,
+            entry_time=car.entry_time,
+            hourly_rate=car.hourly_rate,
+            discount=car.discount,
+            exit_time=car.exit_time,
+            payment_status=car.payment_status,
+            debt=car.debt,
+            cost=car.cost,
+            id=car.id
+        )
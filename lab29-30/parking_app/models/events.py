@@ -0,0 +1,123 @@
+"""
+События журнала стоянки: из них восстанавливается состояние всех записей
+"""
+
+from datetime import datetime
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+CAR_ENTERED = "CarEntered"
+CAR_EXITED = "CarExited"
+PAYMENT_MADE = "PaymentMade"
+DEBT_ASSIGNED = "DebtAssigned"
+# Изменение, не сводящееся к операциям стоянки (например, исправление данных владельца)
+RECORD_CORRECTED = "RecordCorrected"
+
+EVENT_TYPES = (CAR_ENTERED, CAR_EXITED, PAYMENT_MADE, DEBT_ASSIGNED, RECORD_CORRECTED)
+
+PAID_STATUS = "Оплачено"
+UNPAID_STATUS = "Не оплачено"
+
+
+@dataclass
+class Event:
+    """Событие, относящееся к одной записи о стоянке"""
+    type: str
+    # Ключ записи (см. Car.key)
+    key: str
+    # Когда событие записано
+    at: datetime
+    data: Dict[str, Any] = field(default_factory=dict)
+    # Порядковый номер в журнале (присваивается при записи)
+    seq: int = 0
+
+    def to_dict(self) -> dict:
+        """Преобразование события в словарь для сохранения"""
+        return {
+            "seq": self.seq,
+            "type": self.type,
+            "key": self.key,
+            "at": self.at.isoformat(),
+            "data": self.data
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Event':
+        """Создание события из словаря"""
+        return cls(
+            type=data["type"],
+            key=data["key"],
+            at=datetime.fromisoformat(data["at"]),
+            data=data.get("data", {}),
+            seq=data.get("seq", 0)
+        )
+
+
+def apply_event(records: Dict[str, dict], event: Event) -> dict:
+    """
+    Применение события к записям
+
+    Args:
+        records: Записи по ключу (словари в формате Car.to_dict), изменяются на месте
+        event: Событие
+
+    Returns:
+        Запись после применения события
+    """
+    if event.type in (CAR_ENTERED, RECORD_CORRECTED):
+        record = dict(event.data)
+        records[event.key] = record
+        return record
+
+    record = records[event.key]
+    if event.type == CAR_EXITED:
+        record["exit_time"] = event.data["exit_time"]
+        record["cost"] = event.data["cost"]
+    elif event.type == PAYMENT_MADE:
+        record["payment_status"] = PAID_STATUS
+        record["debt"] = 0.0
+    elif event.type == DEBT_ASSIGNED:
+        record["debt"] = event.data["debt"]
+    else:
+        raise ValueError(f"Неизвестный тип события: {event.type}")
+    return record
+
+
+def events_for_change(key: str, old: Optional[dict], new: dict, at: datetime) -> List[Event]:
+    """
+    События, переводящие запись из состояния old в состояние new
+
+    Изменения, которые делает ParkingService, выражаются событиями въезда,
+    выезда, оплаты и назначения долга. Если после них запись всё равно
+    отличается от new, добавляется событие исправления с полным состоянием.
+
+    Args:
+        key: Ключ записи
+        old: Прежнее состояние (None, если записи ещё не было)
+        new: Новое состояние
+        at: Время события
+
+    Returns:
+        Список событий (пустой, если запись не изменилась)
+    """
+    events = []
+    if old is None:
+        # Въезд фиксирует только данные на момент въезда, остальное — следующими событиями
+        old = dict(new, exit_time=None, payment_status=UNPAID_STATUS, debt=0.0, cost=0.0)
+        events.append(Event(CAR_ENTERED, key, at, dict(old)))
+
+    if new["exit_time"] != old["exit_time"] and new["exit_time"] is not None:
+        events.append(Event(CAR_EXITED, key, at, {"exit_time": new["exit_time"], "cost": new["cost"]}))
+    if new["payment_status"] == PAID_STATUS and old["payment_status"] != PAID_STATUS:
+        events.append(Event(PAYMENT_MADE, key, at))
+    if new["debt"] != (0.0 if events and events[-1].type == PAYMENT_MADE else old["debt"]):
+        events.append(Event(DEBT_ASSIGNED, key, at, {"debt": new["debt"]}))
+
+    # Проверка: события должны давать в точности новое состояние
+    state = {key: dict(old)}
+    for event in events:
+        apply_event(state, event)
+    if state[key] != new:
+        events.append(Event(RECORD_CORRECTED, key, at, dict(new)))
+    return events
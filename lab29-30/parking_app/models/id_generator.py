@@ -0,0 +1,166 @@
+"""
+Генератор уникальных идентификаторов, упорядоченных по времени (в стиле ULID)
+"""
+
+import os
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+
+# Алфавит Crockford Base32: без I, L, O, U, строки сравниваются так же, как числа
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+ID_LENGTH = 26
+TIME_LENGTH = 10
+RANDOM_BITS = 80
+MAX_RANDOM = (1 << RANDOM_BITS) - 1
+
+EPOCH = datetime(1970, 1, 1)
+MILLISECOND = timedelta(milliseconds=1)
+
+
+# Все пары символов: 10 бит кодируются одним обращением к списку
+_PAIRS = [first + second for first in ALPHABET for second in ALPHABET]
+
+
+def _encode(value: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        value, digit = divmod(value, 32)
+        chars.append(ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+def _encode_random(value: int) -> str:
+    """Кодирование 80 бит в 16 символов"""
+    return "".join([_PAIRS[value >> shift & 1023] for shift in (70, 60, 50, 40, 30, 20, 10, 0)])
+
+
+class IdGenerator:
+    """
+    Генератор идентификаторов из 26 символов
+
+    Первые 10 символов — время в миллисекундах от эпохи, остальные 16 —
+    80 случайных бит. Внутри одной миллисекунды случайная часть не
+    выбирается заново, а увеличивается на единицу, поэтому идентификаторы
+    одного процесса строго возрастают. Случайная часть берётся из
+    os.urandom, так что разные процессы (в том числе порождённые fork)
+    не повторяют друг друга. Лексикографический порядок идентификаторов
+    совпадает с порядком времени.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._last_random = 0
+        self._last_prefix = ""
+
+    def new_id(self, moment: Optional[datetime] = None) -> str:
+        """
+        Новый идентификатор
+
+        Args:
+            moment: Время, которое кодируется в идентификаторе (по умолчанию — сейчас).
+                Если время текущее, а часы переведены назад, используется время
+                предыдущего идентификатора, чтобы порядок не нарушился.
+
+        Returns:
+            Строка из 26 символов
+        """
+        explicit = moment is not None
+        if moment is None:
+            moment = datetime.now()
+        ms = (moment - EPOCH) // MILLISECOND
+
+        with self._lock:
+            if ms == self._last_ms or (ms < self._last_ms and not explicit):
+                ms = self._last_ms
+                self._last_random += 1
+                if self._last_random > MAX_RANDOM:
+                    # Случайная часть исчерпана: переходим к следующей миллисекунде
+                    ms += 1
+                    self._last_random = int.from_bytes(os.urandom(RANDOM_BITS // 8), "big")
+            else:
+                self._last_random = int.from_bytes(os.urandom(RANDOM_BITS // 8), "big")
+
+            if ms != self._last_ms:
+                self._last_ms = ms
+                self._last_prefix = _encode(ms, TIME_LENGTH)
+            prefix, random_part = self._last_prefix, self._last_random
+        return prefix + _encode_random(random_part)
+
+
+_generator = IdGenerator()
+
+
+def new_id(moment: Optional[datetime] = None) -> str:
+    """
+    Новый идентификатор из общего генератора процесса
+
+    Args:
+        moment: Время, которое кодируется в идентификаторе (по умолчанию — сейчас)
+
+    Returns:
+        Строка из 26 символов
+    """
+    return _generator.new_id(moment)
+
+
+def stable_id(moment: datetime, seed: str) -> str:
+    """
+    Идентификатор, всегда одинаковый для одних и тех же moment и seed
+
+    Нужен записям, сохранённым без идентификатора: у них он вычисляется
+    заново при каждой загрузке и должен совпадать с прежним. Формат тот же,
+    что у new_id, но вместо случайной части — 80 бит хеша seed.
+
+    Args:
+        moment: Время, которое кодируется в идентификаторе
+        seed: Строка, однозначно определяющая запись
+
+    Returns:
+        Строка из 26 символов
+    """
+    ms = (moment - EPOCH) // MILLISECOND
+    digest = hashlib.blake2b(seed.encode("utf-8"), digest_size=RANDOM_BITS // 8).digest()
+    return _encode(ms, TIME_LENGTH) + _encode_random(int.from_bytes(digest, "big"))
+
+
+def is_generated_id(value) -> bool:
+    """Является ли значение идентификатором этого генератора (а не старым идентификатором по секундам)"""
+    # strip убирает все символы алфавита: пустой остаток значит, что других символов нет
+    return (isinstance(value, str) and len(value) == ID_LENGTH and value[0] <= "7" and
+            not value.strip(ALPHABET))
+
+
+def id_time(value: str) -> datetime:
+    """
+    Время, закодированное в идентификаторе (с точностью до миллисекунды)
+
+    Args:
+        value: Идентификатор
+
+    Returns:
+        Момент времени
+    """
+    ms = 0
+    for char in value[:TIME_LENGTH]:
+        ms = ms * 32 + ALPHABET.index(char)
+    return EPOCH + ms * MILLISECOND
+
+
+def id_lower_bound(moment: datetime) -> str:
+    """
+    Наименьший идентификатор для миллисекунды, в которую попадает moment
+
+    Удобно для выборки диапазона по времени через сравнение идентификаторов.
+
+    Args:
+        moment: Момент времени
+
+    Returns:
+        Строка, не большая любого идентификатора со временем moment или позже
+    """
+    ms = (moment - EPOCH) // MILLISECOND
+    return _encode(ms, TIME_LENGTH) + ALPHABET[0] * (ID_LENGTH - TIME_LENGTH)
@@ -0,0 +1,129 @@
+"""
+Векторный расчет текущей стоимости стоянки
+"""
+
+from datetime import datetime
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+import numpy as np
+from models.car import Car, datetime_to_epoch_us
+from services.tariff import TariffBook, round_cents
+
+
+def calculate_costs(entry_us: np.ndarray, hourly_rate: np.ndarray, discount: np.ndarray,
+                    end_us) -> np.ndarray:
+    """
+    Стоимость стоянок по формуле Car.calculate_current_cost для массива записей
+
+    Args:
+        entry_us: Время въезда в микросекундах от эпохи
+        hourly_rate: Почасовые ставки
+        discount: Скидки в процентах
+        end_us: Время окончания (число или массив той же длины)
+
+    Returns:
+        Стоимости, округлённые до копеек
+    """
+    # Те же шаги, что в Car.calculate_current_cost: секунды, затем часы
+    hours = (end_us - entry_us) / 10 ** 6 / 3600
+    cost = hours * hourly_rate
+    final_cost = cost - cost * (discount / 100)
+    return np.maximum(0, round_cents(final_cost))
+
+
+@dataclass
+class OpenSessionsBill:
+    """
+    Расчет всех открытых стоянок на один момент
+
+    Колонки — массивы NumPy в порядке списка машин.
+    """
+    reference_time: datetime
+    cars: List[Car]
+    # Длительность стоянки в часах (без округления)
+    hours: np.ndarray
+    # Стоимость, округлённая до копеек
+    costs: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.cars)
+
+    @property
+    def total(self) -> float:
+        """Общая стоимость открытых стоянок"""
+        return round(float(self.costs.sum()), 2)
+
+    def rows(self) -> Iterator[dict]:
+        """Строки расчета: номер, время въезда, длительность в часах и стоимость"""
+        for car, hours, cost in zip(self.cars, self.hours.tolist(), self.costs.tolist()):
+            yield {
+                "car_number": car.car_number,
+                "entry_time": car.entry_time.isoformat(),
+                "hours": round(hours, 2),
+                "cost": cost
+            }
+
+
+class LiveCostTable:
+    """
+    Текущая стоимость машин на стоянке
+
+    Время въезда, ставки и скидки переносятся в массивы один раз при
+    изменении списка машин; стоимость на любой момент считается одной
+    векторной операцией (по одной на тариф), без обращения к объектам Car.
+    """
+
+    def __init__(self, cars: List[Car], tariffs: Optional[TariffBook] = None):
+        """
+        Args:
+            cars: Машины на стоянке (порядок сохраняется в результатах)
+            tariffs: Тарифы (если не заданы — почасовая ставка автомобиля)
+        """
+        self.cars = cars
+        self.tariffs = tariffs
+        self._car_numbers = [car.car_number for car in cars]
+        self._entry_us = np.fromiter((datetime_to_epoch_us(car.entry_time) for car in cars),
+                                     dtype=np.int64, count=len(cars))
+        self._hourly_rate = np.fromiter((car.hourly_rate for car in cars), dtype=np.float64, count=len(cars))
+        self._discount = np.fromiter((car.discount for car in cars), dtype=np.float64, count=len(cars))
+
+    def __len__(self) -> int:
+        return len(self.cars)
+
+    def costs(self, current_time: Optional[datetime] = None, count: Optional[int] = None) -> np.ndarray:
+        """
+        Стоимость стоянки на момент current_time
+
+        Args:
+            current_time: Момент расчета (по умолчанию — сейчас)
+            count: Считать только для первых count машин
+
+        Returns:
+            Массив стоимостей в порядке списка машин
+        """
+        if current_time is None:
+            current_time = datetime.now()
+        rows = slice(None) if count is None else slice(0, count)
+        if self.tariffs is not None:
+            return self.tariffs.costs(self._car_numbers[rows], self._entry_us[rows],
+                                      datetime_to_epoch_us(current_time), self._discount[rows])
+        return calculate_costs(self._entry_us[rows], self._hourly_rate[rows], self._discount[rows],
+                               datetime_to_epoch_us(current_time))
+
+    def bill(self, reference_time: datetime) -> OpenSessionsBill:
+        """
+        Стоимость и длительность всех стоянок на момент reference_time
+
+        Args:
+            reference_time: Момент расчета (один для всех машин)
+
+        Returns:
+            Таблица расчета
+        """
+        end_us = datetime_to_epoch_us(reference_time)
+        return OpenSessionsBill(
+            reference_time=reference_time,
+            cars=self.cars,
+            hours=(end_us - self._entry_us) / 10 ** 6 / 3600,
+            costs=self.costs(reference_time)
+        )
@@ -0,0 +1,204 @@
+"""
+Сервис хранения данных в компактном двоичном формате
+
+Преобразование существующего файла:
+    python -m services.binary_storage_service data/parking_data.json data/parking_data.bin
+"""
+
+import sys
+import struct
+import argparse
+from array import array
+from itertools import accumulate, chain
+from typing import Iterator, List
+from pathlib import Path
+from models.car import Car, RECORD_STRUCT
+from services.storage_service import StorageService
+from services.json_stream import iter_cars
+
+
+# Заголовок файла: сигнатура, версия формата, зарезервированное поле, количество записей.
+# За ним идут три блока: числовые части всех записей (RECORD_STRUCT),
+# длины строк в символах (по четыре uint16 на запись) и все строки одним блоком UTF-8.
+HEADER_STRUCT = struct.Struct("<4sHHI")
+BLOCK_SIZE_STRUCT = struct.Struct("<Q")
+MAGIC = b"PKBN"
+FORMAT_VERSION = 1
+STRINGS_PER_RECORD = 4
+
+
+def _little_endian(values: array) -> array:
+    """Приведение массива к порядку байтов файла (little-endian)"""
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+class BinaryStorageService(StorageService):
+    """
+    Класс для хранения автомобилей в двоичном файле
+
+    Отличается от StorageService только форматом файла: блокировка
+    <файл>.lock и номер версии в <файл>.version те же, поэтому с одним
+    файлом могут работать несколько процессов.
+    """
+
+    def __init__(self, data_file: str = "parking_data.bin"):
+        """
+        Инициализация сервиса хранения
+
+        Args:
+            data_file: Путь к двоичному файлу с данными
+        """
+        super().__init__(data_file)
+
+    @staticmethod
+    def decode(buffer: bytes) -> List[Car]:
+        """
+        Разбор содержимого двоичного файла
+
+        Args:
+            buffer: Содержимое файла
+
+        Returns:
+            Список автомобилей
+        """
+        magic, version, _, count = HEADER_STRUCT.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("Файл не является двоичным файлом автостоянки")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Неподдерживаемая версия формата: {version}")
+
+        view = memoryview(buffer)
+        offset = HEADER_STRUCT.size
+        records_end = offset + count * RECORD_STRUCT.size
+        records = RECORD_STRUCT.iter_unpack(view[offset:records_end])
+
+        lengths_end = records_end + count * STRINGS_PER_RECORD * 2
+        lengths = array("H")
+        lengths.frombytes(view[records_end:lengths_end])
+        _little_endian(lengths)
+
+        (text_size,) = BLOCK_SIZE_STRUCT.unpack_from(buffer, lengths_end)
+        text_start = lengths_end + BLOCK_SIZE_STRUCT.size
+        text = str(view[text_start:text_start + text_size], "utf-8")
+
+        ends = list(accumulate(lengths))
+        starts = [0] + ends[:-1]
+        strings = list(map(text.__getitem__, map(slice, starts, ends)))
+
+        return [
+            Car.from_record(record, strings[i:i + STRINGS_PER_RECORD])
+            for i, record in zip(range(0, len(strings), STRINGS_PER_RECORD), records)
+        ]
+
+    @staticmethod
+    def encode(cars: List[Car]) -> bytes:
+        """
+        Формирование содержимого двоичного файла
+
+        Args:
+            cars: Список автомобилей
+
+        Returns:
+            Содержимое файла
+        """
+        strings = list(chain.from_iterable(car.record_strings() for car in cars))
+        lengths = _little_endian(array("H", map(len, strings)))
+        text = "".join(strings).encode("utf-8")
+
+        return b"".join((
+            HEADER_STRUCT.pack(MAGIC, FORMAT_VERSION, 0, len(cars)),
+            b"".join(RECORD_STRUCT.pack(*car.to_record()) for car in cars),
+            lengths.tobytes(),
+            BLOCK_SIZE_STRUCT.pack(len(text)),
+            text
+        ))
+
+    def _load_file(self) -> List[Car]:
+        """Чтение файла данных (load_data вызывает его под блокировкой)"""
+        if not self.data_path.exists():
+            return []
+
+        try:
+            return self.decode(self.data_path.read_bytes())
+        except (struct.error, ValueError, KeyError, OverflowError) as e:
+            print(f"Ошибка при чтении файла данных: {e}")
+            backup_file = f"{self.data_file}.bak"
+            self.data_path.rename(backup_file)
+            print(f"Создана резервная копия файла данных: {backup_file}")
+            return []
+
+    def iter_all(self) -> Iterator[Car]:
+        """
+        Все записи файла
+
+        Двоичный файл разбирается только целиком. Файл заменяется при
+        сохранении, поэтому читается одна его версия.
+
+        Returns:
+            Итератор автомобилей
+        """
+        if self.data_path.exists():
+            yield from self.decode(self.data_path.read_bytes())
+
+    def save_data(self, cars: List[Car]) -> bool:
+        """
+        Сохранение данных в файл
+
+        Args:
+            cars: Список автомобилей для сохранения
+
+        Returns:
+            Успешность операции
+        """
+        try:
+            self.data_path.parent.mkdir(parents=True, exist_ok=True)
+            content = self.encode(cars)
+
+            with self._file_lock:
+                temp_file = f"{self.data_file}.tmp"
+                Path(temp_file).write_bytes(content)
+                Path(temp_file).replace(self.data_file)
+                self._write_version(max(self._read_version(), self._version) + 1)
+            return True
+        except Exception as e:
+            print(f"Ошибка при сохранении данных: {e}")
+            return False
+
+
+def convert_json_to_binary(json_file: str, binary_file: str) -> int:
+    """
+    Преобразование файла parking_data.json в двоичный формат
+
+    Args:
+        json_file: Исходный JSON-файл
+        binary_file: Создаваемый двоичный файл
+
+    Returns:
+        Количество преобразованных записей
+    """
+    # Двоичный файл пишется целиком, но исходный текст и словари в памяти не накапливаются
+    cars = list(iter_cars(json_file))
+
+    if not BinaryStorageService(binary_file).save_data(cars):
+        raise OSError(f"Не удалось записать файл {binary_file}")
+    return len(cars)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Преобразование parking_data.json в двоичный формат")
+    parser.add_argument("json_file", help="Исходный JSON-файл")
+    parser.add_argument("binary_file", help="Создаваемый двоичный файл")
+    args = parser.parse_args()
+
+    count = convert_json_to_binary(args.json_file, args.binary_file)
+    json_size = Path(args.json_file).stat().st_size
+    binary_size = Path(args.binary_file).stat().st_size
+    print(f"Преобразовано записей: {count}")
+    print(f"Размер: {json_size} -> {binary_size} байт")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
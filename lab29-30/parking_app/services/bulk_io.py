@@ -0,0 +1,550 @@
+"""
+Массовый импорт и экспорт записей о стоянках (JSON, старый JSON, CSV, JSON Lines)
+
+Запуск из каталога parking_app:
+    python -m services.bulk_io import old/parking_data.json --storage sqlite
+    python -m services.bulk_io export history.csv --storage journal
+    python -m services.bulk_io export history.csv --storage sqlite --history --start 2024-01-01
+    python -m services.bulk_io convert old/parking_data.json history.jsonl
+"""
+
+import sys
+import csv
+import json
+import math
+import time
+import argparse
+from datetime import datetime
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+from models.car import Car, PAYMENT_STATUS_CODES, legacy_id
+from services.json_stream import iter_json_array
+
+
+FORMAT_JSON = "json"  # JSON-массив в формате Car.to_dict (как у StorageService)
+FORMAT_LEGACY = "legacy"  # JSON-массив первых версий приложения: без id, время через пробел
+FORMAT_JSONL = "jsonl"  # по записи Car.to_dict на строку
+FORMAT_CSV = "csv"
+
+FORMATS = (FORMAT_JSON, FORMAT_LEGACY, FORMAT_JSONL, FORMAT_CSV)
+
+CSV_COLUMNS = ("id", "car_brand", "car_number", "owner_name", "entry_time", "hourly_rate",
+               "discount", "exit_time", "payment_status", "debt", "cost")
+
+DEFAULT_BATCH_SIZE = 50000
+# Сколько сообщений об ошибках хранить в отчёте (считаются все)
+MAX_REPORTED_ERRORS = 20
+
+
+def detect_format(path: str) -> str:
+    """
+    Формат файла по расширению (.csv, .jsonl/.ndjson, остальное — JSON)
+
+    Старый JSON отдельно указывать не нужно: при чтении он разбирается так же,
+    как JSON в формате Car.to_dict.
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix == ".csv":
+        return FORMAT_CSV
+    if suffix in (".jsonl", ".ndjson"):
+        return FORMAT_JSONL
+    return FORMAT_JSON
+
+
+@dataclass
+class TransferReport:
+    """Итоги импорта или экспорта"""
+    read: int = 0
+    written: int = 0
+    invalid: int = 0
+    # Первые MAX_REPORTED_ERRORS ошибок: (номер записи, сообщение)
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Записей в секунду"""
+        return self.written / self.seconds if self.seconds > 0 else 0.0
+
+    def add_error(self, number: int, message: str):
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((number, message))
+
+    def print(self, file=sys.stdout):
+        """Вывод итогов и первых ошибок"""
+        print(f"Прочитано записей: {self.read}", file=file)
+        print(f"Отклонено: {self.invalid}", file=file)
+        for number, message in self.errors:
+            print(f"  запись {number}: {message}", file=file)
+        if self.invalid > len(self.errors):
+            print(f"  ... и ещё {self.invalid - len(self.errors)}", file=file)
+        print(f"Записано: {self.written} за {self.seconds:.2f} с ({self.rate:,.0f} записей/с)", file=file)
+
+
+def read_records(path: str, file_format: Optional[str] = None) -> Iterator[Tuple[int, Any]]:
+    """
+    Записи файла в исходном виде по одной
+
+    Файл читается потоково, так что объём памяти не зависит от его размера.
+
+    Args:
+        path: Путь к файлу
+        file_format: Формат (по умолчанию — по расширению)
+
+    Returns:
+        Итератор пар (номер записи, запись): для CSV и JSON Lines номер —
+        это номер строки, для JSON — порядковый номер элемента массива
+    """
+    file_format = file_format or detect_format(path)
+    if file_format == FORMAT_CSV:
+        with open(path, "r", encoding="utf-8", newline="") as file:
+            # csv.reader с ручной сборкой словарей заметно быстрее csv.DictReader
+            reader = csv.reader(file)
+            header = next(reader, None)
+            for row in reader:
+                if row:
+                    yield reader.line_num, dict(zip(header, row))
+    elif file_format == FORMAT_JSONL:
+        with open(path, "r", encoding="utf-8") as file:
+            for number, line in enumerate(file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield number, json.loads(line)
+                except json.JSONDecodeError as e:
+                    # Повреждённая строка отклоняется при проверке, остальные читаются дальше
+                    yield number, e
+    else:
+        with open(path, "r", encoding="utf-8") as file:
+            yield from enumerate(iter_json_array(file), start=1)
+
+
+def _text(data: dict, name: str) -> str:
+    value = data.get(name)
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError(f"не заполнено поле {name}")
+    return value
+
+
+def _number(data: dict, name: str, default: Optional[float] = None, integer: bool = False):
+    value = data.get(name)
+    if value is None or value == "":
+        if default is None:
+            raise ValueError(f"не заполнено поле {name}")
+        return default
+    if isinstance(value, bool):
+        raise ValueError(f"поле {name}: ожидалось число, а не {value!r}")
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"поле {name}: ожидалось число, а не {value!r}") from None
+    if not math.isfinite(number) or number < 0:
+        raise ValueError(f"поле {name}: недопустимое значение {value!r}")
+    if integer:
+        if not number.is_integer():
+            raise ValueError(f"поле {name}: ожидалось целое число, а не {value!r}")
+        return int(number)
+    return number
+
+
+def _moment(data: dict, name: str, required: bool = True) -> Optional[datetime]:
+    value = data.get(name)
+    if value is None or value == "":
+        if required:
+            raise ValueError(f"не заполнено поле {name}")
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"поле {name}: неверное время {value!r}") from None
+
+
+def _parse_valid(data: Any) -> Optional[Car]:
+    """
+    Быстрый разбор записи без подробных сообщений об ошибках
+
+    Корректные записи (а их подавляющее большинство) разбираются без
+    вызова проверок по каждому полю. При любом сомнении возвращается None,
+    и запись проверяется подробно в parse_record.
+    """
+    try:
+        entry_time = datetime.fromisoformat(data["entry_time"])
+        exit_value = data["exit_time"]
+        exit_time = datetime.fromisoformat(exit_value) if exit_value else None
+        numbers = (data["hourly_rate"], data["discount"], data["debt"], data.get("cost", 0.0))
+        hourly_rate, discount, debt, cost = map(float, numbers)
+        car_brand, car_number, owner_name = data["car_brand"], data["car_number"], data["owner_name"]
+        payment_status = data["payment_status"]
+        car_id = data.get("id") or None
+        valid = (payment_status in PAYMENT_STATUS_CODES and
+                 (exit_time is None or exit_time >= entry_time) and
+                 0 <= hourly_rate < math.inf and 0 <= debt < math.inf and 0 <= cost < math.inf and
+                 0 <= discount <= 100 and discount.is_integer() and
+                 True not in map(isinstance, numbers, (bool,) * 4) and
+                 type(car_brand) is str and type(car_number) is str and type(owner_name) is str and
+                 car_brand.strip() and car_number.strip() and owner_name.strip() and
+                 (car_id is None or type(car_id) is str))
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return None
+    if not valid:
+        return None
+    return Car(car_brand, car_number, owner_name, entry_time, hourly_rate, int(discount),
+               exit_time, payment_status, debt, cost, car_id or legacy_id(car_number, entry_time))
+
+
+def parse_record(data: Any) -> Car:
+    """
+    Проверка записи и создание автомобиля
+
+    Подходит для всех форматов: числа в CSV приходят строками, у записей
+    старого формата нет стоимости и id (он вычисляется по номеру и времени
+    въезда, см. legacy_id, так что повторный импорт заменяет записи).
+
+    Args:
+        data: Запись в виде словаря
+
+    Returns:
+        Автомобиль
+
+    Raises:
+        ValueError: Если запись неполна или содержит недопустимые значения
+    """
+    if isinstance(data, json.JSONDecodeError):
+        raise ValueError(f"повреждённый JSON ({data.msg})")
+    if not isinstance(data, dict):
+        raise ValueError("запись не является объектом")
+
+    entry_time = _moment(data, "entry_time")
+    exit_time = _moment(data, "exit_time", required=False)
+    if exit_time is not None and exit_time < entry_time:
+        raise ValueError("время выезда раньше времени въезда")
+
+    discount = _number(data, "discount", integer=True)
+    if discount > 100:
+        raise ValueError(f"поле discount: скидка больше 100% ({discount})")
+
+    payment_status = data.get("payment_status")
+    if not isinstance(payment_status, str) or payment_status not in PAYMENT_STATUS_CODES:
+        raise ValueError(f"поле payment_status: неизвестный статус {payment_status!r}")
+
+    car_id = data.get("id") or None
+    if car_id is not None and not isinstance(car_id, str):
+        raise ValueError(f"поле id: ожидалась строка, а не {car_id!r}")
+
+    car_number = _text(data, "car_number")
+    return Car(
+        car_brand=_text(data, "car_brand"),
+        car_number=car_number,
+        owner_name=_text(data, "owner_name"),
+        entry_time=entry_time,
+        hourly_rate=_number(data, "hourly_rate"),
+        discount=discount,
+        exit_time=exit_time,
+        payment_status=payment_status,
+        debt=_number(data, "debt", default=0.0),
+        cost=_number(data, "cost", default=0.0),
+        # Повторный импорт той же записи без id должен заменить её, а не добавить копию
+        id=car_id or legacy_id(car_number, entry_time)
+    )
+
+
+def validate_chunk(records: List[Tuple[int, Any]], report: TransferReport) -> List[Car]:
+    """
+    Проверка пачки записей
+
+    Args:
+        records: Пары (номер записи, запись)
+        report: Отчёт, в который записываются ошибки
+
+    Returns:
+        Автомобили из прошедших проверку записей
+    """
+    cars = []
+    for number, data in records:
+        car = _parse_valid(data)
+        if car is None:
+            try:
+                car = parse_record(data)
+            except ValueError as e:
+                report.add_error(number, str(e))
+                continue
+        cars.append(car)
+    report.read += len(records)
+    return cars
+
+
+def iter_valid_batches(records: Iterable[Tuple[int, Any]], report: TransferReport,
+                       batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[Car]]:
+    """
+    Проверенные автомобили пачками по batch_size исходных записей
+
+    Записи читаются и проверяются только по мере запроса следующей пачки,
+    поэтому в памяти держится одна пачка.
+
+    Args:
+        records: Пары (номер записи, запись)
+        report: Отчёт о переносе
+        batch_size: Размер пачки
+
+    Returns:
+        Итератор пачек автомобилей
+    """
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, batch_size))
+        if not chunk:
+            return
+        cars = validate_chunk(chunk, report)
+        if cars:
+            report.written += len(cars)
+            yield cars
+
+
+def legacy_dict(car: Car) -> dict:
+    """Запись в формате первых версий приложения (без id, время через пробел)"""
+    return {
+        "car_brand": car.car_brand,
+        "car_number": car.car_number,
+        "owner_name": car.owner_name,
+        "entry_time": car.entry_time.isoformat(sep=" "),
+        "hourly_rate": car.hourly_rate,
+        "discount": car.discount,
+        "exit_time": car.exit_time.isoformat(sep=" ") if car.exit_time else None,
+        "payment_status": car.payment_status,
+        "debt": car.debt,
+        "cost": car.cost
+    }
+
+
+def _json_element(data: dict) -> str:
+    # Тот же вид, что у json.dump(список, indent=4): элемент сдвинут на один уровень
+    return "    " + json.dumps(data, ensure_ascii=False, indent=4).replace("\n", "\n    ")
+
+
+def write_records(cars: Iterable[Car], path: str, file_format: Optional[str] = None,
+                  batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Потоковая запись автомобилей в файл
+
+    Записи форматируются и пишутся пачками по batch_size, файл пишется
+    во временный и заменяет прежний только после успешной записи.
+
+    Args:
+        cars: Автомобили
+        path: Путь к файлу
+        file_format: Формат (по умолчанию — по расширению)
+        batch_size: Размер пачки
+
+    Returns:
+        Количество записанных автомобилей
+    """
+    file_format = file_format or detect_format(path)
+    if file_format not in FORMATS:
+        raise ValueError(f"Неизвестный формат: {file_format}")
+
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = Path(f"{path}.tmp")
+    cars = iter(cars)
+    count = 0
+
+    with open(temp_file, "w", encoding="utf-8", newline="") as file:
+        if file_format == FORMAT_CSV:
+            writer = csv.writer(file)
+            writer.writerow(CSV_COLUMNS)
+        elif file_format in (FORMAT_JSON, FORMAT_LEGACY):
+            file.write("[")
+
+        while True:
+            batch = list(islice(cars, batch_size))
+            if not batch:
+                break
+            if file_format == FORMAT_CSV:
+                writer.writerows(
+                    [car.id, car.car_brand, car.car_number, car.owner_name, car.entry_time.isoformat(),
+                     car.hourly_rate, car.discount, car.exit_time.isoformat() if car.exit_time else "",
+                     car.payment_status, car.debt, car.cost]
+                    for car in batch
+                )
+            elif file_format == FORMAT_JSONL:
+                file.write("".join(json.dumps(car.to_dict(), ensure_ascii=False) + "\n" for car in batch))
+            else:
+                to_dict = legacy_dict if file_format == FORMAT_LEGACY else Car.to_dict
+                file.write(("," if count else "") + "\n" +
+                           ",\n".join(_json_element(to_dict(car)) for car in batch))
+            count += len(batch)
+
+        if file_format in (FORMAT_JSON, FORMAT_LEGACY):
+            file.write("\n]" if count else "]")
+
+    temp_file.replace(target)
+    return count
+
+
+def import_file(path: str, storage_service, file_format: Optional[str] = None,
+                batch_size: int = DEFAULT_BATCH_SIZE) -> TransferReport:
+    """
+    Импорт файла в хранилище
+
+    Записи читаются потоково, проверяются пачками, а прошедшие проверку
+    записываются через save_batches хранилища. Записи с тем же ключом,
+    что у уже сохранённых, заменяют их.
+
+    Args:
+        path: Путь к файлу
+        storage_service: Хранилище (BaseStorageService)
+        file_format: Формат файла (по умолчанию — по расширению)
+        batch_size: Размер пачки
+
+    Returns:
+        Отчёт об импорте
+
+    Raises:
+        IOError: Если хранилище не смогло записать данные
+    """
+    report = TransferReport()
+    started = time.perf_counter()
+    batches = iter_valid_batches(read_records(path, file_format), report, batch_size)
+    if not storage_service.save_batches(batches):
+        raise IOError("Не удалось записать импортированные записи в хранилище")
+    storage_service.flush()
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def export_storage(storage_service, path: str, file_format: Optional[str] = None,
+                   batch_size: int = DEFAULT_BATCH_SIZE) -> TransferReport:
+    """
+    Экспорт всех записей хранилища в файл
+
+    Args:
+        storage_service: Хранилище (BaseStorageService)
+        path: Путь к файлу
+        file_format: Формат файла (по умолчанию — по расширению)
+        batch_size: Размер пачки
+
+    Returns:
+        Отчёт об экспорте
+    """
+    report = TransferReport()
+    started = time.perf_counter()
+    report.written = report.read = write_records(storage_service.iter_all(), path, file_format, batch_size)
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def export_history(parking_service, path: str, file_format: Optional[str] = None,
+                   batch_size: int = DEFAULT_BATCH_SIZE, start: Optional[datetime] = None,
+                   end: Optional[datetime] = None) -> TransferReport:
+    """
+    Экспорт завершённых стоянок в файл
+
+    Записи берутся из ParkingService.iter_parking_history и пишутся
+    по мере чтения, поэтому история не собирается в памяти целиком.
+
+    Args:
+        parking_service: Сервис автостоянки (ParkingService)
+        path: Путь к файлу
+        file_format: Формат файла (по умолчанию — по расширению)
+        batch_size: Размер пачки
+        start: Начало интервала времени въезда (включительно)
+        end: Конец интервала времени въезда (не включительно)
+
+    Returns:
+        Отчёт об экспорте
+    """
+    report = TransferReport()
+    started = time.perf_counter()
+    history = parking_service.iter_parking_history(start, end)
+    report.written = report.read = write_records(history, path, file_format, batch_size)
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def convert_file(source: str, target: str, source_format: Optional[str] = None,
+                 target_format: Optional[str] = None, batch_size: int = DEFAULT_BATCH_SIZE) -> TransferReport:
+    """
+    Преобразование файла из одного формата в другой с проверкой записей
+
+    Args:
+        source: Исходный файл
+        target: Создаваемый файл
+        source_format: Формат исходного файла (по умолчанию — по расширению)
+        target_format: Формат создаваемого файла (по умолчанию — по расширению)
+        batch_size: Размер пачки
+
+    Returns:
+        Отчёт о преобразовании
+    """
+    report = TransferReport()
+    started = time.perf_counter()
+    batches = iter_valid_batches(read_records(source, source_format), report, batch_size)
+    write_records((car for batch in batches for car in batch), target, target_format, batch_size)
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def main():
+    from services.storage_factory import STORAGE_TYPES, create_storage_service
+    from services.parking_service import ParkingService
+
+    parser = argparse.ArgumentParser(description="Массовый импорт и экспорт записей о стоянках")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Количество записей, проверяемых и записываемых за раз")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="Загрузить файл в хранилище")
+    import_parser.add_argument("file", help="Исходный файл")
+    import_parser.add_argument("--format", choices=FORMATS, help="Формат файла (по умолчанию — по расширению)")
+
+    export_parser = commands.add_parser("export", help="Выгрузить все записи хранилища в файл")
+    export_parser.add_argument("file", help="Создаваемый файл")
+    export_parser.add_argument("--format", choices=FORMATS, help="Формат файла (по умолчанию — по расширению)")
+    export_parser.add_argument("--history", action="store_true", help="Выгрузить только завершённые стоянки")
+    export_parser.add_argument("--start", type=datetime.fromisoformat,
+                               help="С --history: начало интервала времени въезда (ISO, включительно)")
+    export_parser.add_argument("--end", type=datetime.fromisoformat,
+                               help="С --history: конец интервала времени въезда (ISO, не включительно)")
+
+    for command_parser in (import_parser, export_parser):
+        command_parser.add_argument("--storage", choices=STORAGE_TYPES, default="journal", help="Тип хранилища")
+        command_parser.add_argument("--data-dir", default="data", help="Каталог с файлами данных")
+
+    convert_parser = commands.add_parser("convert", help="Преобразовать файл в другой формат")
+    convert_parser.add_argument("source", help="Исходный файл")
+    convert_parser.add_argument("target", help="Создаваемый файл")
+    convert_parser.add_argument("--from", dest="source_format", choices=FORMATS,
+                                help="Формат исходного файла (по умолчанию — по расширению)")
+    convert_parser.add_argument("--to", dest="target_format", choices=FORMATS,
+                                help="Формат создаваемого файла (по умолчанию — по расширению)")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "convert":
+            report = convert_file(args.source, args.target, args.source_format, args.target_format,
+                                  args.batch_size)
+        else:
+            storage_service = create_storage_service(args.storage, data_dir=args.data_dir)
+            try:
+                if args.command == "import":
+                    report = import_file(args.file, storage_service, args.format, args.batch_size)
+                elif args.history:
+                    report = export_history(ParkingService(storage_service), args.file, args.format,
+                                            args.batch_size, args.start, args.end)
+                else:
+                    report = export_storage(storage_service, args.file, args.format, args.batch_size)
+            finally:
+                storage_service.close()
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Ошибка: {e}")
+        return 1
+
+    report.print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
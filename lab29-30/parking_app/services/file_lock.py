@@ -0,0 +1,94 @@
+"""
+Межпроцессная блокировка через файл
+"""
+
+import threading
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """
+    Эксклюзивная блокировка файла, общая для процессов и потоков
+
+    Блокировку можно захватывать повторно в том же потоке: файл
+    блокируется при первом захвате и освобождается при последнем
+    освобождении. Другие потоки этого процесса ждут так же, как и
+    другие процессы.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Путь к файлу блокировки (создаётся при необходимости)
+        """
+        self.path = Path(path)
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._owner = None
+        self._file = None
+
+    def acquire(self):
+        """Захват блокировки (с ожиданием)"""
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, "a+b")
+                self._lock_file()
+            except BaseException:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._thread_lock.release()
+                raise
+            self._owner = threading.get_ident()
+        self._depth += 1
+
+    def release(self):
+        """Освобождение блокировки"""
+        self._depth -= 1
+        if self._depth == 0:
+            self._owner = None
+            try:
+                self._unlock_file()
+            finally:
+                self._file.close()
+                self._file = None
+        self._thread_lock.release()
+
+    def held_by_current_thread(self) -> bool:
+        """Захвачена ли блокировка текущим потоком"""
+        return self._owner == threading.get_ident()
+
+    def _lock_file(self):
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            return
+        # msvcrt.locking ждёт около 10 секунд и сдаётся, поэтому повторяем
+        self._file.seek(0)
+        while True:
+            try:
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+
+    def _unlock_file(self):
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
@@ -0,0 +1,274 @@
+"""
+Колоночная таблица стоянок и аналитика по выручке на NumPy
+"""
+
+from datetime import datetime
+from typing import List, Dict, Tuple, Optional, Iterable
+import numpy as np
+from models.car import Car, datetime_to_epoch_us, NO_EXIT_TIME, PAYMENT_STATUS_CODES
+
+
+SESSION_DTYPE = np.dtype([
+    ("entry_us", np.int64),
+    ("exit_us", np.int64),
+    ("hourly_rate", np.float64),
+    ("discount", np.float64),
+    ("cost", np.float64),
+    ("debt", np.float64),
+    ("status", np.uint8),
+])
+
+PAID = PAYMENT_STATUS_CODES["Оплачено"]
+UNPAID = PAYMENT_STATUS_CODES["Не оплачено"]
+US_PER_HOUR = 3600 * 10 ** 6
+US_PER_DAY = 24 * US_PER_HOUR
+
+
+class HistoryTable:
+    """
+    Таблица стоянок в виде колонок NumPy
+
+    Каждой стоянке (включая текущие) соответствует строка с временем
+    въезда и выезда в микросекундах от эпохи, ставкой, скидкой,
+    стоимостью, долгом и кодом статуса оплаты. Строки обновляются
+    по мере изменения автомобилей, а отчёты считаются векторно.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        """
+        Инициализация пустой таблицы
+
+        Args:
+            capacity: Начальная ёмкость в строках
+        """
+        self._data = np.zeros(capacity, dtype=SESSION_DTYPE)
+        self._size = 0
+        # Номер строки по ключу записи
+        self._rows: Dict[str, int] = {}
+
+    @classmethod
+    def from_cars(cls, cars: Iterable[Car]) -> 'HistoryTable':
+        """
+        Построение таблицы по списку автомобилей
+
+        Args:
+            cars: Автомобили
+
+        Returns:
+            Заполненная таблица
+        """
+        cars = list(cars)
+        table = cls(max(len(cars), 1024))
+        table._data[:len(cars)] = np.array([cls._to_row(car) for car in cars], dtype=SESSION_DTYPE)
+        table._rows = {car.key: row for row, car in enumerate(cars)}
+        table._size = len(cars)
+        return table
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def _to_row(car: Car) -> tuple:
+        """Строка таблицы для автомобиля"""
+        return (
+            datetime_to_epoch_us(car.entry_time),
+            datetime_to_epoch_us(car.exit_time) if car.exit_time else NO_EXIT_TIME,
+            car.hourly_rate,
+            car.discount,
+            car.cost,
+            car.debt,
+            PAYMENT_STATUS_CODES[car.payment_status]
+        )
+
+    def upsert(self, car: Car):
+        """
+        Добавление или обновление строки автомобиля
+
+        Args:
+            car: Добавленный или изменённый автомобиль
+        """
+        key = car.key
+        row = self._rows.get(key)
+        if row is None:
+            if self._size == len(self._data):
+                self._data = np.resize(self._data, len(self._data) * 2)
+            row = self._size
+            self._rows[key] = row
+            self._size += 1
+        self._data[row] = self._to_row(car)
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Колонка таблицы (без копирования)
+
+        Args:
+            name: Имя колонки из SESSION_DTYPE
+
+        Returns:
+            Массив значений
+        """
+        return self._data[name][:self._size]
+
+    def _closed_mask(self, start: Optional[datetime], end: Optional[datetime]) -> np.ndarray:
+        """Маска завершённых стоянок с выездом в [start, end)"""
+        exit_us = self.column("exit_us")
+        mask = exit_us != NO_EXIT_TIME
+        if start is not None:
+            mask &= exit_us >= datetime_to_epoch_us(start)
+        if end is not None:
+            mask &= exit_us < datetime_to_epoch_us(end)
+        return mask
+
+    def total_revenue(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                      paid_only: bool = True) -> float:
+        """
+        Выручка за период (по времени выезда)
+
+        Args:
+            start: Начало периода (включительно)
+            end: Конец периода (не включительно)
+            paid_only: Учитывать только оплаченные стоянки
+
+        Returns:
+            Сумма стоимости стоянок
+        """
+        mask = self._closed_mask(start, end)
+        if paid_only:
+            mask &= self.column("status") == PAID
+        return float(self.column("cost")[mask].sum())
+
+    def revenue_by_period(self, unit: str = "D", start: Optional[datetime] = None,
+                          end: Optional[datetime] = None,
+                          paid_only: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Выручка по календарным периодам (по времени выезда)
+
+        Args:
+            unit: Единица периода NumPy: "h" — час, "D" — день, "M" — месяц, "Y" — год
+            start: Начало периода (включительно)
+            end: Конец периода (не включительно)
+            paid_only: Учитывать только оплаченные стоянки
+
+        Returns:
+            Кортеж (начала периодов datetime64, выручка за каждый период)
+        """
+        mask = self._closed_mask(start, end)
+        if paid_only:
+            mask &= self.column("status") == PAID
+        if not mask.any():
+            return np.array([], dtype=f"datetime64[{unit}]"), np.array([], dtype=np.float64)
+
+        periods = self.column("exit_us")[mask].astype("datetime64[us]").astype(f"datetime64[{unit}]")
+        period_index = periods.astype(np.int64)
+        first = period_index.min()
+        totals = np.bincount(period_index - first, weights=self.column("cost")[mask])
+        labels = np.arange(first, first + len(totals)).astype(f"datetime64[{unit}]")
+        return labels, totals
+
+    def revenue_by_day(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                       paid_only: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """Выручка по дням (см. revenue_by_period)"""
+        return self.revenue_by_period("D", start, end, paid_only)
+
+    def revenue_by_month(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                         paid_only: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """Выручка по месяцам (см. revenue_by_period)"""
+        return self.revenue_by_period("M", start, end, paid_only)
+
+    def revenue_by_hour_of_day(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                               paid_only: bool = True) -> np.ndarray:
+        """
+        Распределение выручки по часу выезда (0–23)
+
+        Args:
+            start: Начало периода (включительно)
+            end: Конец периода (не включительно)
+            paid_only: Учитывать только оплаченные стоянки
+
+        Returns:
+            Массив из 24 сумм
+        """
+        mask = self._closed_mask(start, end)
+        if paid_only:
+            mask &= self.column("status") == PAID
+        hours = (self.column("exit_us")[mask] % US_PER_DAY) // US_PER_HOUR
+        return np.bincount(hours, weights=self.column("cost")[mask], minlength=24)
+
+    def average_stay(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> float:
+        """
+        Средняя длительность завершённой стоянки в часах
+
+        Args:
+            start: Начало периода (включительно)
+            end: Конец периода (не включительно)
+
+        Returns:
+            Средняя длительность (0, если стоянок нет)
+        """
+        mask = self._closed_mask(start, end)
+        if not mask.any():
+            return 0.0
+        stays = self.column("exit_us")[mask] - self.column("entry_us")[mask]
+        return float(stays.mean() / US_PER_HOUR)
+
+    def _occupancy_at(self, times: np.ndarray) -> np.ndarray:
+        """Количество машин на стоянке в моменты times (микросекунды от эпохи)"""
+        exit_us = self.column("exit_us")
+        entries = np.sort(self.column("entry_us"))
+        exits = np.sort(exit_us[exit_us != NO_EXIT_TIME])
+        return (np.searchsorted(entries, times, side="right") -
+                np.searchsorted(exits, times, side="right"))
+
+    def occupancy(self, moments: List[datetime]) -> np.ndarray:
+        """
+        Количество машин на стоянке в заданные моменты времени
+
+        Args:
+            moments: Моменты времени
+
+        Returns:
+            Массив количеств машин
+        """
+        return self._occupancy_at(np.array([datetime_to_epoch_us(moment) for moment in moments], dtype=np.int64))
+
+    def occupancy_over_time(self, start: datetime, end: datetime,
+                            step_minutes: int = 60) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Загрузка стоянки на равномерной сетке времени
+
+        Args:
+            start: Начало интервала
+            end: Конец интервала
+            step_minutes: Шаг сетки в минутах
+
+        Returns:
+            Кортеж (моменты datetime64, количество машин)
+        """
+        step = step_minutes * 60 * 10 ** 6
+        times = np.arange(datetime_to_epoch_us(start), datetime_to_epoch_us(end), step, dtype=np.int64)
+        return times.astype("datetime64[us]"), self._occupancy_at(times)
+
+    def debt_aging(self, current_time: Optional[datetime] = None,
+                   bounds_days: Tuple[int, ...] = (7, 30, 90)) -> Dict[str, Tuple[int, float]]:
+        """
+        Структура задолженности по давности выезда
+
+        Args:
+            current_time: Момент расчета (по умолчанию — сейчас)
+            bounds_days: Границы корзин в днях
+
+        Returns:
+            Словарь "0-7", "7-30", ..., "90+" -> (количество должников, сумма долга)
+        """
+        if current_time is None:
+            current_time = datetime.now()
+
+        mask = (self.column("status") == UNPAID) & (self.column("debt") > 0) & self._closed_mask(None, None)
+        age_days = (datetime_to_epoch_us(current_time) - self.column("exit_us")[mask]) / US_PER_DAY
+        buckets = np.searchsorted(np.array(bounds_days), age_days, side="right")
+        counts = np.bincount(buckets, minlength=len(bounds_days) + 1)
+        sums = np.bincount(buckets, weights=self.column("debt")[mask], minlength=len(bounds_days) + 1)
+
+        edges = (0,) + tuple(bounds_days)
+        labels = [f"{low}-{high}" for low, high in zip(edges, edges[1:])] + [f"{edges[-1]}+"]
+        return {label: (int(count), float(total)) for label, count, total in zip(labels, counts, sums)}
@@ -0,0 +1,46 @@
+"""
+Перевод записей со старыми идентификаторами на идентификаторы IdGenerator
+"""
+
+from typing import List
+from models.car import Car
+from models.id_generator import IdGenerator, is_generated_id
+
+
+def assign_ids(cars: List[Car]) -> int:
+    """
+    Новые идентификаторы для записей со старыми (время въезда до секунды)
+
+    Записи обрабатываются в порядке въезда, поэтому порядок новых
+    идентификаторов совпадает с порядком въезда.
+
+    Args:
+        cars: Записи (изменяются на месте)
+
+    Returns:
+        Количество записей, получивших новый идентификатор
+    """
+    generator = IdGenerator()
+    count = 0
+    for car in sorted(cars, key=lambda car: car.entry_time):
+        if not is_generated_id(car.id):
+            car.id = generator.new_id(car.entry_time)
+            count += 1
+    return count
+
+
+def migrate_ids(storage_service) -> int:
+    """
+    Перевод всего хранилища на новые идентификаторы
+
+    Args:
+        storage_service: Хранилище (BaseStorageService)
+
+    Returns:
+        Количество записей, получивших новый идентификатор
+    """
+    cars = storage_service.load_all()
+    count = assign_ids(cars)
+    if count and not storage_service.replace_all(cars):
+        raise IOError("Не удалось сохранить записи с новыми идентификаторами")
+    return count
@@ -0,0 +1,440 @@
+"""
+Сервис хранения данных в виде журнала изменений (JSON Lines)
+"""
+
+import os
+import sys
+import json
+import threading
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
+from pathlib import Path
+from models.car import Car, record_key
+from services.storage_service import StorageService
+from services.json_stream import iter_json_array
+
+
+class JournalStorageService(StorageService):
+    """
+    Хранилище со снимком и журналом изменений
+
+    Снимок хранится в том же формате, что и у StorageService (JSON-массив),
+    а каждое изменение дописывается в журнал одной строкой JSON.
+    Когда журнал разрастается, он в фоновом потоке сворачивается в новый снимок.
+
+    Каждая строка журнала получает следующий номер версии (поле seq), поэтому
+    процесс, работающий с тем же хранилищем, дочитывает только строки,
+    появившиеся после его версии, а не загружает всё заново.
+    """
+
+    appends_changes = True
+
+    def __init__(self, data_file: str = "parking_data.json", compact_threshold: int = 1000):
+        """
+        Инициализация сервиса хранения
+
+        Args:
+            data_file: Путь к файлу снимка
+            compact_threshold: Количество записей в журнале, после которого запускается сжатие
+        """
+        super().__init__(data_file)
+        self.journal_file = f"{data_file}.journal"
+        self.journal_path = Path(self.journal_file)
+        # Журнал, который в данный момент сворачивается в снимок
+        self.compacting_path = Path(f"{data_file}.journal.old")
+        self.compact_threshold = compact_threshold
+
+        self._lock = threading.Lock()
+        self._journal = None
+        self._journal_records = 0
+        self._compaction_thread: Optional[threading.Thread] = None
+
+        # Докуда журнал уже прочитан: идентификатор файла (устройство, inode) и позиция
+        self._journal_id: Optional[Tuple[int, int]] = None
+        self._journal_offset = 0
+        # Изменения других процессов, прочитанные, но ещё не отданные через refresh
+        self._foreign_changes: Dict[str, dict] = {}
+        self._needs_reload = False
+
+    @staticmethod
+    def _record_key(car_data: dict) -> str:
+        """
+        Ключ записи в журнале (см. record_key)
+
+        Args:
+            car_data: Словарь с данными автомобиля
+
+        Returns:
+            Ключ записи
+        """
+        return record_key(car_data.get('id'), car_data['car_number'], car_data['entry_time'])
+
+    @staticmethod
+    def _read_journal(path: Path, offset: int = 0) -> Tuple[List[Tuple[int, dict]], int]:
+        """
+        Чтение записей журнала
+
+        Незаконченная последняя строка (запись в процессе или оборванная
+        при аварийном завершении) не читается.
+
+        Args:
+            path: Путь к файлу журнала
+            offset: Позиция в байтах, с которой начинать чтение
+
+        Returns:
+            Кортеж (список пар (версия, данные автомобиля), позиция после последней прочитанной строки)
+        """
+        if not path.exists():
+            return [], 0
+
+        with open(path, "rb") as file:
+            file.seek(offset)
+            data = file.read()
+        end = data.rfind(b"\n") + 1
+
+        entries = []
+        for line in data[:end].decode("utf-8").splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                car_data = json.loads(line)
+            except json.JSONDecodeError:
+                # Повреждённая строка после аварийного завершения
+                print(f"Пропущена повреждённая запись журнала {path}")
+                continue
+            # Записи, сделанные до появления версий, считаются версией 0
+            entries.append((car_data.pop("seq", 0), car_data))
+        return entries, offset + end
+
+    @staticmethod
+    def _file_id(path: Path) -> Optional[Tuple[int, int]]:
+        """Идентификатор файла, не меняющийся при дозаписи, но меняющийся при замене"""
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_dev, stat.st_ino
+
+    def _remember_journal_position(self, offset: int):
+        """Запоминание, докуда прочитан текущий журнал"""
+        self._journal_id = self._file_id(self.journal_path)
+        self._journal_offset = offset if self._journal_id is not None else 0
+
+    def _read_snapshot(self) -> Dict[str, dict]:
+        """
+        Чтение снимка в виде словаря записей по ключу
+
+        Returns:
+            Записи снимка
+        """
+        if not self.data_path.exists():
+            return {}
+
+        with open(self.data_file, "r", encoding="utf-8") as file:
+            return {self._record_key(car_data): car_data for car_data in iter_json_array(file)}
+
+    def iter_all(self) -> Iterator[Car]:
+        """
+        Записи снимка с изменениями из журнала, по одной
+
+        Журнал невелик (он регулярно сворачивается) и читается целиком,
+        а снимок разбирается по одной записи.
+
+        Returns:
+            Итератор автомобилей
+        """
+        with self._file_lock:
+            # Снимок и журналы открываются согласованно: сжатие не может заменить их между чтениями
+            snapshot = open(self.data_file, "r", encoding="utf-8") if self.data_path.exists() else None
+            old_entries, _ = self._read_journal(self.compacting_path)
+            entries, _ = self._read_journal(self.journal_path)
+        changes = {self._record_key(car_data): car_data for _, car_data in old_entries + entries}
+
+        if snapshot is not None:
+            with snapshot:
+                for car_data in iter_json_array(snapshot):
+                    yield Car.from_dict(changes.pop(self._record_key(car_data), car_data))
+        for car_data in changes.values():
+            yield Car.from_dict(car_data)
+
+    def load_data(self) -> List[Car]:
+        """
+        Загрузка снимка и воспроизведение журнала
+
+        Returns:
+            Список автомобилей
+        """
+        self.wait_for_compaction()
+
+        with self._file_lock:
+            self._version = self._read_version()
+            self._foreign_changes.clear()
+            self._needs_reload = False
+
+            try:
+                records = self._read_snapshot()
+            except (json.JSONDecodeError, KeyError) as e:
+                print(f"Ошибка при чтении файла данных: {e}")
+                backup_file = f"{self.data_file}.bak"
+                self.data_path.rename(backup_file)
+                print(f"Создана резервная копия файла данных: {backup_file}")
+                records = {}
+
+            try:
+                # Незавершённое сжатие: старый журнал применяется раньше текущего
+                old_entries, _ = self._read_journal(self.compacting_path)
+                entries, offset = self._read_journal(self.journal_path)
+                for _, car_data in old_entries + entries:
+                    records[self._record_key(car_data)] = car_data
+                cars = [Car.from_dict(car_data) for car_data in records.values()]
+            except KeyError as e:
+                print(f"Ошибка при чтении журнала: {e}")
+                return []
+
+            self._journal_records = len(entries)
+            self._remember_journal_position(offset)
+            # Процесс мог завершиться между записью в журнал и обновлением версии
+            last_seq = max((seq for seq, _ in old_entries + entries), default=0)
+            if last_seq > self._version:
+                self._write_version(last_seq)
+
+            if self.compacting_path.exists():
+                # Доводим прерванное сжатие до конца (сжатие в другом процессе при этом отменится)
+                self.save_data(cars)
+            return cars
+
+    def save_data(self, cars: List[Car]) -> bool:
+        """
+        Полное сохранение: запись нового снимка и очистка журнала
+
+        Args:
+            cars: Список автомобилей для сохранения
+
+        Returns:
+            Успешность операции
+        """
+        self.wait_for_compaction()
+
+        with self._file_lock, self._lock:
+            if not super().save_data(cars):
+                return False
+
+            self._close_journal()
+            self.journal_path.unlink(missing_ok=True)
+            self.compacting_path.unlink(missing_ok=True)
+            self._journal_records = 0
+            self._remember_journal_position(0)
+            self._foreign_changes.clear()
+            return True
+
+    def refresh(self) -> Optional[List[Car]]:
+        """
+        Изменения, записанные другими процессами
+
+        Если версия на диске не изменилась, журнал не читается. Иначе
+        дочитываются только новые строки журнала; полная перезагрузка нужна,
+        лишь когда нужные строки уже свёрнуты в снимок.
+
+        Returns:
+            Изменённые и добавленные автомобили или None, если нужна полная загрузка
+        """
+        if not self._foreign_changes and not self._needs_reload and self._read_version() == self._version:
+            return []
+
+        with self._file_lock:
+            self._catch_up()
+            if self._needs_reload:
+                return None
+            changes = [Car.from_dict(car_data) for car_data in self._foreign_changes.values()]
+            self._foreign_changes.clear()
+            return changes
+
+    def _catch_up(self):
+        """Чтение строк журнала, записанных другими процессами (под блокировкой)"""
+        version = self._read_version()
+        if version == self._version:
+            return
+
+        if self._file_id(self.journal_path) == self._journal_id:
+            entries, offset = self._read_journal(self.journal_path, self._journal_offset)
+        else:
+            # Журнал был свёрнут: его прежнее содержимое лежит в старом журнале, если сжатие не закончилось
+            old_entries, _ = self._read_journal(self.compacting_path)
+            entries, offset = self._read_journal(self.journal_path)
+            entries = old_entries + entries
+        self._remember_journal_position(offset)
+
+        new_entries = [(seq, car_data) for seq, car_data in entries if seq > self._version]
+        if not new_entries or new_entries[0][0] != self._version + 1 or new_entries[-1][0] != version:
+            # Части изменений в журналах уже нет (снимок перезаписан или журнал свёрнут)
+            self._needs_reload = True
+        else:
+            for _, car_data in new_entries:
+                self._foreign_changes[self._record_key(car_data)] = car_data
+        self._version = version
+
+    def save_car(self, car: Car, cars: List[Car]) -> bool:
+        """
+        Дозапись изменения одного автомобиля в журнал
+
+        Args:
+            car: Добавленный или изменённый автомобиль
+            cars: Полный список автомобилей (не используется)
+
+        Returns:
+            Успешность операции
+        """
+        return self.save_cars([car], cars)
+
+    def save_cars(self, changed: List[Car], cars: List[Car]) -> bool:
+        """
+        Дозапись пачки изменений в журнал одной операцией записи
+
+        Args:
+            changed: Добавленные или изменённые автомобили
+            cars: Полный список автомобилей (не используется)
+
+        Returns:
+            Успешность операции
+        """
+        try:
+            with self._file_lock:
+                # Сначала дочитываем чужие изменения, чтобы не перепутать номера версий
+                self._catch_up()
+                with self._lock:
+                    if self._journal is not None and self._file_id(self.journal_path) != self._open_journal_id():
+                        # Журнал свернул другой процесс, открытый файл уже не текущий журнал
+                        self._close_journal()
+                    if self._journal is None:
+                        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+                        self._journal = open(self.journal_file, "a", encoding="utf-8")
+
+                    lines = "".join(
+                        json.dumps(dict(car.to_dict(), seq=self._version + number), ensure_ascii=False) + "\n"
+                        for number, car in enumerate(changed, start=1)
+                    )
+                    self._journal.write(lines)
+                    self._journal.flush()
+                    self._journal_records += len(changed)
+                    need_compaction = self._journal_records >= self.compact_threshold
+
+                    self._write_version(self._version + len(changed))
+                    self._remember_journal_position(os.fstat(self._journal.fileno()).st_size)
+        except OSError as e:
+            print(f"Ошибка при записи в журнал: {e}")
+            return False
+
+        if need_compaction:
+            self.compact()
+        return True
+
+    def save_batches(self, batches: Iterable[List[Car]]) -> bool:
+        """
+        Дозапись пачек в журнал (массовый импорт)
+
+        Журнал сворачивается один раз после импорта, а не каждые
+        compact_threshold записей: иначе снимок переписывался бы целиком
+        сотни раз подряд.
+
+        Args:
+            batches: Пачки добавляемых или изменяемых автомобилей
+
+        Returns:
+            Успешность операции
+        """
+        threshold, self.compact_threshold = self.compact_threshold, sys.maxsize
+        try:
+            result = super().save_batches(batches)
+        finally:
+            self.compact_threshold = threshold
+        if result and self._journal_records >= threshold:
+            self.compact()
+        return result
+
+    def compact(self) -> bool:
+        """
+        Запуск фонового сжатия журнала в снимок
+
+        Returns:
+            True, если сжатие запущено
+        """
+        with self._file_lock, self._lock:
+            if self._compaction_thread is not None and self._compaction_thread.is_alive():
+                return False
+            if self.compacting_path.exists() or not self.journal_path.exists():
+                return False
+
+            # Новые изменения пишутся в свежий журнал, старый уходит на сжатие
+            self._close_journal()
+            self.journal_path.rename(self.compacting_path)
+            self._journal_records = 0
+
+            self._compaction_thread = threading.Thread(target=self._compact_worker, daemon=True)
+            self._compaction_thread.start()
+            return True
+
+    def _compact_worker(self):
+        """Слияние снимка со старым журналом (выполняется в фоновом потоке)"""
+        try:
+            snapshot_id = self._snapshot_id()
+            records = self._read_snapshot()
+            entries, _ = self._read_journal(self.compacting_path)
+            for _, car_data in entries:
+                records[self._record_key(car_data)] = car_data
+
+            # Сжатие могут выполнять сразу несколько процессов: у каждого свой временный файл
+            temp_file = Path(f"{self.data_file}.compact.{os.getpid()}.tmp")
+            with open(temp_file, "w", encoding="utf-8") as file:
+                json.dump(list(records.values()), file, ensure_ascii=False, indent=4)
+
+            with self._file_lock:
+                if not self.compacting_path.exists() or self._snapshot_id() != snapshot_id:
+                    # Пока шло сжатие, другой процесс сам записал полный снимок
+                    temp_file.unlink()
+                    return
+                temp_file.replace(self.data_file)
+                self.compacting_path.unlink()
+        except Exception as e:
+            # Старый журнал остаётся на диске и будет применён при следующей загрузке
+            print(f"Ошибка при сжатии журнала: {e}")
+
+    def _snapshot_id(self) -> Optional[tuple]:
+        """Признак версии файла снимка (меняется при его замене)"""
+        try:
+            stat = self.data_path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def _open_journal_id(self) -> Tuple[int, int]:
+        """Идентификатор файла, открытого для дозаписи"""
+        stat = os.fstat(self._journal.fileno())
+        return stat.st_dev, stat.st_ino
+
+    def wait_for_compaction(self):
+        """
+        Ожидание завершения фонового сжатия
+
+        Если текущий поток держит межпроцессную блокировку (например, внутри
+        transaction), ожидания нет: поток сжатия ждёт ту же блокировку, и
+        они ждали бы друг друга вечно. Такого ожидания и не требуется —
+        загрузка читает снимок, старый и текущий журналы как есть, а полный
+        снимок, записанный при незавершённом сжатии, поток сжатия замечает
+        и свой результат отбрасывает.
+        """
+        thread = self._compaction_thread
+        if thread is not None and thread is not threading.current_thread() and \
+                not self._file_lock.held_by_current_thread():
+            thread.join()
+
+    def _close_journal(self):
+        """Закрытие файла журнала"""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def close(self):
+        """Завершение работы: дожидаемся сжатия и закрываем журнал"""
+        self.wait_for_compaction()
+        with self._lock:
+            self._close_journal()
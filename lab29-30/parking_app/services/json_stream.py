@@ -0,0 +1,117 @@
+"""
+Потоковое чтение JSON-массива: элементы разбираются по одному
+"""
+
+import re
+import json
+from typing import Any, Iterator, TextIO
+from models.car import Car
+
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+# Символы, которыми может продолжаться число
+NUMBER_TAIL = re.compile(r"[0-9+\-.eE]*\Z")
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+def iter_json_array(file: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Элементы JSON-массива верхнего уровня по одному
+
+    Файл читается кусками по chunk_size символов, а в памяти держится
+    только непрочитанный остаток куска и текущий элемент, поэтому объём
+    памяти не зависит от размера файла.
+
+    Args:
+        file: Текстовый файл, содержащий JSON-массив
+        chunk_size: Размер читаемого куска в символах
+
+    Returns:
+        Итератор элементов массива
+
+    Raises:
+        json.JSONDecodeError: Если файл не является JSON-массивом
+    """
+    decoder = json.JSONDecoder()
+    buffer = file.read(chunk_size)
+    eof = len(buffer) < chunk_size
+    position = WHITESPACE.match(buffer, 0).end()
+
+    def read_more() -> bool:
+        """Дочитывание следующего куска с отбрасыванием уже разобранного текста"""
+        nonlocal buffer, position, eof
+        if eof:
+            return False
+        chunk = file.read(chunk_size)
+        eof = len(chunk) < chunk_size
+        buffer = buffer[position:] + chunk
+        position = 0
+        return bool(chunk)
+
+    while position >= len(buffer) and read_more():
+        position = WHITESPACE.match(buffer, position).end()
+    if position >= len(buffer) or buffer[position] != "[":
+        raise json.JSONDecodeError("Ожидался JSON-массив", buffer, position)
+    position += 1
+    expect_value = True
+    after_comma = False
+
+    while True:
+        position = WHITESPACE.match(buffer, position).end()
+        if position >= len(buffer):
+            if read_more():
+                continue
+            raise json.JSONDecodeError("Файл оборвался внутри массива", buffer, position)
+
+        if buffer[position] == "]":
+            if after_comma:
+                raise json.JSONDecodeError("Лишняя запятая перед концом массива", buffer, position)
+            break
+
+        if not expect_value:
+            if buffer[position] != ",":
+                raise json.JSONDecodeError("Ожидалась запятая", buffer, position)
+            position += 1
+            expect_value = after_comma = True
+            continue
+
+        try:
+            value, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            # Элемент не поместился в прочитанный кусок
+            if read_more():
+                continue
+            raise
+        if (isinstance(value, (int, float)) and not isinstance(value, bool) and
+                NUMBER_TAIL.match(buffer, end) and read_more()):
+            # Число на границе куска могло оборваться: разбираем ещё раз с продолжением
+            continue
+
+        position = end
+        expect_value = after_comma = False
+        yield value
+
+    # После массива допустимы только пробельные символы, как у json.load
+    position += 1
+    while True:
+        position = WHITESPACE.match(buffer, position).end()
+        if position < len(buffer):
+            raise json.JSONDecodeError("Лишние данные после массива", buffer, position)
+        if not read_more():
+            return
+
+
+def iter_cars(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Car]:
+    """
+    Автомобили из JSON-файла в формате StorageService по одному
+
+    Args:
+        path: Путь к файлу
+        chunk_size: Размер читаемого куска в символах
+
+    Returns:
+        Итератор автомобилей
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        for car_data in iter_json_array(file, chunk_size):
+            yield Car.from_dict(car_data)
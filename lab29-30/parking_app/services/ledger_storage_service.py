@@ -0,0 +1,382 @@
+"""
+Хранилище в виде журнала событий со снимками состояния
+"""
+
+import os
+import json
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from pathlib import Path
+from models.car import Car
+from models.events import Event, apply_event, events_for_change
+from services.storage_service import StorageService
+
+
+class LedgerStorageService(StorageService):
+    """
+    Хранилище, в котором источник истины — журнал событий
+
+    Каждое изменение записи превращается в события CarEntered, CarExited,
+    PaymentMade или DebtAssigned и дописывается в <файл>.events (JSON Lines,
+    у каждого события свой номер seq). Журнал никогда не переписывается,
+    поэтому по нему можно восстановить состояние на любой момент и заново
+    построить любой индекс или отчёт (см. events и rebuild).
+
+    Чтобы восстановление после сбоя не читало весь журнал, каждые
+    snapshot_interval событий в фоне записывается снимок: состояние всех
+    записей вместе с номером последнего события и позицией в журнале.
+    При загрузке читается снимок и воспроизводятся только события после него.
+    Повреждённый снимок не страшен — состояние восстанавливается из журнала.
+    """
+
+    appends_changes = True
+
+    def __init__(self, data_file: str = "parking_ledger.json", snapshot_interval: int = 1000):
+        """
+        Инициализация сервиса хранения
+
+        Args:
+            data_file: Путь к файлу снимка (журнал событий — <файл>.events)
+            snapshot_interval: Количество событий, после которого записывается новый снимок
+        """
+        super().__init__(data_file)
+        self.events_file = f"{data_file}.events"
+        self.events_path = Path(self.events_file)
+        self.snapshot_interval = snapshot_interval
+
+        self._lock = threading.Lock()
+        self._events = None
+        # Состояние всех записей по ключу (словари в формате Car.to_dict)
+        self._records: Dict[str, dict] = {}
+        # Докуда прочитан журнал событий
+        self._events_offset = 0
+        self._events_since_snapshot = 0
+        self._snapshot_thread: Optional[threading.Thread] = None
+        # Записи, изменённые другими процессами и ещё не отданные через refresh
+        self._foreign_keys: Set[str] = set()
+        self._loaded = False
+
+    @staticmethod
+    def _read_events(path: Path, offset: int = 0) -> Tuple[List[Event], int]:
+        """
+        Чтение событий журнала начиная с позиции offset
+
+        Незаконченная последняя строка (запись в процессе или оборванная
+        при аварийном завершении) не читается.
+
+        Args:
+            path: Путь к журналу событий
+            offset: Позиция в байтах
+
+        Returns:
+            Кортеж (список событий, позиция после последней прочитанной строки)
+        """
+        if not path.exists():
+            return [], 0
+
+        with open(path, "rb") as file:
+            file.seek(offset)
+            data = file.read()
+        end = data.rfind(b"\n") + 1
+
+        events = []
+        for line in data[:end].decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            try:
+                events.append(Event.from_dict(json.loads(line)))
+            except (json.JSONDecodeError, KeyError, ValueError):
+                print(f"Пропущена повреждённая запись журнала {path}")
+        return events, offset + end
+
+    def _read_snapshot(self) -> Tuple[Dict[str, dict], int, int]:
+        """
+        Чтение снимка
+
+        Returns:
+            Кортеж (записи по ключу, номер последнего учтённого события, позиция в журнале)
+        """
+        if not self.data_path.exists():
+            return {}, 0, 0
+        try:
+            with open(self.data_file, "r", encoding="utf-8") as file:
+                snapshot = json.load(file)
+            return snapshot["records"], snapshot["seq"], snapshot["offset"]
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            print(f"Снимок {self.data_file} повреждён ({e}), состояние восстанавливается из журнала")
+            return {}, 0, 0
+
+    def load_data(self) -> List[Car]:
+        """
+        Загрузка снимка и воспроизведение событий после него
+
+        Returns:
+            Список автомобилей
+        """
+        self.wait_for_snapshot()
+
+        with self._file_lock, self._lock:
+            records, seq, offset = self._read_snapshot()
+            if offset > self._file_size(self.events_path):
+                # Снимок новее журнала (журнал заменён вручную): верим журналу
+                records, seq, offset = {}, 0, 0
+
+            events, self._events_offset = self._read_events(self.events_path, offset)
+            events = [event for event in events if event.seq > seq]
+            self._replay(records, events)
+            seq = events[-1].seq if events else seq
+            self._records = records
+            self._loaded = True
+            self._events_since_snapshot = len(events)
+            self._foreign_keys.clear()
+
+            # Процесс мог завершиться между записью событий и обновлением версии
+            self._version = self._read_version()
+            if seq > self._version:
+                self._write_version(seq)
+
+            return [Car.from_dict(record) for record in records.values()]
+
+    @staticmethod
+    def _replay(records: Dict[str, dict], events: List[Event]):
+        """Применение событий по порядку; события к неизвестным записям пропускаются"""
+        for event in events:
+            try:
+                apply_event(records, event)
+            except KeyError:
+                # Событие въезда было в повреждённой строке журнала
+                print(f"Пропущено событие {event.seq} для неизвестной записи {event.key}")
+
+    @staticmethod
+    def _file_size(path: Path) -> int:
+        try:
+            return path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def save_data(self, cars: List[Car]) -> bool:
+        """
+        Сохранение полного списка: события для всех отличающихся записей
+
+        Журнал только дополняется, поэтому записи, которых нет в cars,
+        не удаляются.
+
+        Args:
+            cars: Список автомобилей для сохранения
+
+        Returns:
+            Успешность операции
+        """
+        return self.save_cars(cars, cars)
+
+    def save_car(self, car: Car, cars: List[Car]) -> bool:
+        """
+        Запись событий изменения одного автомобиля
+
+        Args:
+            car: Добавленный или изменённый автомобиль
+            cars: Полный список автомобилей (не используется)
+
+        Returns:
+            Успешность операции
+        """
+        return self.save_cars([car], cars)
+
+    def save_cars(self, changed: List[Car], cars: List[Car]) -> bool:
+        """
+        Запись событий изменения пачки автомобилей одной операцией записи
+
+        Args:
+            changed: Добавленные или изменённые автомобили
+            cars: Полный список автомобилей (не используется)
+
+        Returns:
+            Успешность операции
+        """
+        try:
+            with self._file_lock, self._lock:
+                # Сначала дочитываем чужие события: от них зависят и номера, и прежние состояния
+                self._catch_up()
+
+                now = datetime.now()
+                events = []
+                for car in changed:
+                    key = car.key
+                    for event in events_for_change(key, self._records.get(key), car.to_dict(), now):
+                        event.seq = self._version + len(events) + 1
+                        apply_event(self._records, event)
+                        events.append(event)
+                if not events:
+                    return True
+
+                if self._events is None:
+                    self.events_path.parent.mkdir(parents=True, exist_ok=True)
+                    self._events = open(self.events_file, "a", encoding="utf-8")
+                self._events.write("".join(json.dumps(event.to_dict(), ensure_ascii=False) + "\n"
+                                           for event in events))
+                self._events.flush()
+                self._events_offset = os.fstat(self._events.fileno()).st_size
+                self._write_version(events[-1].seq)
+
+                self._events_since_snapshot += len(events)
+                need_snapshot = self._events_since_snapshot >= self.snapshot_interval
+        except OSError as e:
+            print(f"Ошибка при записи в журнал событий: {e}")
+            return False
+
+        if need_snapshot:
+            self.snapshot()
+        return True
+
+    def save_batches(self, batches: Iterable[List[Car]]) -> bool:
+        """
+        Запись событий для пачек записей (массовый импорт)
+
+        Прежние состояния записей нужны для событий, поэтому сначала
+        загружается снимок, чтобы не воспроизводить журнал целиком.
+
+        Args:
+            batches: Пачки добавляемых или изменяемых автомобилей
+
+        Returns:
+            Успешность операции
+        """
+        if not self._loaded:
+            self.load_data()
+        return super().save_batches(batches)
+
+    def refresh(self) -> Optional[List[Car]]:
+        """
+        Записи, изменённые событиями других процессов
+
+        Returns:
+            Изменённые и добавленные автомобили
+        """
+        if not self._foreign_keys and self._read_version() == self._version:
+            return []
+
+        with self._file_lock, self._lock:
+            self._catch_up()
+            changes = [Car.from_dict(self._records[key]) for key in self._foreign_keys]
+            self._foreign_keys.clear()
+            return changes
+
+    def _catch_up(self):
+        """Применение событий, записанных другими процессами (под блокировками)"""
+        if self._read_version() == self._version:
+            return
+        events, self._events_offset = self._read_events(self.events_path, self._events_offset)
+        events = [event for event in events if event.seq > self._version]
+        self._replay(self._records, events)
+        self._foreign_keys.update(event.key for event in events if event.key in self._records)
+        if events:
+            self._version = events[-1].seq
+        self._events_since_snapshot += len(events)
+
+    def iter_all(self) -> Iterator[Car]:
+        """
+        Все записи по одной
+
+        Состояние и так держится в памяти (словари), объекты Car создаются
+        по мере обхода.
+
+        Returns:
+            Итератор автомобилей
+        """
+        if not self._loaded:
+            self.load_data()
+        with self._file_lock, self._lock:
+            self._catch_up()
+            records = list(self._records.values())
+        for record in records:
+            yield Car.from_dict(record)
+
+    def snapshot(self) -> bool:
+        """
+        Запуск фоновой записи снимка текущего состояния
+
+        Returns:
+            True, если запись снимка запущена
+        """
+        with self._lock:
+            if self._snapshot_thread is not None and self._snapshot_thread.is_alive():
+                return False
+            # Копия состояния: записи меняются на месте следующими событиями
+            records = {key: dict(record) for key, record in self._records.items()}
+            seq, offset = self._version, self._events_offset
+            self._events_since_snapshot = 0
+
+            self._snapshot_thread = threading.Thread(target=self._snapshot_worker,
+                                                     args=(records, seq, offset), daemon=True)
+            self._snapshot_thread.start()
+            return True
+
+    def _snapshot_worker(self, records: Dict[str, dict], seq: int, offset: int):
+        """Запись снимка (выполняется в фоновом потоке)"""
+        try:
+            temp_file = Path(f"{self.data_file}.snapshot.tmp")
+            with open(temp_file, "w", encoding="utf-8") as file:
+                json.dump({"seq": seq, "offset": offset, "records": records}, file, ensure_ascii=False)
+
+            # Даже если другой процесс успел записать снимок новее, этот тоже верен:
+            # при загрузке просто будет воспроизведено больше событий
+            with self._file_lock:
+                temp_file.replace(self.data_file)
+        except Exception as e:
+            # Снимок лишь ускоряет загрузку: без него состояние восстановится из журнала
+            print(f"Ошибка при записи снимка: {e}")
+
+    def wait_for_snapshot(self):
+        """Ожидание завершения фоновой записи снимка"""
+        thread = self._snapshot_thread
+        if thread is not None:
+            thread.join()
+
+    def events(self, after_seq: int = 0) -> Iterator[Event]:
+        """
+        События журнала по порядку
+
+        Читается построчно, поэтому годится для журналов любого размера.
+
+        Args:
+            after_seq: Пропустить события с номерами не больше этого
+
+        Returns:
+            Итератор событий
+        """
+        if not self.events_path.exists():
+            return
+        with open(self.events_file, "r", encoding="utf-8") as file:
+            for line in file:
+                if not line.endswith("\n"):
+                    # Событие дописывается прямо сейчас
+                    return
+                try:
+                    event = Event.from_dict(json.loads(line))
+                except (json.JSONDecodeError, KeyError, ValueError):
+                    continue
+                if event.seq > after_seq:
+                    yield event
+
+    def rebuild(self, until: Optional[datetime] = None) -> List[Car]:
+        """
+        Состояние записей, восстановленное только по журналу событий
+
+        Args:
+            until: Учитывать события, записанные до этого момента (по умолчанию — все)
+
+        Returns:
+            Список автомобилей
+        """
+        records: Dict[str, dict] = {}
+        self._replay(records, [event for event in self.events() if until is None or event.at < until])
+        return [Car.from_dict(record) for record in records.values()]
+
+    def close(self):
+        """Завершение работы: дожидаемся записи снимка и закрываем журнал"""
+        self.wait_for_snapshot()
+        with self._lock:
+            if self._events is not None:
+                self._events.close()
+                self._events = None
@@ -0,0 +1,260 @@
+"""
+Несколько стоянок в одном процессе: каждая стоянка — отдельный ParkingService
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
+from models.car import Car
+from services.parking_service import ParkingService
+from services.search_index import match_rank
+from services.storage_factory import create_storage_service
+from services.write_behind_storage_service import DURABILITY_SYNC
+
+if TYPE_CHECKING:
+    from services.tariff import TariffBook
+
+
+class LockedService:
+    """
+    Заместитель ParkingService, вызывающий его методы по одному
+
+    ParkingService не рассчитан на одновременные вызовы из нескольких
+    потоков, поэтому у каждой стоянки своя блокировка: вызовы разных
+    стоянок выполняются параллельно, вызовы одной — по очереди.
+    """
+
+    def __init__(self, service: ParkingService):
+        """
+        Args:
+            service: Сервис стоянки
+        """
+        self.service = service
+        self.lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self.service, name)
+        if not callable(attribute):
+            return attribute
+
+        def locked_call(*args, **kwargs):
+            with self.lock:
+                return attribute(*args, **kwargs)
+        return locked_call
+
+
+class MultiLotService:
+    """
+    Сервис для нескольких стоянок
+
+    Каждая стоянка — независимая часть со своим хранилищем, индексами
+    и счётчиками, поэтому операции въезда, выезда и оплаты затрагивают
+    только свою стоянку. Запросы по всем стоянкам (поиск, должники,
+    общий долг, статистика) выполняются параллельно в пуле потоков,
+    а результаты объединяются. Записи в объединённых результатах
+    возвращаются парами (стоянка, автомобиль).
+    """
+
+    def __init__(self, lots: Dict[str, ParkingService], max_workers: Optional[int] = None):
+        """
+        Args:
+            lots: Сервисы стоянок по названиям
+            max_workers: Размер пула потоков (по умолчанию — по потоку на стоянку)
+        """
+        if not lots:
+            raise ValueError("Нужна хотя бы одна стоянка")
+        self._lots = {name: LockedService(service) for name, service in lots.items()}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or len(lots),
+                                            thread_name_prefix="parking-lot")
+
+    @property
+    def names(self) -> List[str]:
+        """Названия стоянок"""
+        return list(self._lots)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._lots
+
+    def lot(self, name: str) -> LockedService:
+        """
+        Сервис одной стоянки
+
+        Args:
+            name: Название стоянки
+
+        Returns:
+            Сервис стоянки (методы вызываются под её блокировкой)
+
+        Raises:
+            KeyError: Если стоянки нет
+        """
+        return self._lots[name]
+
+    def _fan_out(self, method: str, *args, **kwargs) -> Dict[str, Any]:
+        """
+        Вызов метода у всех стоянок параллельно
+
+        Args:
+            method: Название метода ParkingService
+            *args: Позиционные аргументы метода
+            **kwargs: Именованные аргументы метода
+
+        Returns:
+            Результаты по названиям стоянок
+        """
+        futures = {name: self._executor.submit(getattr(lot, method), *args, **kwargs)
+                   for name, lot in self._lots.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+    @staticmethod
+    def _merge(results: Dict[str, Iterable[Car]],
+               key: Callable[[Car], Any] = lambda car: car.entry_time) -> List[Tuple[str, Car]]:
+        """Объединение списков стоянок в один, упорядоченный по key"""
+        merged = [(name, car) for name, cars in results.items() for car in cars]
+        merged.sort(key=lambda item: key(item[1]))
+        return merged
+
+    def get_current_cars(self) -> List[Tuple[str, Car]]:
+        """
+        Автомобили на всех стоянках
+
+        Returns:
+            Пары (стоянка, автомобиль) по времени въезда
+        """
+        return self._merge(self._fan_out("get_current_cars"))
+
+    def search_cars(self, search_term: str, limit: Optional[int] = None, offset: int = 0,
+                    start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Tuple[str, Car]]:
+        """
+        Поиск автомобилей на всех стоянках
+
+        Каждая стоянка возвращает свои первые offset + limit результатов,
+        после объединения они ранжируются так же, как на одной стоянке:
+        точный номер, совпадение по началу поля, остальные; внутри
+        группы — более новые.
+
+        Args:
+            search_term: Строка поиска
+            limit: Максимальное количество результатов (None — без ограничения)
+            offset: Количество пропускаемых результатов
+            start: Начало интервала времени въезда (включительно)
+            end: Конец интервала времени въезда (не включительно)
+
+        Returns:
+            Пары (стоянка, автомобиль)
+        """
+        term = search_term.lower()
+        if not term:
+            return []
+        window = None if limit is None else offset + limit
+        results = self._fan_out("search_cars", search_term, window, 0, start, end)
+
+        merged = self._merge(results)
+        merged.reverse()
+        # Сортировка устойчива: внутри группы остаётся порядок от новых к старым
+        merged.sort(key=lambda item: match_rank(
+            term, item[1].car_number.lower(), item[1].car_brand.lower(), item[1].owner_name.lower()
+        ))
+        return merged[offset:window]
+
+    def get_debtors(self) -> List[Tuple[str, Car]]:
+        """
+        Должники всех стоянок
+
+        Returns:
+            Пары (стоянка, автомобиль) по времени въезда
+        """
+        return self._merge(self._fan_out("get_debtors"))
+
+    def get_total_debt(self) -> float:
+        """
+        Общая задолженность по всем стоянкам
+
+        Returns:
+            Сумма задолженностей
+        """
+        return round(sum(self._fan_out("get_total_debt").values()), 2)
+
+    def get_lot_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Сводные показатели каждой стоянки
+
+        Returns:
+            Показатели ParkingService.get_stats по названиям стоянок
+        """
+        return self._fan_out("get_stats")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Сводные показатели по всем стоянкам
+
+        Returns:
+            Словарь с ключами current, served, debtors, total_debt и lots (число стоянок)
+        """
+        lot_stats = self.get_lot_stats()
+        stats = {"current": 0, "served": 0, "debtors": 0, "total_debt": 0.0}
+        for values in lot_stats.values():
+            for key in stats:
+                stats[key] += values[key]
+        stats["total_debt"] = round(stats["total_debt"], 2)
+        stats["lots"] = len(lot_stats)
+        return stats
+
+    def flush(self):
+        """Запись отложенных изменений всех стоянок"""
+        self._fan_out("flush")
+
+    def close(self):
+        """Завершение работы: закрытие хранилищ всех стоянок и пула потоков"""
+        try:
+            self._fan_out("close")
+        finally:
+            self._executor.shutdown(wait=True)
+
+
+def open_lots(names: Iterable[str], storage: str, durability: str = DURABILITY_SYNC,
+              data_dir: str = "data", tariffs: Optional['TariffBook'] = None) -> MultiLotService:
+    """
+    Создание сервиса нескольких стоянок с хранилищами в подкаталогах data_dir
+
+    Данные стоянок загружаются параллельно.
+
+    Args:
+        names: Названия стоянок (они же имена подкаталогов)
+        storage: Тип хранилища (см. storage_factory.STORAGE_TYPES)
+        durability: Уровень надёжности записи
+        data_dir: Каталог, в котором у каждой стоянки свой подкаталог
+        tariffs: Тарифы, общие для всех стоянок
+
+    Returns:
+        Сервис нескольких стоянок
+    """
+    names = list(dict.fromkeys(names))
+    if not names:
+        raise ValueError("Нужна хотя бы одна стоянка")
+    for name in names:
+        # Название становится именем подкаталога, поэтому пути в нём недопустимы
+        if not name or name in (".", "..") or os.path.basename(name) != name or "/" in name:
+            raise ValueError(f"Недопустимое название стоянки: {name!r}")
+
+    def load(name: str) -> ParkingService:
+        lot_dir = os.path.join(data_dir, name)
+        os.makedirs(lot_dir, exist_ok=True)
+        return ParkingService(create_storage_service(storage, durability, lot_dir), tariffs)
+
+    with ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="parking-lot-loader") as executor:
+        futures = {name: executor.submit(load, name) for name in names}
+        lots = {}
+        errors = []
+        for name, future in futures.items():
+            try:
+                lots[name] = future.result()
+            except Exception as e:
+                errors.append(f"{name}: {e}")
+    if errors:
+        for service in lots.values():
+            service.close()
+        raise IOError("Не удалось загрузить стоянки: " + "; ".join(errors))
+    return MultiLotService(lots)
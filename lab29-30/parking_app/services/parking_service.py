@@ -1,24 +1,198 @@
+from itertools import islice
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Iterator, Optional, Tuple, TYPE_CHECKING
 from models.car import Car
-from services.storage_service import StorageService
+from services.storage_service import BaseStorageService
+from services.search_index import SearchIndex
+
+if TYPE_CHECKING:
+    # Модули на NumPy импортируются при первом обращении, чтобы не замедлять запуск
+    from services.history_table import HistoryTable
+    from services.tariff import TariffBook
+    from services.billing import OpenSessionsBill
+
+
+DEFAULT_HOURLY_RATE = 100.0
 
 
 class ParkingService:
     """Класс для управления автостоянкой"""
 
-    def __init__(self, storage_service: StorageService):
+    def __init__(self, storage_service: BaseStorageService, tariffs: Optional['TariffBook'] = None):
         """
         Инициализация сервиса
 
         Args:
             storage_service: Сервис для работы с хранилищем данных
+            tariffs: Тарифы (если не заданы — почасовая ставка автомобиля со скидкой)
         """
         self.storage_service = storage_service
+        self.tariffs = tariffs
+        self._load()
+
+    def _load(self):
+        """Загрузка данных из хранилища и построение индексов с нуля"""
+        # Все записи либо, если хранилище выполняет выборки само, только рабочий набор
         self.cars = self.storage_service.load_data()
 
+        # Индексы для операций на въезде/выезде: номер -> машина на стоянке
+        # и номер -> неоплаченные записи в порядке добавления
+        self._active_by_number: Dict[str, Car] = {}
+        self._unpaid_by_number: Dict[str, List[Car]] = {}
+        self._rebuild_indexes()
+
+        # Поисковый индекс нужен, только если поиск выполняется в памяти
+        self._search_index: Optional[SearchIndex] = None
+        if not self.storage_service.supports_queries:
+            self._search_index = SearchIndex(self.cars)
+
+        # Счётчики для статистики, обновляются в каждом изменяющем методе
+        self._stats: Dict[str, Any] = self._calculate_stats()
+
+        # Колоночная таблица для отчётов строится при первом обращении
+        self._history_table: Optional['HistoryTable'] = None
+
+        # Записи по ключу — строится при первом получении чужих изменений
+        self._cars_by_key: Optional[Dict[str, Car]] = None
+
+    def sync(self) -> bool:
+        """
+        Применение изменений, записанных в хранилище другими процессами
+
+        Если хранилище отдаёт только изменённые записи, они применяются
+        к уже загруженным объектам с обновлением индексов и счётчиков;
+        иначе данные загружаются заново.
+
+        Returns:
+            True, если что-то изменилось
+        """
+        changes = self.storage_service.refresh()
+        if changes is None or (changes and self.storage_service.supports_queries):
+            self._load()
+            return True
+        for car in changes:
+            self._apply_change(car)
+        return bool(changes)
+
+    def _apply_change(self, changed: Car):
+        """
+        Применение одной записи, изменённой другим процессом
+
+        Args:
+            changed: Новое состояние записи
+        """
+        if self._cars_by_key is None:
+            self._cars_by_key = {car.key: car for car in self.cars}
+
+        key = changed.key
+        car = self._cars_by_key.get(key)
+        if car is None:
+            car = changed
+            self.cars.append(car)
+            self._cars_by_key[key] = car
+            if self._search_index is not None:
+                self._search_index.add(car)
+        else:
+            self._unindex_car(car)
+            # Объект сохраняется, чтобы ссылки на него (например, в интерфейсе) оставались верными
+            vars(car).update(vars(changed))
+        self._index_car(car)
+        self._update_history_table(car)
+
+    def _index_car(self, car: Car):
+        """Учёт записи в индексах по номерам и в счётчиках статистики"""
+        if car.exit_time is None:
+            self._active_by_number[car.car_number] = car
+            self._stats["current"] += 1
+        else:
+            self._stats["served"] += 1
+        if car.payment_status == "Не оплачено":
+            unpaid = self._unpaid_by_number.setdefault(car.car_number, [])
+            unpaid.append(car)
+            unpaid.sort(key=self._unpaid_order)
+            self._stats["total_debt"] += car.debt
+            if car.debt > 0:
+                self._stats["debtors"] += 1
+
+    def _unindex_car(self, car: Car):
+        """Исключение записи из индексов и счётчиков (перед её изменением)"""
+        if car.exit_time is None:
+            if self._active_by_number.get(car.car_number) is car:
+                del self._active_by_number[car.car_number]
+            self._stats["current"] -= 1
+        else:
+            self._stats["served"] -= 1
+        if car.payment_status == "Не оплачено":
+            unpaid = [unpaid_car for unpaid_car in self._unpaid_by_number.get(car.car_number, [])
+                      if unpaid_car is not car]
+            self._unpaid_by_number[car.car_number] = unpaid
+            if not unpaid:
+                self._unpaid_by_number.pop(car.car_number, None)
+            self._stats["total_debt"] -= car.debt
+            if car.debt > 0:
+                self._stats["debtors"] -= 1
+
+    def _calculate_stats(self) -> Dict[str, Any]:
+        """
+        Расчет сводных показателей с нуля
+
+        Returns:
+            Словарь с ключами current, served, debtors, total_debt
+        """
+        if self.storage_service.supports_queries:
+            return self.storage_service.query_stats()
+
+        stats = {"current": 0, "served": 0, "debtors": 0, "total_debt": 0.0}
+        for car in self.cars:
+            if car.exit_time is None:
+                stats["current"] += 1
+            else:
+                stats["served"] += 1
+            if car.payment_status == "Не оплачено":
+                stats["total_debt"] += car.debt
+                if car.debt > 0:
+                    stats["debtors"] += 1
+        return stats
+
+    @staticmethod
+    def _unpaid_order(car: Car) -> Tuple[datetime, str]:
+        """
+        Порядок неоплаченных записей одного номера: от ранних въездов к поздним
+
+        Одинаковый для полного перестроения и для изменений по одной записи,
+        поэтому оплачивается одна и та же запись независимо от порядка загрузки.
+        """
+        return car.entry_time, car.key
+
+    def _rebuild_indexes(self):
+        """Перестроение индексов по номерам из списка автомобилей"""
+        self._active_by_number = {}
+        self._unpaid_by_number = {}
+        for car in self.cars:
+            if car.exit_time is None:
+                self._active_by_number[car.car_number] = car
+            if car.payment_status == "Не оплачено":
+                self._unpaid_by_number.setdefault(car.car_number, []).append(car)
+        for unpaid in self._unpaid_by_number.values():
+            unpaid.sort(key=self._unpaid_order)
+
+    def calculate_cost(self, car: Car, current_time: Optional[datetime] = None) -> float:
+        """
+        Стоимость стоянки по тарифу клиента или, без тарифов, по ставке автомобиля
+
+        Args:
+            car: Автомобиль
+            current_time: Момент расчета для машин на стоянке (по умолчанию — сейчас)
+
+        Returns:
+            Стоимость, округлённая до копеек
+        """
+        if self.tariffs is not None:
+            return self.tariffs.cost(car, current_time)
+        return car.calculate_current_cost(current_time)
+
     def add_car(self, car_brand: str, car_number: str, owner_name: str,
-                discount: int, hourly_rate: float = 100.0) -> Car:
+                discount: int, hourly_rate: Optional[float] = None) -> Car:
         """
         Добавление автомобиля на стоянку
 
@@ -27,27 +201,45 @@ class ParkingService:
             car_number: Номер автомобиля
             owner_name: ФИО владельца
             discount: Скидка в процентах
-            hourly_rate: Почасовая ставка
+            hourly_rate: Почасовая ставка (по умолчанию — ставка тарифа клиента
+                на момент въезда или DEFAULT_HOURLY_RATE без тарифов). Если тарифы
+                заданы, стоимость считается по ним, а ставка только сохраняется в записи.
 
         Returns:
             Объект добавленного автомобиля
         """
-        # Проверка на дубликаты
-        for car in self.cars:
-            if car.car_number == car_number and car.exit_time is None:
-                raise ValueError(f"Автомобиль с номером {car_number} уже находится на стоянке")
+        with self.storage_service.transaction():
+            # Другой терминал мог изменить данные: сначала применяем его изменения
+            self.sync()
 
-        new_car = Car(
-            car_brand=car_brand,
-            car_number=car_number,
-            owner_name=owner_name,
-            entry_time=datetime.now(),
-            hourly_rate=hourly_rate,
-            discount=discount
-        )
+            # Проверка на дубликаты
+            if car_number in self._active_by_number:
+                raise ValueError(f"Автомобиль с номером {car_number} уже находится на стоянке")
 
-        self.cars.append(new_car)
-        self.storage_service.save_data(self.cars)
+            entry_time = datetime.now()
+            if hourly_rate is None:
+                hourly_rate = (self.tariffs.tariff_for(car_number).rate_at(entry_time)
+                               if self.tariffs is not None else DEFAULT_HOURLY_RATE)
+
+            new_car = Car(
+                car_brand=car_brand,
+                car_number=car_number,
+                owner_name=owner_name,
+                entry_time=entry_time,
+                hourly_rate=hourly_rate,
+                discount=discount
+            )
+
+            self.cars.append(new_car)
+            if self._cars_by_key is not None:
+                self._cars_by_key[new_car.key] = new_car
+            self._active_by_number[car_number] = new_car
+            self._unpaid_by_number.setdefault(car_number, []).append(new_car)
+            self._stats["current"] += 1
+            if self._search_index is not None:
+                self._search_index.add(new_car)
+            self._update_history_table(new_car)
+            self.storage_service.save_car(new_car, self.cars)
         return new_car
 
     def remove_car(self, car_number: str) -> Tuple[Optional[Car], float]:
@@ -60,18 +252,24 @@ class ParkingService:
         Returns:
             Кортеж (автомобиль, стоимость)
         """
-        for i, car in enumerate(self.cars):
-            if car.car_number == car_number and car.exit_time is None:
-                exit_time = datetime.now()
-                self.cars[i].exit_time = exit_time
+        with self.storage_service.transaction():
+            self.sync()
+
+            car = self._active_by_number.pop(car_number, None)
+            if car is None:
+                return None, 0.0
 
-                cost = car.calculate_current_cost(exit_time)
-                self.cars[i].cost = cost
+            exit_time = datetime.now()
+            car.exit_time = exit_time
 
-                self.storage_service.save_data(self.cars)
-                return self.cars[i], cost
+            cost = self.calculate_cost(car, exit_time)
+            car.cost = cost
 
-        return None, 0.0
+            self._stats["current"] -= 1
+            self._stats["served"] += 1
+            self._update_history_table(car)
+            self.storage_service.save_car(car, self.cars)
+        return car, cost
 
     def pay_for_parking(self, car_number: str) -> bool:
         """
@@ -83,14 +281,27 @@ class ParkingService:
         Returns:
             Успешность операции
         """
-        for i, car in enumerate(self.cars):
-            if car.car_number == car_number and car.payment_status == "Не оплачено":
-                self.cars[i].payment_status = "Оплачено"
-                self.cars[i].debt = 0.0
-                self.storage_service.save_data(self.cars)
-                return True
+        with self.storage_service.transaction():
+            self.sync()
+
+            unpaid = self._unpaid_by_number.get(car_number)
+            if not unpaid:
+                return False
+
+            # Оплачивается самая ранняя неоплаченная запись
+            car = unpaid.pop(0)
+            if not unpaid:
+                del self._unpaid_by_number[car_number]
 
-        return False
+            if car.debt > 0:
+                self._stats["debtors"] -= 1
+            self._stats["total_debt"] -= car.debt
+
+            car.payment_status = "Оплачено"
+            car.debt = 0.0
+            self._update_history_table(car)
+            self.storage_service.save_car(car, self.cars)
+        return True
 
     def get_current_cars(self) -> List[Car]:
         """
@@ -99,33 +310,100 @@ class ParkingService:
         Returns:
             Список автомобилей на стоянке
         """
-        return [car for car in self.cars if car.exit_time is None]
+        self.sync()
+        if self.storage_service.supports_queries:
+            return self.storage_service.query_current_cars()
+        return list(self._active_by_number.values())
 
-    def get_parking_history(self) -> List[Car]:
+    def bill_open_sessions(self, reference_time: Optional[datetime] = None) -> 'OpenSessionsBill':
+        """
+        Расчет всех машин на стоянке на один момент (для сверки в конце смены)
+
+        Время въезда, ставки и скидки собираются в массивы, а стоимость
+        и длительность считаются одной векторной операцией (по одной на
+        тариф) вместо calculate_current_cost для каждой машины.
+
+        Args:
+            reference_time: Момент расчета (по умолчанию — сейчас)
+
+        Returns:
+            Таблица расчета с итоговой суммой
+        """
+        from services.billing import LiveCostTable
+
+        if reference_time is None:
+            reference_time = datetime.now()
+        return LiveCostTable(self.get_current_cars(), self.tariffs).bill(reference_time)
+
+    def get_parking_history(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                            limit: Optional[int] = None, offset: int = 0) -> List[Car]:
         """
         Получение истории стоянки
 
+        С limit возвращается одна страница, поэтому длинную историю можно
+        показывать по частям, не получая её целиком.
+
+        Args:
+            start: Начало интервала времени въезда (включительно)
+            end: Конец интервала времени въезда (не включительно)
+            limit: Максимальное количество записей (None — без ограничения)
+            offset: Количество пропускаемых записей
+
         Returns:
             Список автомобилей, которые были на стоянке
         """
-        return [car for car in self.cars if car.exit_time is not None]
+        self.sync()
+        if self.storage_service.supports_queries:
+            return self.storage_service.query_history(start, end, limit, offset)
+        history = (car for car in self.cars if car.exit_time is not None and
+                   (start is None or car.entry_time >= start) and
+                   (end is None or car.entry_time < end))
+        return list(islice(history, offset, None if limit is None else offset + limit))
+
+    def iter_parking_history(self, start: Optional[datetime] = None,
+                             end: Optional[datetime] = None) -> Iterator[Car]:
+        """
+        История стоянки по одной записи (для экспорта и отчётов по большим данным)
+
+        Если хранилище выполняет выборки само, записи читаются из него
+        по частям и не накапливаются в памяти.
+
+        Args:
+            start: Начало интервала времени въезда (включительно)
+            end: Конец интервала времени въезда (не включительно)
 
-    def search_cars(self, search_term: str) -> List[Car]:
+        Returns:
+            Итератор завершённых стоянок (порядок зависит от хранилища)
+        """
+        self.sync()
+        cars = self.storage_service.iter_all() if self.storage_service.supports_queries else iter(self.cars)
+        for car in cars:
+            if (car.exit_time is not None and (start is None or car.entry_time >= start) and
+                    (end is None or car.entry_time < end)):
+                yield car
+
+    def search_cars(self, search_term: str, limit: Optional[int] = None, offset: int = 0,
+                    start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Car]:
         """
         Поиск автомобилей
 
+        Результаты ранжируются: точное совпадение номера, совпадение
+        по началу поля, остальные вхождения; внутри группы — более новые.
+
         Args:
             search_term: Строка поиска
+            limit: Максимальное количество результатов (None — без ограничения)
+            offset: Количество пропускаемых результатов (для постраничного вывода)
+            start: Начало интервала времени въезда (включительно)
+            end: Конец интервала времени въезда (не включительно)
 
         Returns:
             Список найденных автомобилей
         """
-        search_term = search_term.lower()
-        return [car for car in self.cars if (
-                search_term in car.car_number.lower() or
-                search_term in car.car_brand.lower() or
-                search_term in car.owner_name.lower()
-        )]
+        self.sync()
+        if self.storage_service.supports_queries:
+            return self.storage_service.query_search(search_term, limit, offset, start, end)
+        return self._search_index.search(search_term, limit, offset, start, end)
 
     def get_debtors(self) -> List[Car]:
         """
@@ -134,6 +412,9 @@ class ParkingService:
         Returns:
             Список автомобилей с задолженностью
         """
+        self.sync()
+        if self.storage_service.supports_queries:
+            return self.storage_service.query_debtors()
         return [car for car in self.cars if car.payment_status == "Не оплачено" and car.debt > 0]
 
     def get_total_debt(self) -> float:
@@ -143,12 +424,46 @@ class ParkingService:
         Returns:
             Общая сумма задолженности
         """
-        return sum(car.debt for car in self.cars if car.payment_status == "Не оплачено")
+        self.sync()
+        return self._stats["total_debt"]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Получение сводных показателей без обхода списка автомобилей
+
+        Returns:
+            Словарь с ключами current (на стоянке), served (обслужено),
+            debtors (должников) и total_debt (общий долг)
+        """
+        self.sync()
+        return dict(self._stats)
+
+    def check_consistency(self, fix: bool = True) -> bool:
+        """
+        Проверка счётчиков статистики пересчетом с нуля
+
+        Args:
+            fix: Заменить счётчики пересчитанными значениями при расхождении
+
+        Returns:
+            True, если счётчики совпали с пересчитанными значениями
+        """
+        expected = self._calculate_stats()
+        consistent = (
+                all(self._stats[key] == expected[key] for key in ("current", "served", "debtors")) and
+                abs(self._stats["total_debt"] - expected["total_debt"]) < 0.005
+        )
+        if not consistent and fix:
+            self._stats = expected
+        return consistent
 
     def update_car_debt(self, car_number: str, cost: float) -> bool:
         """
         Обновление задолженности автомобиля
 
+        Задолженность записывается на последнюю неоплаченную запись
+        с этим номером, то есть на только что выведенный автомобиль.
+
         Args:
             car_number: Номер автомобиля
             cost: Сумма задолженности
@@ -156,10 +471,51 @@ class ParkingService:
         Returns:
             Успешность операции
         """
-        for i, car in enumerate(self.cars):
-            if car.car_number == car_number:
-                self.cars[i].debt = cost
-                self.storage_service.save_data(self.cars)
-                return True
+        with self.storage_service.transaction():
+            self.sync()
+
+            unpaid = self._unpaid_by_number.get(car_number)
+            if not unpaid:
+                return False
+
+            car = unpaid[-1]
+            self._stats["debtors"] += (cost > 0) - (car.debt > 0)
+            self._stats["total_debt"] += cost - car.debt
+
+            car.debt = cost
+            self._update_history_table(car)
+            self.storage_service.save_car(car, self.cars)
+        return True
+
+    def get_history_table(self) -> 'HistoryTable':
+        """
+        Колоночная таблица всех стоянок для отчётов по выручке
+
+        Таблица строится один раз, а затем обновляется изменяющими методами.
 
-        return False
+        Returns:
+            Таблица стоянок
+        """
+        from services.history_table import HistoryTable
+
+        self.sync()
+        if self._history_table is None:
+            if self.storage_service.supports_queries:
+                cars = self.storage_service.query_history() + self.storage_service.query_current_cars()
+            else:
+                cars = self.cars
+            self._history_table = HistoryTable.from_cars(cars)
+        return self._history_table
+
+    def _update_history_table(self, car: Car):
+        """Обновление строки автомобиля в таблице отчётов, если она уже построена"""
+        if self._history_table is not None:
+            self._history_table.upsert(car)
+
+    def flush(self):
+        """Запись отложенных изменений в хранилище"""
+        self.storage_service.flush()
+
+    def close(self):
+        """Завершение работы: запись изменений и закрытие хранилища"""
+        self.storage_service.close()
@@ -0,0 +1,477 @@
+"""
+Сервис хранения с помесячным архивом завершённых стоянок
+"""
+
+import json
+import bisect
+import shutil
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+from pathlib import Path
+from models.car import Car, record_key
+from services.storage_service import BaseStorageService, QueryStorageMixin, StorageService
+from services.search_index import SearchIndex
+
+
+UNPAID_STATUS = "Не оплачено"
+
+
+def is_archived(car: Car) -> bool:
+    """Завершённая и оплаченная стоянка уходит в архив"""
+    return car.exit_time is not None and car.payment_status != UNPAID_STATUS
+
+
+def partition_name(moment: datetime) -> str:
+    """Имя месячного раздела по времени въезда"""
+    return f"{moment.year:04d}-{moment.month:02d}"
+
+
+def partition_end(name: str) -> datetime:
+    """Начало месяца, следующего за разделом (граница его времени въезда)"""
+    year, month = map(int, name.split("-"))
+    return datetime(year + month // 12, month % 12 + 1, 1)
+
+
+class PartitionedStorageService(QueryStorageMixin, BaseStorageService):
+    """
+    Хранилище с рабочим файлом и помесячным архивом
+
+    В рабочем файле (формат StorageService) лежат машины на стоянке и
+    неоплаченные записи — только они читаются при запуске. Завершённые
+    и оплаченные стоянки дописываются в архивные разделы по месяцу въезда
+    (JSON Lines, <имя файла>_archive/ГГГГ-ММ.jsonl). Разделы читаются,
+    только когда история или поиск затрагивают соответствующий месяц,
+    и несколько последних прочитанных разделов держатся в кэше.
+
+    Для поиска у рабочего набора и у каждого затронутого поиском раздела
+    свой SearchIndex. Индексы разделов строятся при первом поиске по ним
+    и затем только пополняются при дозаписи, поэтому поиск по всей
+    истории держит её в памяти, но не перечитывает и не переиндексирует.
+    """
+
+    def __init__(self, data_file: str = "parking_data.json", cached_partitions: int = 12):
+        """
+        Инициализация сервиса хранения
+
+        Args:
+            data_file: Путь к рабочему файлу
+            cached_partitions: Сколько прочитанных разделов держать в памяти
+        """
+        self.data_file = data_file
+        self.data_path = Path(data_file)
+        self.archive_path = self.data_path.with_name(f"{self.data_path.stem}_archive")
+        self.manifest_path = self.archive_path / "manifest.json"
+        self.cached_partitions = cached_partitions
+
+        self._hot_storage = StorageService(data_file)
+        self._cars: List[Car] = []
+        self._cache: "OrderedDict[str, List[Car]]" = OrderedDict()
+        # Количество записей в каждом разделе, чтобы считать статистику без чтения архива
+        self._manifest: Dict[str, int] = {}
+        # Записи, уже перенесённые в архив за время работы (защита от повторной дозаписи)
+        self._archived_keys = set()
+        # Поисковые индексы разделов (не вытесняются вместе с кэшем) и рабочего набора
+        self._partition_indexes: Dict[str, SearchIndex] = {}
+        self._working_index: Optional[SearchIndex] = None
+        self._working_keys = set()
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _partition_path(self, name: str) -> Path:
+        return self.archive_path / f"{name}.jsonl"
+
+    def _read_manifest(self) -> Dict[str, int]:
+        if not self.manifest_path.exists():
+            return {}
+        with open(self.manifest_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    def _write_manifest(self):
+        temp_file = self.manifest_path.with_suffix(".tmp")
+        with open(temp_file, "w", encoding="utf-8") as file:
+            json.dump(self._manifest, file, ensure_ascii=False, indent=4)
+        temp_file.replace(self.manifest_path)
+
+    def _append_to_archive(self, cars: List[Car]):
+        """
+        Дозапись стоянок в архивные разделы
+
+        Args:
+            cars: Завершённые и оплаченные стоянки
+        """
+        by_partition: Dict[str, List[Car]] = {}
+        for car in cars:
+            key = car.key
+            if key in self._archived_keys:
+                continue
+            self._archived_keys.add(key)
+            by_partition.setdefault(partition_name(car.entry_time), []).append(car)
+
+        self.archive_path.mkdir(parents=True, exist_ok=True)
+        for name, partition_cars in by_partition.items():
+            with open(self._partition_path(name), "a", encoding="utf-8") as file:
+                for car in partition_cars:
+                    file.write(json.dumps(car.to_dict(), ensure_ascii=False) + "\n")
+            self._manifest[name] = self._manifest.get(name, 0) + len(partition_cars)
+            cached = self._cache.get(name)
+            if cached is not None:
+                cached.extend(partition_cars)
+            index = self._partition_indexes.get(name)
+            if index is not None:
+                for car in partition_cars:
+                    index.add(car)
+        if by_partition:
+            self._write_manifest()
+
+    def _load_partition(self, name: str) -> List[Car]:
+        """
+        Чтение архивного раздела (с кэшированием)
+
+        Args:
+            name: Имя раздела (ГГГГ-ММ)
+
+        Returns:
+            Стоянки раздела
+        """
+        cars = self._cache.get(name)
+        if cars is not None:
+            self._cache.move_to_end(name)
+            return cars
+
+        records: Dict[str, dict] = {}
+        path = self._partition_path(name)
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as file:
+                for line in file:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        car_data = json.loads(line)
+                    except json.JSONDecodeError:
+                        print(f"Пропущена повреждённая запись архива {path}")
+                        continue
+                    # При повторной записи того же автомобиля действует последняя
+                    records[record_key(car_data.get("id"), car_data["car_number"], car_data["entry_time"])] = car_data
+
+        cars = [Car.from_dict(car_data) for car_data in records.values()]
+        self._cache[name] = cars
+        while len(self._cache) > self.cached_partitions:
+            self._cache.popitem(last=False)
+        return cars
+
+    def _partitions_in_range(self, start: Optional[datetime], end: Optional[datetime]) -> List[str]:
+        """Имена разделов, пересекающихся с [start, end), от новых к старым"""
+        first = partition_name(start) if start is not None else None
+        last = partition_name(end) if end is not None else None
+        return [
+            name for name in sorted(self._manifest, reverse=True)
+            if (first is None or name >= first) and (last is None or name <= last)
+        ]
+
+    def _archived_cars(self, start: Optional[datetime], end: Optional[datetime],
+                       names: Optional[List[str]] = None) -> List[Car]:
+        """
+        Архивные стоянки с въездом в [start, end)
+
+        Записи, которые ещё есть в рабочем наборе, берутся оттуда.
+
+        Args:
+            start: Начало интервала времени въезда (включительно)
+            end: Конец интервала времени въезда (не включительно)
+            names: Разделы для чтения (по умолчанию — все, пересекающиеся с интервалом)
+        """
+        working = {car.key for car in self._cars}
+        result = []
+        for name in self._partitions_in_range(start, end) if names is None else names:
+            for car in self._load_partition(name):
+                if car.key in working:
+                    continue
+                if (start is not None and car.entry_time < start) or (end is not None and car.entry_time >= end):
+                    continue
+                result.append(car)
+        return result
+
+    def _partition_index(self, name: str) -> SearchIndex:
+        """Поисковый индекс раздела (строится при первом обращении)"""
+        index = self._partition_indexes.get(name)
+        if index is None:
+            index = SearchIndex(self._load_partition(name))
+            self._partition_indexes[name] = index
+        return index
+
+    def _set_working(self, cars: List[Car]):
+        """Замена рабочего набора; его поисковый индекс построится заново при поиске"""
+        self._cars = cars
+        self._working_index = None
+        self._working_keys = set()
+
+    def _ranked_archive(self, name: str, search_term: str, window: Optional[int],
+                        start: Optional[datetime], end: Optional[datetime]) -> list:
+        """
+        Первые window совпадений раздела без записей рабочего набора
+
+        Args:
+            name: Имя раздела
+            search_term: Строка поиска
+            window: Количество нужных совпадений (None — все)
+            start: Начало интервала времени въезда (включительно)
+            end: Конец интервала времени въезда (не включительно)
+
+        Returns:
+            Пары (ключ ранжирования, автомобиль)
+        """
+        index = self._partition_index(name)
+        fetch = window
+        while True:
+            ranked = index.ranked(search_term, fetch, start, end)
+            matches = [(key, car) for key, car in ranked if car.key not in self._working_keys]
+            # Отсеянные записи рабочего набора освобождают место: дочитываем раздел
+            if fetch is None or len(ranked) < fetch or len(matches) >= window:
+                return matches
+            fetch += window - len(matches)
+
+    def load_data(self) -> List[Car]:
+        """
+        Загрузка рабочего набора
+
+        Завершённые и оплаченные записи, найденные в рабочем файле
+        (например, после перехода со StorageService), переносятся в архив.
+
+        Returns:
+            Машины на стоянке и неоплаченные записи
+        """
+        with self._lock:
+            self._manifest = self._read_manifest()
+            # Другой процесс мог дописать разделы: прочитанные раньше данные устарели
+            self._cache.clear()
+            self._partition_indexes.clear()
+            cars = self._hot_storage.load_data()
+
+            archived = [car for car in cars if is_archived(car)]
+            if archived:
+                self._append_to_archive(archived)
+                cars = [car for car in cars if not is_archived(car)]
+                self._hot_storage.save_data(cars)
+
+            self._set_working(cars)
+            self._loaded = True
+            return cars
+
+    def save_data(self, cars: List[Car]) -> bool:
+        """
+        Сохранение рабочего набора
+
+        Завершённые и оплаченные записи из переданного списка
+        дописываются в архив, остальные сохраняются в рабочий файл.
+
+        Args:
+            cars: Список автомобилей для сохранения
+
+        Returns:
+            Успешность операции
+        """
+        return self.save_cars(cars, cars)
+
+    def replace_all(self, cars: List[Car]) -> bool:
+        """
+        Полная замена содержимого: архив пересобирается из переданных записей
+
+        Args:
+            cars: Все записи хранилища
+
+        Returns:
+            Успешность операции
+        """
+        with self._lock:
+            try:
+                if self.archive_path.exists():
+                    shutil.rmtree(self.archive_path)
+                self._manifest = {}
+                self._cache.clear()
+                self._partition_indexes.clear()
+                self._archived_keys.clear()
+                self._append_to_archive([car for car in cars if is_archived(car)])
+            except OSError as e:
+                print(f"Ошибка при записи архива: {e}")
+                return False
+            self._set_working([car for car in cars if not is_archived(car)])
+            return self._hot_storage.save_data(self._cars)
+
+    def save_car(self, car: Car, cars: List[Car]) -> bool:
+        """
+        Сохранение одного автомобиля
+
+        Args:
+            car: Добавленный или изменённый автомобиль
+            cars: Рабочий набор
+
+        Returns:
+            Успешность операции
+        """
+        return self.save_cars([car], cars)
+
+    def save_cars(self, changed: List[Car], cars: List[Car]) -> bool:
+        """
+        Сохранение пачки изменений
+
+        Ставшие архивными записи дописываются в свои разделы,
+        рабочий файл перезаписывается без них.
+
+        Args:
+            changed: Добавленные или изменённые автомобили
+            cars: Рабочий набор
+
+        Returns:
+            Успешность операции
+        """
+        with self._lock:
+            self._set_working(cars)
+            archived = [car for car in changed if is_archived(car)]
+            try:
+                if archived:
+                    self._append_to_archive(archived)
+            except OSError as e:
+                print(f"Ошибка при записи архива: {e}")
+                return False
+            return self._hot_storage.save_data([car for car in cars if not is_archived(car)])
+
+    def save_batches(self, batches: Iterable[List[Car]]) -> bool:
+        """
+        Запись пачек записей (массовый импорт)
+
+        Архивные записи каждой пачки сразу дописываются в разделы, а рабочий
+        файл перезаписывается один раз в конце.
+
+        Args:
+            batches: Пачки добавляемых или изменяемых автомобилей
+
+        Returns:
+            Успешность операции
+        """
+        if not self._loaded:
+            self.load_data()
+        with self._lock:
+            working = {car.key: car for car in self._cars}
+            for batch in batches:
+                archived = [car for car in batch if is_archived(car)]
+                if archived:
+                    try:
+                        self._append_to_archive(archived)
+                    except OSError as e:
+                        print(f"Ошибка при записи архива: {e}")
+                        return False
+                    for car in archived:
+                        working.pop(car.key, None)
+                working.update((car.key, car) for car in batch if not is_archived(car))
+            self._set_working(list(working.values()))
+            return self._hot_storage.save_data(self._cars)
+
+    def transaction(self):
+        """Межпроцессная блокировка рабочего файла"""
+        return self._hot_storage.transaction()
+
+    def refresh(self) -> Optional[List[Car]]:
+        """
+        Проверка изменений рабочего файла, сделанных другими процессами
+
+        Returns:
+            Пустой список, если файл не менялся, иначе None
+        """
+        return [] if self._hot_storage.refresh() == [] else None
+
+    def iter_all(self) -> Iterator[Car]:
+        """
+        Все записи по одному архивному разделу за раз, затем рабочий набор
+
+        Returns:
+            Итератор автомобилей
+        """
+        if not self._loaded:
+            self.load_data()
+        with self._lock:
+            working = list(self._cars)
+            names = sorted(self._manifest)
+        working_keys = {car.key for car in working}
+        for name in names:
+            with self._lock:
+                cars = self._load_partition(name)
+            for car in cars:
+                if car.key not in working_keys:
+                    yield car
+        yield from working
+
+    def query_current_cars(self) -> List[Car]:
+        """Автомобили на стоянке"""
+        return [car for car in self._cars if car.exit_time is None]
+
+    def query_history(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                      limit: Optional[int] = None, offset: int = 0) -> List[Car]:
+        """
+        Завершённые стоянки с въездом в [start, end); читаются только нужные разделы
+
+        Разделы читаются от старых к новым. Для страницы (limit) чтение
+        останавливается, когда записей с въездом до конца прочитанного
+        месяца набирается offset + limit: более поздние разделы на
+        страницу уже не влияют.
+        """
+        window = None if limit is None else offset + limit
+        with self._lock:
+            working = sorted((
+                car for car in self._cars
+                if car.exit_time is not None and
+                (start is None or car.entry_time >= start) and
+                (end is None or car.entry_time < end)
+            ), key=lambda car: car.entry_time)
+            if window is None:
+                history = self._archived_cars(start, end) + working
+            else:
+                entry_times = [car.entry_time for car in working]
+                history = []
+                for name in reversed(self._partitions_in_range(start, end)):
+                    history.extend(self._archived_cars(start, end, [name]))
+                    if len(history) + bisect.bisect_left(entry_times, partition_end(name)) >= window:
+                        break
+                history += working
+        history.sort(key=lambda car: (car.entry_time, car.id))
+        return history[offset:window]
+
+    def query_search(self, search_term: str, limit: Optional[int] = None, offset: int = 0,
+                     start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Car]:
+        """
+        Поиск по номеру, марке и владельцу в рабочем наборе и нужных разделах архива
+
+        Каждый индекс отдаёт свои первые offset + limit совпадений, они
+        объединяются по ключу ранжирования SearchIndex.ranked. Записи
+        архива, которые есть и в рабочем наборе, берутся из рабочего набора.
+        """
+        window = None if limit is None else offset + limit
+        with self._lock:
+            if self._working_index is None:
+                self._working_index = SearchIndex(self._cars)
+                self._working_keys = {car.key for car in self._cars}
+            matches = self._working_index.ranked(search_term, window, start, end)
+            for name in self._partitions_in_range(start, end):
+                matches.extend(self._ranked_archive(name, search_term, window, start, end))
+        matches.sort(key=lambda match: match[0])
+        return [car for _, car in matches[offset:window]]
+
+    def query_debtors(self) -> List[Car]:
+        """Должники (все неоплаченные записи находятся в рабочем наборе)"""
+        return [car for car in self._cars if car.payment_status == UNPAID_STATUS and car.debt > 0]
+
+    def query_total_debt(self) -> float:
+        """Общая задолженность"""
+        return sum(car.debt for car in self._cars if car.payment_status == UNPAID_STATUS)
+
+    def query_stats(self) -> Dict[str, Any]:
+        """Сводные показатели по рабочему набору и счётчикам разделов"""
+        working_served = sum(1 for car in self._cars if car.exit_time is not None and not is_archived(car))
+        return {
+            "current": sum(1 for car in self._cars if car.exit_time is None),
+            "served": working_served + sum(self._manifest.values()),
+            "debtors": len(self.query_debtors()),
+            "total_debt": self.query_total_debt()
+        }
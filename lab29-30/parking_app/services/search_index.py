@@ -0,0 +1,185 @@
+"""
+Поисковый индекс по номеру, марке и владельцу автомобиля
+"""
+
+import heapq
+from datetime import datetime
+from typing import List, Dict, Set, Optional, Tuple
+from models.car import Car, datetime_to_epoch_us
+
+
+def match_rank(term: str, number: str, brand: str, owner: str) -> Optional[int]:
+    """
+    Группа совпадения для ранжирования результатов поиска
+
+    Args:
+        term: Строка поиска в нижнем регистре
+        number: Номер автомобиля в нижнем регистре
+        brand: Марка в нижнем регистре
+        owner: Владелец в нижнем регистре
+
+    Returns:
+        0 — точное совпадение номера, 1 — совпадение по началу поля,
+        2 — вхождение в поле, None — совпадения нет
+    """
+    if number == term:
+        return 0
+    if number.startswith(term) or brand.startswith(term) or owner.startswith(term):
+        return 1
+    if term in number or term in brand or term in owner:
+        return 2
+    return None
+
+
+class SearchIndex:
+    """
+    Инвертированный индекс по триграммам
+
+    Для каждой триграммы полей car_number, car_brand и owner_name хранится
+    множество номеров документов. Запрос длиной от трёх символов
+    пересекает списки своих триграмм, более короткий запрос объединяет
+    списки триграмм, в которые он входит. Кандидаты проверяются на
+    вхождение подстроки, поэтому ложных совпадений нет.
+    """
+
+    N = 3
+
+    def __init__(self, cars: Optional[List[Car]] = None):
+        """
+        Инициализация индекса
+
+        Args:
+            cars: Автомобили для начального заполнения
+        """
+        self._cars: List[Car] = []
+        # Поля в нижнем регистре, вычисляются один раз при добавлении
+        self._fields: List[tuple] = []
+        # Время въезда в микросекундах: внутри группы совпадения новые записи идут первыми
+        self._entry_us: List[int] = []
+        self._postings: Dict[str, Set[int]] = {}
+
+        for car in cars or []:
+            self.add(car)
+
+    def __len__(self) -> int:
+        return len(self._cars)
+
+    @classmethod
+    def _ngrams(cls, text: str) -> Set[str]:
+        """Множество триграмм строки (короткая строка — сама себе триграмма)"""
+        if len(text) <= cls.N:
+            return {text} if text else set()
+        return {text[i:i + cls.N] for i in range(len(text) - cls.N + 1)}
+
+    def add(self, car: Car):
+        """
+        Добавление автомобиля в индекс
+
+        Args:
+            car: Автомобиль
+        """
+        doc_id = len(self._cars)
+        fields = (car.car_number.lower(), car.car_brand.lower(), car.owner_name.lower())
+        self._cars.append(car)
+        self._fields.append(fields)
+        self._entry_us.append(datetime_to_epoch_us(car.entry_time))
+
+        for text in fields:
+            for gram in self._ngrams(text):
+                self._postings.setdefault(gram, set()).add(doc_id)
+
+    def _candidates(self, term: str) -> Set[int]:
+        """
+        Документы, которые могут содержать строку поиска
+
+        Args:
+            term: Строка поиска в нижнем регистре
+
+        Returns:
+            Множество номеров документов
+        """
+        if len(term) >= self.N:
+            grams = sorted(self._ngrams(term), key=lambda gram: len(self._postings.get(gram, ())))
+            result = set(self._postings.get(grams[0], ()))
+            for gram in grams[1:]:
+                if not result:
+                    break
+                result &= self._postings.get(gram, set())
+            return result
+
+        # Короткий запрос: объединяем списки всех триграмм, содержащих его
+        result = set()
+        for gram, doc_ids in self._postings.items():
+            if term in gram:
+                result |= doc_ids
+        return result
+
+    def _matches(self, term: str, start: Optional[datetime], end: Optional[datetime]) -> List[Tuple[int, int]]:
+        """Пары (ранг совпадения, номер документа) для строки поиска в нижнем регистре"""
+        matches = []
+        for doc_id in self._candidates(term):
+            rank = match_rank(term, *self._fields[doc_id])
+            if rank is None:
+                continue
+            if start is not None or end is not None:
+                entry_time = self._cars[doc_id].entry_time
+                if (start is not None and entry_time < start) or (end is not None and entry_time >= end):
+                    continue
+            matches.append((rank, doc_id))
+        return matches
+
+    def search(self, search_term: str, limit: Optional[int] = None, offset: int = 0,
+               start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Car]:
+        """
+        Поиск автомобилей с ранжированием
+
+        Сначала идут точные совпадения номера, затем совпадения по началу
+        поля, затем остальные вхождения; внутри группы — более новые записи.
+
+        Args:
+            search_term: Строка поиска
+            limit: Максимальное количество результатов (None — без ограничения)
+            offset: Количество пропускаемых результатов
+            start: Начало интервала времени въезда (включительно)
+            end: Конец интервала времени въезда (не включительно)
+
+        Returns:
+            Список найденных автомобилей
+        """
+        term = search_term.lower()
+        if not term:
+            return []
+
+        ranked = [(rank, -doc_id) for rank, doc_id in self._matches(term, start, end)]
+        if limit is None:
+            selected = sorted(ranked)[offset:]
+        else:
+            selected = heapq.nsmallest(offset + limit, ranked)[offset:]
+        return [self._cars[-negative_id] for _, negative_id in selected]
+
+    def ranked(self, search_term: str, limit: Optional[int] = None, start: Optional[datetime] = None,
+               end: Optional[datetime] = None) -> List[Tuple[tuple, Car]]:
+        """
+        Первые limit совпадений вместе с ключами сортировки
+
+        В отличие от search, внутри группы записи упорядочены по времени
+        въезда, а не по порядку добавления. Такие ключи сравнимы между
+        разными индексами, поэтому результаты нескольких индексов
+        (например, разделов архива) можно объединить сортировкой по ключу.
+
+        Args:
+            search_term: Строка поиска
+            limit: Максимальное количество результатов (None — без ограничения)
+            start: Начало интервала времени въезда (включительно)
+            end: Конец интервала времени въезда (не включительно)
+
+        Returns:
+            Пары (ключ сортировки, автомобиль) по возрастанию ключа
+        """
+        term = search_term.lower()
+        if not term:
+            return []
+
+        ranked = [(rank, -self._entry_us[doc_id], -doc_id) for rank, doc_id in self._matches(term, start, end)]
+        selected = sorted(ranked) if limit is None else heapq.nsmallest(limit, ranked)
+        return [(key, self._cars[-key[2]]) for key in selected]
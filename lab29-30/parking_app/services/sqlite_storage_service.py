@@ -0,0 +1,434 @@
+"""
+Сервис хранения данных в базе SQLite
+"""
+
+import sqlite3
+import threading
+from datetime import datetime
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+from pathlib import Path
+from models.car import Car
+from services.storage_service import BaseStorageService, QueryStorageMixin
+from services.file_lock import FileLock
+from services.id_migration import assign_ids
+
+
+UNPAID_STATUS = "Не оплачено"
+
+COLUMNS = ("id", "car_brand", "car_number", "owner_name", "entry_time", "hourly_rate",
+           "discount", "exit_time", "payment_status", "debt", "cost")
+
+# Поля поиска в нижнем регистре: встроенная lower() в SQLite не понимает кириллицу,
+# а вызов функции Python для каждой строки при поиске слишком дорог
+SEARCH_COLUMNS = ("car_number_lower", "car_brand_lower", "owner_name_lower")
+
+WRITE_COLUMNS = COLUMNS + SEARCH_COLUMNS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cars (
+    id TEXT PRIMARY KEY,
+    car_brand TEXT NOT NULL,
+    car_number TEXT NOT NULL,
+    owner_name TEXT NOT NULL,
+    entry_time TEXT NOT NULL,
+    hourly_rate REAL NOT NULL,
+    discount INTEGER NOT NULL,
+    exit_time TEXT,
+    payment_status TEXT NOT NULL,
+    debt REAL NOT NULL DEFAULT 0,
+    cost REAL NOT NULL DEFAULT 0,
+    car_number_lower TEXT NOT NULL DEFAULT '',
+    car_brand_lower TEXT NOT NULL DEFAULT '',
+    owner_name_lower TEXT NOT NULL DEFAULT ''
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_cars_entry ON cars (entry_time);
+CREATE INDEX IF NOT EXISTS idx_cars_number ON cars (car_number);
+CREATE INDEX IF NOT EXISTS idx_cars_active ON cars (car_number) WHERE exit_time IS NULL;
+CREATE INDEX IF NOT EXISTS idx_cars_payment ON cars (payment_status, debt);
+"""
+
+INDEXES = ("idx_cars_entry", "idx_cars_number", "idx_cars_active", "idx_cars_payment")
+
+INSERT_QUERY = f"INSERT INTO cars ({', '.join(WRITE_COLUMNS)}) VALUES ({', '.join('?' for _ in WRITE_COLUMNS)})"
+
+UPSERT_QUERY = (
+    INSERT_QUERY + " ON CONFLICT (id) DO UPDATE SET " +
+    ", ".join(f"{column} = excluded.{column}" for column in WRITE_COLUMNS if column != "id")
+)
+
+
+class SQLiteStorageService(QueryStorageMixin, BaseStorageService):
+    """
+    Хранилище в базе SQLite
+
+    В память загружается только рабочий набор: машины на стоянке и
+    неоплаченные записи. История, поиск и должники читаются запросами.
+    Запись однозначно определяется идентификатором; база старого формата
+    (с ключом из номера и времени въезда) переводится на него при открытии.
+    """
+
+    appends_changes = True
+
+    def __init__(self, db_file: str = "parking_data.db"):
+        """
+        Инициализация сервиса хранения
+
+        Args:
+            db_file: Путь к файлу базы данных
+        """
+        self.db_file = db_file
+        self.db_path = Path(db_file)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_file, check_same_thread=False)
+        # Встроенная lower() в SQLite не понимает кириллицу (нужна для заполнения полей поиска)
+        self._connection.create_function("py_lower", 1, str.lower, deterministic=True)
+
+        # Блокировка операций "проверить — изменить — записать" между процессами
+        self._file_lock = FileLock(f"{db_file}.lock")
+        with self._file_lock:
+            self._migrate_legacy_schema()
+            self._add_search_columns()
+            self._connection.executescript(SCHEMA)
+        self._data_version = self._read_data_version()
+
+    def _migrate_legacy_schema(self):
+        """
+        Перевод таблицы старого формата на ключ по идентификатору
+
+        Раньше идентификатор был временем въезда с точностью до секунды и мог
+        повторяться, а уникальность обеспечивалась парой (номер, время въезда).
+        Записи получают новые идентификаторы в порядке въезда.
+        """
+        row = self._connection.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'cars'"
+        ).fetchone()
+        if row is None or "UNIQUE (car_number, entry_time)" not in row[0]:
+            return
+
+        with self._connection:
+            rows = self._connection.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM cars ORDER BY entry_time"
+            ).fetchall()
+            cars = [self._row_to_car(row) for row in rows]
+            count = assign_ids(cars)
+            for index in INDEXES:
+                self._connection.execute(f"DROP INDEX IF EXISTS {index}")
+            self._connection.execute("DROP TABLE cars")
+            self._create_schema()
+            self._connection.executemany(INSERT_QUERY, (self._car_to_row(car) for car in cars))
+        print(f"База {self.db_file} переведена на новые идентификаторы: {count} записей")
+
+    def _add_search_columns(self):
+        """Добавление полей поиска в таблицу, созданную до их появления, и их заполнение"""
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(cars)")}
+        if not columns or SEARCH_COLUMNS[0] in columns:
+            return
+
+        with self._connection:
+            for column in SEARCH_COLUMNS:
+                self._connection.execute(f"ALTER TABLE cars ADD COLUMN {column} TEXT NOT NULL DEFAULT ''")
+            self._connection.execute(
+                "UPDATE cars SET car_number_lower = py_lower(car_number), "
+                "car_brand_lower = py_lower(car_brand), owner_name_lower = py_lower(owner_name)"
+            )
+
+    def _create_schema(self):
+        """Создание таблицы и индексов внутри текущей транзакции (executescript её бы зафиксировал)"""
+        for statement in SCHEMA.split(";"):
+            if statement.strip():
+                self._connection.execute(statement)
+
+    def _read_data_version(self) -> int:
+        """Счётчик SQLite, меняющийся при фиксации изменений другими соединениями"""
+        with self._lock:
+            return self._connection.execute("PRAGMA data_version").fetchone()[0]
+
+    @staticmethod
+    def _car_to_row(car: Car) -> tuple:
+        """Преобразование автомобиля в строку таблицы (вместе с полями поиска)"""
+        return (
+            car.id,
+            car.car_brand,
+            car.car_number,
+            car.owner_name,
+            car.entry_time.isoformat(),
+            car.hourly_rate,
+            car.discount,
+            car.exit_time.isoformat() if car.exit_time else None,
+            car.payment_status,
+            car.debt,
+            car.cost,
+            car.car_number.lower(),
+            car.car_brand.lower(),
+            car.owner_name.lower()
+        )
+
+    @staticmethod
+    def _row_to_car(row: tuple) -> Car:
+        """Преобразование строки таблицы в автомобиль"""
+        return Car(
+            id=row[0],
+            car_brand=row[1],
+            car_number=row[2],
+            owner_name=row[3],
+            entry_time=datetime.fromisoformat(row[4]),
+            hourly_rate=row[5],
+            discount=row[6],
+            exit_time=datetime.fromisoformat(row[7]) if row[7] else None,
+            payment_status=row[8],
+            debt=row[9],
+            cost=row[10]
+        )
+
+    def _select(self, where: str, params: tuple = (), order: str = "entry_time",
+                limit: Optional[int] = None, offset: int = 0) -> List[Car]:
+        """
+        Выборка автомобилей по условию
+
+        Args:
+            where: Условие WHERE
+            params: Параметры запроса
+            order: Выражение ORDER BY
+            limit: Максимальное количество строк (None — без ограничения)
+            offset: Количество пропускаемых строк
+
+        Returns:
+            Список автомобилей
+        """
+        query = f"SELECT {', '.join(COLUMNS)} FROM cars WHERE {where} ORDER BY {order}"
+        if limit is not None or offset:
+            query += " LIMIT ? OFFSET ?"
+            params = params + (-1 if limit is None else limit, offset)
+        with self._lock:
+            rows = self._connection.execute(query, params).fetchall()
+        return [self._row_to_car(row) for row in rows]
+
+    def _upsert(self, cars: Iterable[Car]) -> bool:
+        """
+        Вставка или обновление записей в одной транзакции
+
+        Args:
+            cars: Автомобили для сохранения
+
+        Returns:
+            Успешность операции
+        """
+        try:
+            with self._lock, self._connection:
+                self._connection.executemany(UPSERT_QUERY, (self._car_to_row(car) for car in cars))
+            return True
+        except sqlite3.Error as e:
+            print(f"Ошибка при сохранении данных: {e}")
+            return False
+
+    def save_batches(self, batches: Iterable[List[Car]]) -> bool:
+        """
+        Запись пачек в одной транзакции (массовый импорт)
+
+        Если таблица пуста, индексы удаляются на время вставки и строятся
+        заново в конце: построить индекс по готовой таблице гораздо быстрее,
+        чем обновлять его при каждой вставке. Транзакция одна, поэтому при
+        ошибке база остаётся в прежнем виде, вместе с индексами.
+
+        Args:
+            batches: Пачки добавляемых или изменяемых автомобилей
+
+        Returns:
+            Успешность операции
+        """
+        try:
+            with self._file_lock, self._lock, self._connection:
+                # Явное начало транзакции: иначе DROP INDEX выполнился бы вне её
+                self._connection.execute("BEGIN")
+                rebuild_indexes = self._connection.execute("SELECT 1 FROM cars LIMIT 1").fetchone() is None
+                if rebuild_indexes:
+                    for index in INDEXES:
+                        self._connection.execute(f"DROP INDEX IF EXISTS {index}")
+                for batch in batches:
+                    self._connection.executemany(UPSERT_QUERY, [self._car_to_row(car) for car in batch])
+                if rebuild_indexes:
+                    self._create_schema()
+            return True
+        except sqlite3.Error as e:
+            print(f"Ошибка при сохранении данных: {e}")
+            return False
+
+    def load_data(self) -> List[Car]:
+        """
+        Загрузка рабочего набора: машины на стоянке и неоплаченные записи
+
+        Returns:
+            Список автомобилей
+        """
+        self._data_version = self._read_data_version()
+        return self._select("exit_time IS NULL OR payment_status = ?", (UNPAID_STATUS,))
+
+    def transaction(self):
+        """Межпроцессная блокировка базы"""
+        return self._file_lock
+
+    def refresh(self) -> Optional[List[Car]]:
+        """
+        Проверка изменений, сделанных другими процессами
+
+        Рабочий набор невелик, поэтому при изменениях он загружается заново.
+
+        Returns:
+            Пустой список, если базу никто не менял, иначе None
+        """
+        return [] if self._read_data_version() == self._data_version else None
+
+    def save_data(self, cars: List[Car]) -> bool:
+        """
+        Сохранение переданных автомобилей
+
+        Остальные записи в базе не затрагиваются.
+
+        Args:
+            cars: Список автомобилей для сохранения
+
+        Returns:
+            Успешность операции
+        """
+        return self._upsert(cars)
+
+    def replace_all(self, cars: List[Car]) -> bool:
+        """
+        Полная замена содержимого базы в одной транзакции
+
+        Выполняется под межпроцессной блокировкой, как и другие изменения:
+        запись другого процесса не попадёт между удалением и вставкой.
+        Другие процессы узнают о замене по PRAGMA data_version.
+
+        Args:
+            cars: Все записи хранилища
+
+        Returns:
+            Успешность операции
+        """
+        try:
+            with self.transaction(), self._lock, self._connection:
+                self._connection.execute("DELETE FROM cars")
+                self._connection.executemany(INSERT_QUERY, (self._car_to_row(car) for car in cars))
+            return True
+        except sqlite3.Error as e:
+            print(f"Ошибка при сохранении данных: {e}")
+            return False
+
+    def save_car(self, car: Car, cars: List[Car]) -> bool:
+        """
+        Сохранение одного автомобиля
+
+        Args:
+            car: Добавленный или изменённый автомобиль
+            cars: Рабочий набор (не используется)
+
+        Returns:
+            Успешность операции
+        """
+        return self._upsert([car])
+
+    def save_cars(self, changed: List[Car], cars: List[Car]) -> bool:
+        """
+        Сохранение пачки автомобилей в одной транзакции
+
+        Args:
+            changed: Добавленные или изменённые автомобили
+            cars: Рабочий набор (не используется)
+
+        Returns:
+            Успешность операции
+        """
+        return self._upsert(changed)
+
+    def close(self):
+        """Закрытие соединения с базой"""
+        with self._lock:
+            self._connection.close()
+
+    def iter_all(self, batch_size: int = 1000) -> Iterator[Car]:
+        """
+        Все записи пачками по batch_size строк
+
+        Args:
+            batch_size: Количество строк, читаемых за раз
+
+        Returns:
+            Итератор автомобилей
+        """
+        with self._lock:
+            cursor = self._connection.execute(f"SELECT {', '.join(COLUMNS)} FROM cars ORDER BY entry_time")
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for row in rows:
+                yield self._row_to_car(row)
+
+    def query_current_cars(self) -> List[Car]:
+        """Автомобили на стоянке"""
+        return self._select("exit_time IS NULL")
+
+    @staticmethod
+    def _entry_range(start: Optional[datetime], end: Optional[datetime]) -> Tuple[str, tuple]:
+        """Условие на время въезда в [start, end)"""
+        condition, params = "", ()
+        if start is not None:
+            condition += " AND entry_time >= ?"
+            params += (start.isoformat(),)
+        if end is not None:
+            condition += " AND entry_time < ?"
+            params += (end.isoformat(),)
+        return condition, params
+
+    def query_history(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                      limit: Optional[int] = None, offset: int = 0) -> List[Car]:
+        """Завершённые стоянки с въездом в [start, end)"""
+        condition, params = self._entry_range(start, end)
+        return self._select("exit_time IS NOT NULL" + condition, params, order="entry_time, id",
+                            limit=limit, offset=offset)
+
+    def query_search(self, search_term: str, limit: Optional[int] = None, offset: int = 0,
+                     start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Car]:
+        """Поиск по номеру, марке и владельцу: точный номер, затем по началу поля, затем новые"""
+        term = search_term.lower()
+        condition, params = self._entry_range(start, end)
+        return self._select(
+            "(instr(car_number_lower, ?) > 0 OR instr(car_brand_lower, ?) > 0 "
+            "OR instr(owner_name_lower, ?) > 0)" + condition,
+            (term, term, term) + params + (term, term, term, term),
+            order="car_number_lower != ?, "
+                  "(instr(car_number_lower, ?) != 1 AND instr(car_brand_lower, ?) != 1 "
+                  "AND instr(owner_name_lower, ?) != 1), entry_time DESC, id DESC",
+            limit=limit,
+            offset=offset
+        )
+
+    def query_debtors(self) -> List[Car]:
+        """Должники"""
+        return self._select("payment_status = ? AND debt > 0", (UNPAID_STATUS,))
+
+    def query_total_debt(self) -> float:
+        """Общая задолженность"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT COALESCE(SUM(debt), 0) FROM cars WHERE payment_status = ?",
+                (UNPAID_STATUS,)
+            ).fetchone()
+        return row[0]
+
+    def query_stats(self) -> Dict[str, Any]:
+        """Сводные показатели одним запросом"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT COALESCE(SUM(exit_time IS NULL), 0), "
+                "COALESCE(SUM(exit_time IS NOT NULL), 0), "
+                "COALESCE(SUM(payment_status = ? AND debt > 0), 0), "
+                "COALESCE(SUM(CASE WHEN payment_status = ? THEN debt ELSE 0 END), 0) "
+                "FROM cars",
+                (UNPAID_STATUS, UNPAID_STATUS)
+            ).fetchone()
+        return {"current": row[0], "served": row[1], "debtors": row[2], "total_debt": row[3]}
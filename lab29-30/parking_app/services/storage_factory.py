@@ -0,0 +1,47 @@
+"""
+Создание хранилища по названию типа
+"""
+
+import os
+from services.write_behind_storage_service import DURABILITY_SYNC
+
+# Модули хранилищ импортируются при первом использовании:
+# для запуска киоска важен каждый десяток миллисекунд
+STORAGE_TYPES = ("journal", "json", "sqlite", "binary", "partitioned", "ledger")
+
+
+def create_storage_service(storage: str, durability: str = DURABILITY_SYNC, data_dir: str = "data"):
+    """
+    Создание хранилища выбранного типа
+
+    Args:
+        storage: Тип хранилища (json, journal, sqlite, binary, partitioned, ledger)
+        durability: Уровень надёжности записи (sync, batched, async)
+        data_dir: Каталог с файлами данных
+
+    Returns:
+        Сервис хранения данных
+    """
+    if storage == "sqlite":
+        from services.sqlite_storage_service import SQLiteStorageService
+        storage_service = SQLiteStorageService(os.path.join(data_dir, "parking_data.db"))
+    elif storage == "binary":
+        from services.binary_storage_service import BinaryStorageService
+        storage_service = BinaryStorageService(os.path.join(data_dir, "parking_data.bin"))
+    elif storage == "partitioned":
+        from services.partitioned_storage_service import PartitionedStorageService
+        storage_service = PartitionedStorageService(os.path.join(data_dir, "parking_data.json"))
+    elif storage == "ledger":
+        from services.ledger_storage_service import LedgerStorageService
+        storage_service = LedgerStorageService(os.path.join(data_dir, "parking_ledger.json"))
+    elif storage == "json":
+        from services.storage_service import StorageService
+        storage_service = StorageService(os.path.join(data_dir, "parking_data.json"))
+    else:
+        from services.journal_storage_service import JournalStorageService
+        storage_service = JournalStorageService(os.path.join(data_dir, "parking_data.json"))
+
+    if durability == DURABILITY_SYNC:
+        return storage_service
+    from services.write_behind_storage_service import WriteBehindStorageService
+    return WriteBehindStorageService(storage_service, durability)
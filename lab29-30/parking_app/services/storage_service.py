@@ -4,13 +4,231 @@
 
 import os
 import json
-from typing import List, Dict, Any, Optional
+from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from datetime import datetime
+from typing import List, Dict, Any, Iterable, Iterator, Optional
 from pathlib import Path
 from models.car import Car
+from services.file_lock import FileLock
+from services.json_stream import iter_cars
 
 
-class StorageService:
-    """Класс для работы с хранилищем данных"""
+class BaseStorageService(ABC):
+    """
+    Базовый класс хранилища данных
+
+    Если хранилище умеет само выполнять выборки (наследует QueryStorageMixin,
+    supports_queries = True), ParkingService держит в памяти только рабочий
+    набор из load_data, а списки текущих машин, истории, должников и поиск
+    запрашивает у хранилища.
+    """
+
+    supports_queries = False
+    # save_cars записывает только переданные изменения, не переписывая всё хранилище
+    appends_changes = False
+
+    @abstractmethod
+    def load_data(self) -> List[Car]:
+        """
+        Загрузка данных, с которыми сервис работает в памяти
+
+        Returns:
+            Список автомобилей
+        """
+
+    @abstractmethod
+    def save_data(self, cars: List[Car]) -> bool:
+        """
+        Сохранение данных
+
+        Args:
+            cars: Список автомобилей для сохранения
+
+        Returns:
+            Успешность операции
+        """
+
+    def save_car(self, car: Car, cars: List[Car]) -> bool:
+        """
+        Сохранение изменений одного автомобиля
+
+        По умолчанию сохраняется весь список целиком.
+
+        Args:
+            car: Добавленный или изменённый автомобиль
+            cars: Полный список автомобилей
+
+        Returns:
+            Успешность операции
+        """
+        return self.save_data(cars)
+
+    def save_cars(self, changed: List[Car], cars: List[Car]) -> bool:
+        """
+        Сохранение пачки изменённых автомобилей
+
+        По умолчанию сохраняется весь список целиком, один раз на пачку.
+
+        Args:
+            changed: Добавленные или изменённые автомобили
+            cars: Полный список автомобилей
+
+        Returns:
+            Успешность операции
+        """
+        return self.save_data(cars)
+
+    def load_all(self) -> List[Car]:
+        """
+        Все записи хранилища, включая не входящие в рабочий набор
+
+        Returns:
+            Список автомобилей
+        """
+        if self.supports_queries:
+            return self.query_history() + self.query_current_cars()
+        return self.load_data()
+
+    def iter_all(self) -> Iterator[Car]:
+        """
+        Все записи хранилища по одной
+
+        Хранилища, которые умеют читать записи по частям, переопределяют
+        метод, чтобы обход (например, экспорт) не держал в памяти все записи.
+
+        Returns:
+            Итератор автомобилей
+        """
+        yield from self.load_all()
+
+    def replace_all(self, cars: List[Car]) -> bool:
+        """
+        Полная замена содержимого хранилища
+
+        По умолчанию совпадает с save_data, который и так перезаписывает всё.
+
+        Args:
+            cars: Все записи хранилища
+
+        Returns:
+            Успешность операции
+        """
+        return self.save_data(cars)
+
+    def save_batches(self, batches: Iterable[List[Car]]) -> bool:
+        """
+        Запись большого количества записей пачками (массовый импорт)
+
+        Хранилища с appends_changes записывают каждую пачку через save_cars
+        сразу после получения, поэтому в памяти держится одна пачка.
+        Остальные перезаписывают всё хранилище при каждом сохранении:
+        для них пачки собираются вместе с текущими записями и записываются
+        одним replace_all. Записи с уже существующим ключом заменяются.
+
+        Args:
+            batches: Пачки добавляемых или изменяемых автомобилей
+
+        Returns:
+            Успешность операции
+        """
+        if self.appends_changes:
+            for batch in batches:
+                if not self.save_cars(batch, []):
+                    return False
+            return True
+
+        records = {car.key: car for car in self.load_all()}
+        for batch in batches:
+            records.update((car.key, car) for car in batch)
+        return self.replace_all(list(records.values()))
+
+    def flush(self):
+        """Запись отложенных изменений (для хранилищ с отложенной записью)"""
+
+    def transaction(self):
+        """
+        Блокировка хранилища на время операции "проверить — изменить — записать"
+
+        Пока блокировка удерживается, другие процессы не могут писать
+        в то же хранилище. По умолчанию хранилище не блокируется.
+
+        Returns:
+            Контекстный менеджер блокировки
+        """
+        return nullcontext()
+
+    def refresh(self) -> Optional[List[Car]]:
+        """
+        Изменения, записанные другими процессами с момента последней загрузки
+
+        Returns:
+            Список изменённых и добавленных автомобилей (пустой, если изменений нет)
+            или None, если данные нужно загрузить заново через load_data
+        """
+        return []
+
+    def close(self):
+        """Освобождение ресурсов хранилища"""
+
+
+class QueryStorageMixin(ABC):
+    """
+    Хранилище, которое само выполняет выборки
+
+    Подмешивается к BaseStorageService хранилищами, которые не держат
+    в памяти всю историю: ParkingService видит supports_queries = True
+    и вместо перебора рабочего набора вызывает методы query_*.
+    """
+
+    supports_queries = True
+
+    @abstractmethod
+    def query_current_cars(self) -> List[Car]:
+        """Автомобили на стоянке"""
+
+    @abstractmethod
+    def query_history(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                      limit: Optional[int] = None, offset: int = 0) -> List[Car]:
+        """Завершённые стоянки с въездом в [start, end) по времени въезда (страница limit, offset)"""
+
+    @abstractmethod
+    def query_search(self, search_term: str, limit: Optional[int] = None, offset: int = 0,
+                     start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Car]:
+        """
+        Поиск по номеру, марке и владельцу
+
+        Сначала точные совпадения номера, затем совпадения по началу поля,
+        затем остальные; внутри группы — более новые записи.
+        """
+
+    @abstractmethod
+    def query_debtors(self) -> List[Car]:
+        """Должники"""
+
+    @abstractmethod
+    def query_total_debt(self) -> float:
+        """Общая задолженность"""
+
+    @abstractmethod
+    def query_stats(self) -> Dict[str, Any]:
+        """
+        Сводные показатели
+
+        Returns:
+            Словарь с ключами current, served, debtors, total_debt
+        """
+
+
+class StorageService(BaseStorageService):
+    """
+    Класс для работы с хранилищем данных
+
+    Несколько процессов могут работать с одним файлом: запись выполняется
+    под файловой блокировкой <файл>.lock, а каждое сохранение увеличивает
+    номер версии в <файл>.version. По номеру версии процесс узнаёт,
+    что файл изменил кто-то другой.
+    """
 
     def __init__(self, data_file: str = "parking_data.json"):
         """
@@ -21,6 +239,48 @@ class StorageService:
         """
         self.data_file = data_file
         self.data_path = Path(data_file)
+        self.version_path = Path(f"{data_file}.version")
+        self._file_lock = FileLock(f"{data_file}.lock")
+        # Версия данных, которые сейчас загружены в этом процессе
+        self._version = 0
+
+    def _read_version(self) -> int:
+        """
+        Текущая версия данных на диске
+
+        Returns:
+            Номер версии (0, если файла версии ещё нет)
+        """
+        try:
+            return int(self.version_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return 0
+        except ValueError:
+            # Файл версии перезаписывается целиком, но на всякий случай считаем, что версия сменилась
+            return -1
+
+    def _write_version(self, version: int):
+        """Запись номера версии (под блокировкой)"""
+        temp_file = self.version_path.with_name(f"{self.version_path.name}.tmp")
+        temp_file.write_text(str(version), encoding="utf-8")
+        temp_file.replace(self.version_path)
+        self._version = version
+
+    def transaction(self):
+        """Межпроцессная блокировка файла данных"""
+        return self._file_lock
+
+    def refresh(self) -> Optional[List[Car]]:
+        """
+        Проверка изменений по номеру версии
+
+        JSON-массив не хранит, какие записи изменились, поэтому при смене
+        версии файл загружается заново.
+
+        Returns:
+            Пустой список, если версия не изменилась, иначе None
+        """
+        return [] if self._read_version() == self._version else None
 
     def load_data(self) -> List[Car]:
         """
@@ -29,13 +289,19 @@ class StorageService:
         Returns:
             Список автомобилей
         """
+        with self._file_lock:
+            self._version = self._read_version()
+            return self._load_file()
+
+    def _load_file(self) -> List[Car]:
+        """Чтение файла данных"""
         if not self.data_path.exists():
             return []
 
         try:
-            with open(self.data_file, "r", encoding="utf-8") as file:
-                data = json.load(file)
-                return [Car.from_dict(car_data) for car_data in data]
+            # Файл разбирается по одной записи: в памяти не бывает одновременно
+            # всего текста, всех словарей и всех объектов
+            return list(iter_cars(self.data_file))
         except (json.JSONDecodeError, KeyError) as e:
             print(f"Ошибка при чтении файла данных: {e}")
             # Создаем резервную копию поврежденного файла
@@ -45,6 +311,19 @@ class StorageService:
                 print(f"Создана резервная копия файла данных: {backup_file}")
             return []
 
+    def iter_all(self) -> Iterator[Car]:
+        """
+        Записи файла по одной, без загрузки всего файла в память
+
+        Файл заменяется при сохранении целиком, поэтому уже открытый
+        файл дочитывается в том виде, в каком был открыт.
+
+        Returns:
+            Итератор автомобилей
+        """
+        if self.data_path.exists():
+            yield from iter_cars(self.data_file)
+
     def save_data(self, cars: List[Car]) -> bool:
         """
         Сохранение данных в файл
@@ -62,14 +341,16 @@ class StorageService:
             # Преобразуем объекты в словари и сохраняем
             cars_data = [car.to_dict() for car in cars]
 
-            # Сначала сохраняем во временный файл
-            temp_file = f"{self.data_file}.tmp"
-            with open(temp_file, "w", encoding="utf-8") as file:
-                json.dump(cars_data, file, ensure_ascii=False, indent=4)
+            with self._file_lock:
+                # Сначала сохраняем во временный файл
+                temp_file = f"{self.data_file}.tmp"
+                with open(temp_file, "w", encoding="utf-8") as file:
+                    json.dump(cars_data, file, ensure_ascii=False, indent=4)
 
-            # Если все в порядке, переименовываем временный файл
-            Path(temp_file).rename(self.data_file)
+                # Если все в порядке, переименовываем временный файл
+                Path(temp_file).replace(self.data_file)
+                self._write_version(max(self._read_version(), self._version) + 1)
             return True
         except Exception as e:
             print(f"Ошибка при сохранении данных: {e}")
-            return False
\ No newline at end of file
+            return False
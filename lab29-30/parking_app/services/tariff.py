@@ -0,0 +1,317 @@
+"""
+Тарифы: ставки по времени суток, суточный лимит, бесплатные минуты и планы клиентов
+"""
+
+import json
+from bisect import bisect_right
+from datetime import datetime, time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from models.car import Car, datetime_to_epoch_us
+
+
+DAY_US = 24 * 3600 * 10 ** 6
+HOUR_US = 3600 * 10 ** 6
+
+
+def round_cents(values: np.ndarray) -> np.ndarray:
+    """
+    Округление массива сумм до копеек с тем же результатом, что и round(value, 2)
+
+    np.round умножает на 100 и теряет точность как раз на половинах копейки,
+    поэтому значения рядом с половиной округляются встроенной round по одному.
+
+    Args:
+        values: Суммы
+
+    Returns:
+        Округлённые суммы
+    """
+    rounded = np.round(values, 2)
+    cents = values * 100
+    near_half = np.abs(cents - np.floor(cents) - 0.5) < 1e-6
+    if near_half.any():
+        rounded[near_half] = [round(value, 2) for value in values[near_half].tolist()]
+    return rounded
+
+
+def parse_time(value: str) -> time:
+    """Время суток из строки ЧЧ:ММ"""
+    return datetime.strptime(value, "%H:%M").time()
+
+
+def _time_to_us(value: time) -> int:
+    return ((value.hour * 60 + value.minute) * 60 + value.second) * 10 ** 6 + value.microsecond
+
+
+@dataclass
+class TimeBand:
+    """Период суток с одной ставкой: действует от start до начала следующего периода"""
+    start: time
+    hourly_rate: float
+
+
+class Tariff:
+    """
+    Тариф стоянки
+
+    Сутки делятся на периоды со своими ставками (последний период
+    продолжается через полночь до первого). За каждые календарные сутки
+    стоянки берётся не больше daily_cap, а стоянка не длиннее grace_minutes
+    бесплатна. Скидка автомобиля применяется к итоговой сумме.
+
+    При создании периоды компилируются в таблицу: границы в микросекундах
+    от полуночи и накопленная стоимость к каждой границе. Стоимость отрезка
+    внутри суток — разность накопленных стоимостей на его концах, поэтому
+    расчёт стоит одного двоичного поиска по границам, сколько бы ни было
+    периодов.
+    """
+
+    def __init__(self, name: str, bands: Sequence[TimeBand], daily_cap: Optional[float] = None,
+                 grace_minutes: int = 0):
+        """
+        Args:
+            name: Название тарифа
+            bands: Периоды суток (хотя бы один)
+            daily_cap: Максимальная стоимость за календарные сутки (None — без лимита)
+            grace_minutes: Бесплатная продолжительность стоянки в минутах
+        """
+        if not bands:
+            raise ValueError(f"У тарифа {name} нет ни одного периода")
+        self.name = name
+        self.bands = sorted(bands, key=lambda band: band.start)
+        self.daily_cap = daily_cap
+        self.grace_minutes = grace_minutes
+        self._grace_us = grace_minutes * 60 * 10 ** 6
+        self._compile()
+
+    def _compile(self):
+        """Построение таблицы границ и накопленных стоимостей"""
+        starts = [_time_to_us(band.start) for band in self.bands]
+        rates = [band.hourly_rate / HOUR_US for band in self.bands]
+        if starts[0] != 0:
+            # С полуночи действует последний период предыдущих суток
+            starts.insert(0, 0)
+            rates.insert(0, rates[-1])
+
+        cumulative = [0.0]
+        for index in range(1, len(starts)):
+            cumulative.append(cumulative[-1] + (starts[index] - starts[index - 1]) * rates[index - 1])
+
+        self._starts = starts
+        self._rates = rates
+        self._cumulative = cumulative
+        self._starts_array = np.array(starts, dtype=np.int64)
+        self._rates_array = np.array(rates, dtype=np.float64)
+        self._cumulative_array = np.array(cumulative, dtype=np.float64)
+
+        day_cost = self._cost_to(DAY_US)
+        self._full_day_cost = day_cost if self.daily_cap is None else min(day_cost, self.daily_cap)
+
+    def _cost_to(self, offset_us: int) -> float:
+        """Стоимость от полуночи до момента offset_us внутри суток"""
+        index = bisect_right(self._starts, offset_us) - 1
+        return self._cumulative[index] + (offset_us - self._starts[index]) * self._rates[index]
+
+    def _capped(self, cost: float) -> float:
+        return cost if self.daily_cap is None else min(cost, self.daily_cap)
+
+    def rate_at(self, moment: datetime) -> float:
+        """
+        Ставка, действующая в момент moment
+
+        Args:
+            moment: Момент времени
+
+        Returns:
+            Почасовая ставка
+        """
+        index = bisect_right(self._starts, _time_to_us(moment.time())) - 1
+        return self._rates[index] * HOUR_US
+
+    def cost_us(self, entry_us: int, end_us: int, discount: float = 0) -> float:
+        """
+        Стоимость стоянки по времени в микросекундах от эпохи
+
+        Args:
+            entry_us: Время въезда
+            end_us: Время окончания
+            discount: Скидка в процентах
+
+        Returns:
+            Стоимость, округлённая до копеек
+        """
+        if end_us - entry_us <= self._grace_us:
+            return 0.0
+        entry_day, entry_offset = divmod(entry_us, DAY_US)
+        end_day, end_offset = divmod(end_us, DAY_US)
+        if entry_day == end_day:
+            cost = self._capped(self._cost_to(end_offset) - self._cost_to(entry_offset))
+        else:
+            cost = (self._capped(self._cost_to(DAY_US) - self._cost_to(entry_offset)) +
+                    (end_day - entry_day - 1) * self._full_day_cost +
+                    self._capped(self._cost_to(end_offset)))
+        final_cost = cost - cost * (discount / 100)
+        return max(0, round(final_cost, 2))
+
+    def cost(self, car: Car, current_time: Optional[datetime] = None) -> float:
+        """
+        Стоимость стоянки автомобиля (аналог Car.calculate_current_cost)
+
+        Args:
+            car: Автомобиль
+            current_time: Момент расчета для машин на стоянке (по умолчанию — сейчас)
+
+        Returns:
+            Стоимость, округлённая до копеек
+        """
+        end_time = car.exit_time
+        if end_time is None:
+            end_time = current_time if current_time is not None else datetime.now()
+        return self.cost_us(datetime_to_epoch_us(car.entry_time), datetime_to_epoch_us(end_time), car.discount)
+
+    def _costs_to(self, offset_us: np.ndarray) -> np.ndarray:
+        index = np.searchsorted(self._starts_array, offset_us, side="right") - 1
+        return self._cumulative_array[index] + (offset_us - self._starts_array[index]) * self._rates_array[index]
+
+    def _capped_array(self, cost: np.ndarray) -> np.ndarray:
+        return cost if self.daily_cap is None else np.minimum(cost, self.daily_cap)
+
+    def costs(self, entry_us: np.ndarray, end_us, discount) -> np.ndarray:
+        """
+        Стоимость множества стоянок одной векторной операцией
+
+        Args:
+            entry_us: Время въезда в микросекундах от эпохи
+            end_us: Время окончания (число или массив той же длины)
+            discount: Скидки в процентах (число или массив той же длины)
+
+        Returns:
+            Стоимости, округлённые до копеек
+        """
+        entry_us = np.asarray(entry_us, dtype=np.int64)
+        end_us = np.broadcast_to(np.asarray(end_us, dtype=np.int64), entry_us.shape)
+        entry_day, entry_offset = np.divmod(entry_us, DAY_US)
+        end_day, end_offset = np.divmod(end_us, DAY_US)
+
+        entry_cost = self._costs_to(entry_offset)
+        end_cost = self._costs_to(end_offset)
+        same_day = self._capped_array(end_cost - entry_cost)
+        several_days = (self._capped_array(self._cost_to(DAY_US) - entry_cost) +
+                        (end_day - entry_day - 1) * self._full_day_cost +
+                        self._capped_array(end_cost))
+        cost = np.where(entry_day == end_day, same_day, several_days)
+        cost = np.where(end_us - entry_us <= self._grace_us, 0.0, cost)
+
+        final_cost = cost - cost * (np.asarray(discount, dtype=np.float64) / 100)
+        return np.maximum(0, round_cents(final_cost))
+
+    @classmethod
+    def from_dict(cls, name: str, data: dict) -> 'Tariff':
+        """
+        Тариф из словаря вида
+        {"bands": [["07:00", 120], ["22:00", 60]], "daily_cap": 1500, "grace_minutes": 15}
+        """
+        return cls(
+            name=name,
+            bands=[TimeBand(parse_time(start), float(rate)) for start, rate in data["bands"]],
+            daily_cap=data.get("daily_cap"),
+            grace_minutes=data.get("grace_minutes", 0)
+        )
+
+
+class TariffBook:
+    """
+    Набор тарифов: тариф по умолчанию и планы клиентов
+
+    План клиента закрепляет за номером автомобиля отдельный тариф.
+    """
+
+    def __init__(self, default: Tariff, plans: Optional[Dict[str, Tariff]] = None):
+        """
+        Args:
+            default: Тариф для клиентов без плана
+            plans: Номер автомобиля -> тариф
+        """
+        self.default = default
+        self.plans = dict(plans or {})
+
+    def tariff_for(self, car_number: str) -> Tariff:
+        """Тариф клиента"""
+        return self.plans.get(car_number, self.default)
+
+    def cost(self, car: Car, current_time: Optional[datetime] = None) -> float:
+        """
+        Стоимость стоянки автомобиля по тарифу его владельца
+
+        Args:
+            car: Автомобиль
+            current_time: Момент расчета для машин на стоянке (по умолчанию — сейчас)
+
+        Returns:
+            Стоимость, округлённая до копеек
+        """
+        return self.tariff_for(car.car_number).cost(car, current_time)
+
+    def group(self, car_numbers: Sequence[str]) -> List[Tuple[Tariff, np.ndarray]]:
+        """
+        Разбиение записей по тарифам для пакетного расчета
+
+        Args:
+            car_numbers: Номера автомобилей
+
+        Returns:
+            Список пар (тариф, индексы записей с этим тарифом)
+        """
+        if not self.plans:
+            return [(self.default, np.arange(len(car_numbers)))]
+        groups: Dict[int, List[int]] = {}
+        tariffs: Dict[int, Tariff] = {}
+        for index, number in enumerate(car_numbers):
+            tariff = self.tariff_for(number)
+            tariffs[id(tariff)] = tariff
+            groups.setdefault(id(tariff), []).append(index)
+        return [(tariffs[key], np.array(indexes, dtype=np.int64)) for key, indexes in groups.items()]
+
+    def costs(self, car_numbers: Sequence[str], entry_us: np.ndarray, end_us, discount: np.ndarray) -> np.ndarray:
+        """
+        Стоимость множества стоянок: по одной векторной операции на каждый тариф
+
+        Args:
+            car_numbers: Номера автомобилей
+            entry_us: Время въезда в микросекундах от эпохи
+            end_us: Время окончания (число или массив той же длины)
+            discount: Скидки в процентах
+
+        Returns:
+            Стоимости в порядке записей
+        """
+        entry_us = np.asarray(entry_us, dtype=np.int64)
+        end_us = np.broadcast_to(np.asarray(end_us, dtype=np.int64), entry_us.shape)
+        discount = np.asarray(discount, dtype=np.float64)
+        result = np.zeros(len(entry_us), dtype=np.float64)
+        for tariff, rows in self.group(car_numbers):
+            result[rows] = tariff.costs(entry_us[rows], end_us[rows], discount[rows])
+        return result
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'TariffBook':
+        """
+        Набор тарифов из словаря вида
+        {"default": "standard", "tariffs": {"standard": {...}}, "plans": {"А123ВС777": "standard"}}
+        """
+        tariffs = {name: Tariff.from_dict(name, tariff) for name, tariff in data["tariffs"].items()}
+        try:
+            return cls(
+                default=tariffs[data["default"]],
+                plans={number: tariffs[name] for number, name in data.get("plans", {}).items()}
+            )
+        except KeyError as e:
+            raise ValueError(f"Неизвестный тариф: {e}") from None
+
+    @classmethod
+    def from_file(cls, path: str) -> 'TariffBook':
+        """Набор тарифов из JSON-файла (формат см. from_dict)"""
+        with open(path, "r", encoding="utf-8") as file:
+            return cls.from_dict(json.load(file))
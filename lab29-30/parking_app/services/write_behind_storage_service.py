@@ -0,0 +1,289 @@
+"""
+Отложенная (пакетная) запись изменений поверх любого хранилища
+"""
+
+import atexit
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Dict, Any, Iterable, Optional
+from models.car import Car
+from services.storage_service import BaseStorageService, QueryStorageMixin
+
+
+# Уровни надёжности записи
+DURABILITY_SYNC = "sync"  # каждое изменение сразу записывается в хранилище
+DURABILITY_BATCHED = "batched"  # фоновая запись по таймеру, при переполнении пачки пишет вызывающий поток
+DURABILITY_ASYNC = "async"  # всё пишет фоновый поток, вызывающий поток никогда не ждёт диска
+
+DURABILITY_LEVELS = (DURABILITY_SYNC, DURABILITY_BATCHED, DURABILITY_ASYNC)
+
+
+class WriteBehindStorageService(QueryStorageMixin, BaseStorageService):
+    """
+    Хранилище с отложенной записью
+
+    Изменения накапливаются в очереди и записываются во вложенное хранилище
+    одной пачкой раз в flush_interval_ms миллисекунд или после max_pending
+    изменённых записей. Автомобиль, изменённый несколько раз до записи,
+    попадает в пачку один раз.
+
+    Хранилища, которые перезаписываются целиком (без appends_changes),
+    записывают пачку под своей блокировкой. Если другой процесс успел
+    их изменить, пачка накладывается на заново загруженные данные,
+    а следующий refresh сообщает, что данные нужно загрузить заново.
+    """
+
+    def __init__(self, storage: BaseStorageService, durability: str = DURABILITY_BATCHED,
+                 flush_interval_ms: int = 500, max_pending: int = 100):
+        """
+        Инициализация хранилища
+
+        Args:
+            storage: Вложенное хранилище
+            durability: Уровень надёжности (sync, batched, async)
+            flush_interval_ms: Период фоновой записи в миллисекундах
+            max_pending: Количество изменений, после которого запись выполняется сразу
+        """
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Неизвестный уровень надёжности: {durability}")
+
+        self.storage = storage
+        # Методы query_* передаются вложенному хранилищу и вызываются, только если оно их поддерживает
+        self.supports_queries = storage.supports_queries
+        self.appends_changes = storage.appends_changes
+        self.durability = durability
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_pending = max_pending
+
+        # Изменённые автомобили в порядке первого изменения (ключ — id объекта)
+        self._pending: Dict[int, Car] = {}
+        self._cars: List[Car] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.RLock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        # При записи пачки обнаружены чужие изменения: refresh вернёт None
+        self._reload = False
+
+        self._worker: Optional[threading.Thread] = None
+        if durability != DURABILITY_SYNC:
+            self._worker = threading.Thread(target=self._flush_worker, daemon=True)
+            self._worker.start()
+
+        atexit.register(self.close)
+
+    @property
+    def pending_count(self) -> int:
+        """Количество изменений, ожидающих записи"""
+        return len(self._pending)
+
+    def load_data(self) -> List[Car]:
+        """
+        Загрузка данных из вложенного хранилища
+
+        Накопленные изменения сначала записываются, иначе после полной
+        перезагрузки (например, когда refresh вернул None) их не было бы
+        в загруженных данных.
+
+        Returns:
+            Список автомобилей
+        """
+        self.flush()
+        return self.storage.load_data()
+
+    def save_data(self, cars: List[Car]) -> bool:
+        """
+        Полное сохранение (выполняется сразу, очередь сбрасывается)
+
+        Args:
+            cars: Список автомобилей для сохранения
+
+        Returns:
+            Успешность операции
+        """
+        with self._flush_lock:
+            with self._lock:
+                self._pending.clear()
+                self._cars = cars
+            return self.storage.save_data(cars)
+
+    def save_car(self, car: Car, cars: List[Car]) -> bool:
+        """
+        Постановка изменения в очередь на запись
+
+        Args:
+            car: Добавленный или изменённый автомобиль
+            cars: Полный список автомобилей
+
+        Returns:
+            Успешность операции (для отложенной записи — всегда True)
+        """
+        if self.durability == DURABILITY_SYNC:
+            return self.storage.save_car(car, cars)
+
+        with self._lock:
+            self._pending[id(car)] = car
+            self._cars = cars
+            overflow = len(self._pending) >= self.max_pending
+
+        if overflow:
+            if self.durability == DURABILITY_BATCHED:
+                return self.flush()
+            self._wakeup.set()
+        return True
+
+    def save_cars(self, changed: List[Car], cars: List[Car]) -> bool:
+        """
+        Постановка пачки изменений в очередь на запись
+
+        Args:
+            changed: Добавленные или изменённые автомобили
+            cars: Полный список автомобилей
+
+        Returns:
+            Успешность операции
+        """
+        result = True
+        for car in changed:
+            result = self.save_car(car, cars) and result
+        return result
+
+    def save_batches(self, batches: Iterable[List[Car]]) -> bool:
+        """
+        Массовая запись мимо очереди: накопленные изменения записываются первыми
+
+        Args:
+            batches: Пачки добавляемых или изменяемых автомобилей
+
+        Returns:
+            Успешность операции
+        """
+        with self._flush_lock:
+            if not self.flush():
+                return False
+            return self.storage.save_batches(batches)
+
+    def flush(self) -> bool:
+        """
+        Запись всех накопленных изменений одной пачкой
+
+        Returns:
+            Успешность операции
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return True
+                changed = list(self._pending.values())
+                cars = self._cars
+                self._pending.clear()
+
+            if self._write(changed, cars):
+                return True
+
+            # Не записанные изменения возвращаются в очередь
+            with self._lock:
+                for car in changed:
+                    self._pending.setdefault(id(car), car)
+            return False
+
+    def _write(self, changed: List[Car], cars: List[Car]) -> bool:
+        """
+        Запись пачки во вложенное хранилище
+
+        Список cars мог устареть: другие процессы пишут в хранилище, пока
+        изменения ждут в очереди. Хранилище с appends_changes записывает
+        только changed, а перезаписываемое целиком сначала проверяется
+        под блокировкой и при чужих изменениях загружается заново.
+
+        Args:
+            changed: Изменённые автомобили
+            cars: Полный список автомобилей на момент последнего изменения
+
+        Returns:
+            Успешность операции
+        """
+        if self.appends_changes:
+            return self.storage.save_cars(changed, cars)
+
+        with self.storage.transaction():
+            if self.storage.refresh() == []:
+                return self.storage.save_cars(changed, cars)
+            records = {car.key: car for car in self.storage.load_data()}
+            records.update((car.key, car) for car in changed)
+            self._reload = True
+            return self.storage.save_cars(changed, list(records.values()))
+
+    @contextmanager
+    def transaction(self):
+        """
+        Блокировка вложенного хранилища на время операции
+
+        Изменения внутри транзакции только ставятся в очередь: другие
+        процессы увидят их после фоновой записи (через версию хранилища
+        и refresh). Сразу записывает только уровень sync.
+        """
+        # Порядок захвата тот же, что у фоновой записи: сначала очередь, потом хранилище,
+        # иначе запись при переполнении очереди внутри транзакции ждала бы фоновый поток вечно
+        with self._flush_lock, self.storage.transaction():
+            yield
+
+    def refresh(self) -> Optional[List[Car]]:
+        """Изменения других процессов (свои накопленные изменения не записываются)"""
+        if self._reload:
+            self._reload = False
+            return None
+        return self.storage.refresh()
+
+    def _flush_worker(self):
+        """Фоновый поток периодической записи"""
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def close(self):
+        """Запись накопленных изменений и закрытие вложенного хранилища"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        if self._worker is not None:
+            self._worker.join()
+
+        self.flush()
+        self.storage.close()
+        atexit.unregister(self.close)
+
+    def query_current_cars(self) -> List[Car]:
+        """Автомобили на стоянке"""
+        self.flush()
+        return self.storage.query_current_cars()
+
+    def query_history(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                      limit: Optional[int] = None, offset: int = 0) -> List[Car]:
+        """Завершённые стоянки с въездом в [start, end)"""
+        self.flush()
+        return self.storage.query_history(start, end, limit, offset)
+
+    def query_search(self, search_term: str, limit: Optional[int] = None, offset: int = 0,
+                     start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Car]:
+        """Поиск по номеру, марке и владельцу"""
+        self.flush()
+        return self.storage.query_search(search_term, limit, offset, start, end)
+
+    def query_debtors(self) -> List[Car]:
+        """Должники"""
+        self.flush()
+        return self.storage.query_debtors()
+
+    def query_total_debt(self) -> float:
+        """Общая задолженность"""
+        self.flush()
+        return self.storage.query_total_debt()
+
+    def query_stats(self) -> Dict[str, Any]:
+        """Сводные показатели"""
+        self.flush()
+        return self.storage.query_stats()
@@ -62,14 +62,14 @@ class ConsoleUI:
             input("Нажмите Enter для продолжения...")
             return
 
-        hourly_rate_input = input("Введите почасовую ставку (по умолчанию 100 руб.): ").strip()
+        hourly_rate_input = input("Введите почасовую ставку (по умолчанию — по тарифу): ").strip()
         if hourly_rate_input:
             hourly_rate = validate_numeric_input(hourly_rate_input, 1)
             if hourly_rate is None:
                 input("Нажмите Enter для продолжения...")
                 return
         else:
-            hourly_rate = 100.0
+            hourly_rate = None
 
         try:
             car = self.parking_service.add_car(
@@ -138,7 +138,7 @@ class ConsoleUI:
 
         for i, car in enumerate(current_cars, 1):
             duration = format_time_difference(car.entry_time, now)
-            current_cost = car.calculate_current_cost(now)
+            current_cost = self.parking_service.calculate_cost(car, now)
 
             print(f"{i}. Марка: {car.car_brand}, Номер: {car.car_number}")
             print(f"   Владелец: {car.owner_name}")
@@ -156,7 +156,7 @@ class ConsoleUI:
         """Просмотр истории стоянки"""
         self.print_header("ИСТОРИЯ СТОЯНКИ")
 
-        history = self.parking_service.get_parking_history()
+        history = sorted(self.parking_service.iter_parking_history(), key=lambda x: x.exit_time, reverse=True)
 
         if not history:
             print("История пуста.")
@@ -165,7 +165,7 @@ class ConsoleUI:
 
         print(f"Всего записей: {len(history)}\n")
 
-        for i, car in enumerate(sorted(history, key=lambda x: x.exit_time, reverse=True), 1):
+        for i, car in enumerate(history, 1):
             duration = format_time_difference(car.entry_time, car.exit_time)
 
             print(f"{i}. Марка: {car.car_brand}, Номер: {car.car_number}")
@@ -217,7 +217,7 @@ class ConsoleUI:
             else:
                 now = datetime.now()
                 duration = format_time_difference(car.entry_time, now)
-                current_cost = car.calculate_current_cost(now)
+                current_cost = self.parking_service.calculate_cost(car, now)
                 print(f"   Статус: На стоянке")
                 print(f"   Текущая длительность: {duration}")
                 print(f"   Текущая стоимость: {format_money(current_cost)}")
@@ -284,22 +284,21 @@ class ConsoleUI:
         """Просмотр статистики"""
         self.print_header("СТАТИСТИКА АВТОСТОЯНКИ")
 
-        current_cars = self.parking_service.get_current_cars()
-        history = self.parking_service.get_parking_history()
-        debtors = self.parking_service.get_debtors()
-        total_debt = self.parking_service.get_total_debt()
+        stats = self.parking_service.get_stats()
 
-        print(f"Автомобилей на стоянке: {len(current_cars)}")
-        print(f"Всего обслужено автомобилей: {len(history)}")
-        print(f"Количество должников: {len(debtors)}")
-        print(f"Общая сумма задолженности: {format_money(total_debt)}")
+        print(f"Автомобилей на стоянке: {stats['current']}")
+        print(f"Всего обслужено автомобилей: {stats['served']}")
+        print(f"Количество должников: {stats['debtors']}")
+        print(f"Общая сумма задолженности: {format_money(stats['total_debt'])}")
 
-        if history:
-            total_revenue = sum(car.cost for car in history if car.payment_status == "Оплачено")
+        if stats['served']:
+            history_table = self.parking_service.get_history_table()
+            total_revenue = history_table.total_revenue()
             print(f"Общая выручка: {format_money(total_revenue)}")
 
-            total_expected = sum(car.cost for car in history)
+            total_expected = history_table.total_revenue(paid_only=False)
             print(f"Ожидаемая выручка: {format_money(total_expected)}")
+            print(f"Средняя длительность стоянки: {history_table.average_stay():.2f} ч.")
 
         input("\nНажмите Enter для продолжения...")
 
@@ -0,0 +1,134 @@
+# parking_app/ui/dispatcher.py
+
+import tkinter as tk
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
+
+
+class UIDispatcher:
+    """
+    Выполнение вызовов сервиса в фоновом потоке с возвратом результата в поток Tk
+
+    Все задачи выполняет один рабочий поток, поэтому вызовы ParkingService
+    идут строго по очереди и не требуют блокировок. Главный поток опрашивает
+    завершённые задачи через root.after и вызывает обработчики результата
+    уже в потоке интерфейса — виджеты из рабочего потока не трогаются.
+    """
+
+    def __init__(self, root, on_busy_change: Optional[Callable[[bool], None]] = None,
+                 poll_interval_ms: int = 50):
+        """
+        Args:
+            root: Главное окно Tk
+            on_busy_change: Вызывается с True, когда появляется выполняемая задача,
+                и с False, когда все задачи завершены
+            poll_interval_ms: Период проверки завершённых задач в миллисекундах
+        """
+        self.root = root
+        self.on_busy_change = on_busy_change
+        self.poll_interval_ms = poll_interval_ms
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="parking-service")
+        self._pending: List[Tuple[Future, Optional[Callable], Optional[Callable]]] = []
+        self._poll_id = None
+
+    @property
+    def busy(self) -> bool:
+        """Есть ли незавершённые задачи"""
+        return bool(self._pending)
+
+    def submit(self, func: Callable, *args, on_success: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[Exception], None]] = None, **kwargs) -> Future:
+        """
+        Постановка вызова в очередь рабочего потока
+
+        Args:
+            func: Вызываемая функция (обычно метод ParkingService)
+            *args: Позиционные аргументы вызова
+            on_success: Обработчик результата (вызывается в потоке Tk)
+            on_error: Обработчик исключения (вызывается в потоке Tk)
+            **kwargs: Именованные аргументы вызова
+
+        Returns:
+            Future задачи
+        """
+        future = self._executor.submit(func, *args, **kwargs)
+        was_busy = self.busy
+        self._pending.append((future, on_success, on_error))
+        if not was_busy:
+            self._set_busy(True)
+        if self._poll_id is None:
+            self._poll_id = self.root.after(self.poll_interval_ms, self._poll)
+        return future
+
+    def _poll(self):
+        """Вызов обработчиков для завершённых задач (в потоке Tk)"""
+        self._poll_id = None
+        # Обработчики вызываются в порядке постановки задач
+        while self._pending and self._pending[0][0].done():
+            future, on_success, on_error = self._pending.pop(0)
+            error = future.exception()
+            try:
+                if error is not None:
+                    if on_error is not None:
+                        on_error(error)
+                    else:
+                        print(f"Ошибка фоновой операции: {error}")
+                elif on_success is not None:
+                    on_success(future.result())
+            except Exception as e:
+                print(f"Ошибка обработчика результата: {e}")
+
+        # Обработчик мог открыть модальный диалог и запустить опрос повторно
+        if self._pending:
+            if self._poll_id is None:
+                self._poll_id = self.root.after(self.poll_interval_ms, self._poll)
+        else:
+            self._set_busy(False)
+
+    def _set_busy(self, busy: bool):
+        if self.on_busy_change is not None:
+            self.on_busy_change(busy)
+
+    def shutdown(self):
+        """Ожидание завершения поставленных задач и остановка рабочего потока"""
+        if self._poll_id is not None:
+            try:
+                self.root.after_cancel(self._poll_id)
+            except tk.TclError:
+                # Окно уже закрыто
+                pass
+            self._poll_id = None
+        self._executor.shutdown(wait=True)
+        self._pending.clear()
+
+
+class DeferredService:
+    """
+    Заместитель сервиса, который ещё загружается в фоновом потоке
+
+    Позволяет построить окно до окончания загрузки данных. Обращение
+    к методу возвращает функцию, которая дожидается загрузки уже при вызове,
+    то есть в рабочем потоке UIDispatcher, а не в потоке интерфейса.
+    После загрузки атрибуты берутся у сервиса напрямую.
+    """
+
+    def __init__(self, future: Future):
+        """
+        Args:
+            future: Future, результатом которого станет сервис
+        """
+        self._future = future
+
+    @property
+    def ready(self) -> bool:
+        """Загружен ли сервис"""
+        return self._future.done()
+
+    def __getattr__(self, name: str) -> Any:
+        if self._future.done():
+            return getattr(self._future.result(), name)
+
+        def deferred_call(*args, **kwargs):
+            return getattr(self._future.result(), name)(*args, **kwargs)
+        return deferred_call
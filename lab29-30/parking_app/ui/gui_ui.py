@@ -3,10 +3,20 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
+from typing import Any, Dict, List
 from models.car import Car
 from services.parking_service import ParkingService
+from ui.dispatcher import UIDispatcher
+from ui.virtual_tree import VirtualTreeview
 from utils.helpers import validate_numeric_input, format_money, format_time_difference
 
+# Сколько результатов поиска показывать, чтобы не выводить всю историю
+SEARCH_RESULTS_LIMIT = 200
+# Период обновления текущей стоимости на вкладке "Текущие", мс
+COST_REFRESH_MS = 1000
+# Сколько записей истории запрашивать у сервиса за раз
+HISTORY_PAGE_SIZE = 200
+
 
 class ParkingGUI:
     def __init__(self, parking_service: ParkingService):
@@ -15,11 +25,26 @@ class ParkingGUI:
         self.root.title("Управление автостоянкой")
         self.root.geometry("1000x700")
 
+        # Вызовы сервиса выполняются в фоновом потоке, интерфейс не блокируется
+        self.dispatcher = UIDispatcher(self.root, on_busy_change=self.set_busy)
+
+        # Таблица стоимости строится при первом получении списка машин
+        self.cost_table = None
+
         self.create_widgets()
         self.update_current_cars()
         self.update_history()
+        self.root.after(COST_REFRESH_MS, self.refresh_costs)
 
     def create_widgets(self):
+        # Строка состояния с индикатором выполнения фоновых операций
+        status_frame = ttk.Frame(self.root)
+        status_frame.pack(side='bottom', fill='x')
+        self.busy_label = ttk.Label(status_frame, text="")
+        self.busy_label.pack(side='left', padx=10, pady=2)
+        self.busy_progress = ttk.Progressbar(status_frame, mode='indeterminate', length=150)
+        self.busy_progress.pack(side='right', padx=10, pady=2)
+
         # Создаем Notebook (вкладки)
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(fill='both', expand=True)
@@ -69,35 +94,68 @@ class ParkingGUI:
         btn = ttk.Button(self.add_tab, text='Добавить', command=self.add_car)
         btn.grid(row=len(fields), column=0, columnspan=2, pady=10)
 
+    def set_busy(self, busy: bool):
+        """Включение и выключение индикатора выполнения"""
+        if busy:
+            self.busy_label.config(text="Выполняется...")
+            self.busy_progress.start(10)
+            self.root.config(cursor='watch')
+        else:
+            self.busy_label.config(text="")
+            self.busy_progress.stop()
+            self.root.config(cursor='')
+
+    def show_error(self, error: Exception):
+        messagebox.showerror("Ошибка", str(error))
+
     def add_car(self):
         try:
             data = {k: v.get().strip() for k, v in self.entries.items()}
             discount = validate_numeric_input(data['discount'], 0, 100)
-            hourly_rate = validate_numeric_input(data['hourly_rate'] or 100, 1)
-
-            car = self.parking_service.add_car(
+            if discount is None:
+                messagebox.showerror("Ошибка", "Скидка должна быть числом от 0 до 100")
+                return
+            # Без ставки берётся ставка тарифа клиента, но заполненное поле должно быть верным
+            hourly_rate = None
+            if data['hourly_rate']:
+                hourly_rate = validate_numeric_input(data['hourly_rate'], 1)
+                if hourly_rate is None:
+                    messagebox.showerror("Ошибка", "Ставка должна быть числом не меньше 1")
+                    return
+
+            self.dispatcher.submit(
+                self.parking_service.add_car,
                 car_brand=data['car_brand'],
                 car_number=data['car_number'].upper(),
                 owner_name=data['owner_name'],
                 discount=int(discount),
-                hourly_rate=hourly_rate
+                hourly_rate=hourly_rate,
+                on_success=self.on_car_added,
+                on_error=self.show_error
             )
-            messagebox.showinfo("Успех",
-                                f"Автомобиль {car.car_brand} {car.car_number} добавлен!\n"
-                                f"Время въезда: {car.entry_time.strftime('%d.%m.%Y %H:%M')}")
-            self.update_current_cars()
         except Exception as e:
             messagebox.showerror("Ошибка", str(e))
 
+    def on_car_added(self, car: Car):
+        messagebox.showinfo("Успех",
+                            f"Автомобиль {car.car_brand} {car.car_number} добавлен!\n"
+                            f"Время въезда: {car.entry_time.strftime('%d.%m.%Y %H:%M')}")
+        self.update_current_cars()
+
     def create_current_cars_tab(self):
-        self.current_tree = ttk.Treeview(self.current_tab, columns=('brand', 'number', 'owner', 'entry', 'cost'),
-                                         show='headings')
-        self.current_tree.heading('brand', text='Марка')
-        self.current_tree.heading('number', text='Номер')
-        self.current_tree.heading('owner', text='Владелец')
-        self.current_tree.heading('entry', text='Время въезда')
-        self.current_tree.heading('cost', text='Текущая стоимость')
-        self.current_tree.pack(fill='both', expand=True, padx=10, pady=10)
+        self.current_table = VirtualTreeview(
+            self.current_tab,
+            columns=[
+                ('brand', 'Марка'),
+                ('number', 'Номер'),
+                ('owner', 'Владелец'),
+                ('entry', 'Время въезда'),
+                ('cost', 'Текущая стоимость')
+            ],
+            row_values=self._current_row,
+            row_key=self._car_key
+        )
+        self.current_table.pack(fill='both', expand=True, padx=10, pady=10)
 
         remove_frame = ttk.Frame(self.current_tab)
         remove_frame.pack(pady=10)
@@ -108,19 +166,37 @@ class ParkingGUI:
 
         ttk.Button(remove_frame, text='Вывести', command=self.remove_car).pack(side='left')
 
-    def update_current_cars(self):
-        for item in self.current_tree.get_children():
-            self.current_tree.delete(item)
+    @staticmethod
+    def _car_key(car: Car) -> str:
+        """Ключ строки таблицы — ключ записи в хранилище"""
+        return car.key
+
+    def _current_row(self, car: Car) -> tuple:
+        return (
+            car.car_brand,
+            car.car_number,
+            car.owner_name,
+            car.entry_time.strftime('%d.%m.%Y %H:%M'),
+            format_money(self.parking_service.calculate_cost(car))
+        )
 
-        for car in self.parking_service.get_current_cars():
-            cost = car.calculate_current_cost()
-            self.current_tree.insert('', 'end', values=(
-                car.car_brand,
-                car.car_number,
-                car.owner_name,
-                car.entry_time.strftime('%d.%m.%Y %H:%M'),
-                format_money(cost)
-            ))
+    def update_current_cars(self):
+        self.dispatcher.submit(self.parking_service.get_current_cars,
+                               on_success=self.show_current_cars, on_error=self.show_error)
+
+    def show_current_cars(self, cars: List[Car]):
+        # NumPy импортируется только здесь, чтобы не замедлять запуск окна
+        from services.billing import LiveCostTable
+        self.current_table.set_items(cars)
+        self.cost_table = LiveCostTable(cars, self.parking_service.tariffs)
+
+    def refresh_costs(self):
+        """Периодическое обновление колонки стоимости в созданных строках"""
+        count = self.current_table.materialized_count
+        if count and self.cost_table is not None:
+            costs = self.cost_table.costs(count=count)
+            self.current_table.update_column('cost', [format_money(cost) for cost in costs])
+        self.root.after(COST_REFRESH_MS, self.refresh_costs)
 
     def remove_car(self):
         number = self.remove_number.get().strip().upper()
@@ -128,7 +204,11 @@ class ParkingGUI:
             messagebox.showwarning("Ошибка", "Введите номер автомобиля")
             return
 
-        car, cost = self.parking_service.remove_car(number)
+        self.dispatcher.submit(self.parking_service.remove_car, number,
+                               on_success=lambda result: self.on_car_removed(number, *result),
+                               on_error=self.show_error)
+
+    def on_car_removed(self, number: str, car: Car, cost: float):
         if not car:
             messagebox.showerror("Ошибка", "Автомобиль не найден")
             return
@@ -139,20 +219,19 @@ class ParkingGUI:
             f"Оплатить сейчас?"
         )
         if messagebox.askyesno("Оплата", msg):
-            self.parking_service.pay_for_parking(number)
-            messagebox.showinfo("Успех", "Оплачено!")
+            self.dispatcher.submit(self.parking_service.pay_for_parking, number,
+                                   on_success=lambda _: messagebox.showinfo("Успех", "Оплачено!"),
+                                   on_error=self.show_error)
         else:
-            self.parking_service.update_car_debt(number, cost)
-            messagebox.showinfo("Информация", f"Задолженность: {format_money(cost)}")
+            self.dispatcher.submit(self.parking_service.update_car_debt, number, cost,
+                                   on_success=lambda _: messagebox.showinfo(
+                                       "Информация", f"Задолженность: {format_money(cost)}"),
+                                   on_error=self.show_error)
 
         self.update_current_cars()
         self.update_history()
 
     def create_history_tab(self):
-        self.history_tree = ttk.Treeview(self.history_tab,
-                                         columns=('brand', 'number', 'owner', 'entry', 'exit', 'cost', 'status'),
-                                         show='headings')
-
         columns = [
             ('brand', 'Марка'),
             ('number', 'Номер'),
@@ -163,26 +242,39 @@ class ParkingGUI:
             ('status', 'Статус')
         ]
 
-        for col, text in columns:
-            self.history_tree.heading(col, text=text)
-            self.history_tree.column(col, width=100)
-
-        self.history_tree.pack(fill='both', expand=True, padx=10, pady=10)
+        self.history_table = VirtualTreeview(self.history_tab, columns=columns,
+                                             row_values=self._history_row, row_key=self._car_key,
+                                             page_size=HISTORY_PAGE_SIZE, column_width=100,
+                                             fetch_more=self.fetch_history_page)
+        self.history_table.pack(fill='both', expand=True, padx=10, pady=10)
+
+    @staticmethod
+    def _history_row(car: Car) -> tuple:
+        return (
+            car.car_brand,
+            car.car_number,
+            car.owner_name,
+            car.entry_time.strftime('%d.%m.%Y %H:%M'),
+            car.exit_time.strftime('%d.%m.%Y %H:%M') if car.exit_time else '',
+            format_money(car.cost),
+            car.payment_status
+        )
 
     def update_history(self):
-        for item in self.history_tree.get_children():
-            self.history_tree.delete(item)
-
-        for car in self.parking_service.get_parking_history():
-            self.history_tree.insert('', 'end', values=(
-                car.car_brand,
-                car.car_number,
-                car.owner_name,
-                car.entry_time.strftime('%d.%m.%Y %H:%M'),
-                car.exit_time.strftime('%d.%m.%Y %H:%M') if car.exit_time else '',
-                format_money(car.cost),
-                car.payment_status
-            ))
+        # Перечитываются только уже полученные записи (но не меньше страницы);
+        # лишняя запись в запросе показывает, есть ли история дальше
+        count = max(len(self.history_table), HISTORY_PAGE_SIZE)
+        self.dispatcher.submit(self.parking_service.get_parking_history, limit=count + 1,
+                               on_success=lambda cars: self.history_table.set_items(cars[:count], len(cars) > count),
+                               on_error=self.show_error)
+
+    def fetch_history_page(self, offset: int):
+        """Запрос следующей страницы истории при прокрутке до конца таблицы"""
+        self.dispatcher.submit(self.parking_service.get_parking_history,
+                               limit=HISTORY_PAGE_SIZE + 1, offset=offset,
+                               on_success=lambda cars: self.history_table.append_items(
+                                   cars[:HISTORY_PAGE_SIZE], len(cars) > HISTORY_PAGE_SIZE),
+                               on_error=self.show_error)
 
     def create_search_tab(self):
         search_frame = ttk.Frame(self.search_tab)
@@ -214,10 +306,14 @@ class ParkingGUI:
         if not query:
             return
 
+        self.dispatcher.submit(self.parking_service.search_cars, query, limit=SEARCH_RESULTS_LIMIT,
+                               on_success=self.show_search_results, on_error=self.show_error)
+
+    def show_search_results(self, cars: List[Car]):
         for item in self.search_result.get_children():
             self.search_result.delete(item)
 
-        for car in self.parking_service.search_cars(query):
+        for car in cars:
             status = "На стоянке" if not car.exit_time else \
                 f"Оплачено: {car.payment_status}"
             self.search_result.insert('', 'end', values=(
@@ -248,10 +344,14 @@ class ParkingGUI:
         self.update_stats()
 
     def update_stats(self):
-        current = len(self.parking_service.get_current_cars())
-        history = len(self.parking_service.get_parking_history())
-        debtors = len(self.parking_service.get_debtors())
-        total_debt = self.parking_service.get_total_debt()
+        self.dispatcher.submit(self.parking_service.get_stats,
+                               on_success=self.show_stats, on_error=self.show_error)
+
+    def show_stats(self, stats: Dict[str, Any]):
+        current = stats['current']
+        history = stats['served']
+        debtors = stats['debtors']
+        total_debt = stats['total_debt']
 
         self.stats_labels['current'].config(text=f"Авто на стоянке: {current}")
         self.stats_labels['total'].config(text=f"Всего обслужено: {history}")
@@ -259,4 +359,6 @@ class ParkingGUI:
         self.stats_labels['debt'].config(text=f"Общий долг: {format_money(total_debt)}")
 
     def run(self):
-        self.root.mainloop()
\ No newline at end of file
+        self.root.mainloop()
+        # Дожидаемся записи, поставленной в очередь до закрытия окна
+        self.dispatcher.shutdown()
\ No newline at end of file
@@ -0,0 +1,512 @@
+# parking_app/ui/http_api.py
+
+import asyncio
+import json
+import math
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+from models.car import Car
+from services.parking_service import ParkingService
+from services.lot_service import MultiLotService
+
+# Ограничения на размер запроса
+MAX_HEADER_SIZE = 16 * 1024
+MAX_BODY_SIZE = 1024 * 1024
+
+
+class HTTPError(Exception):
+    """Ошибка запроса, которая возвращается клиенту с кодом статуса"""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Request:
+    """Разобранный HTTP-запрос"""
+
+    def __init__(self, method: str, target: str, version: str, headers: Dict[str, str], body: bytes):
+        self.method = method
+        self.version = version
+        self.headers = headers
+        self.body = body
+        # Номер автомобиля из адреса вида /cars/<номер>/...
+        self.car_number: Optional[str] = None
+        # Стоянка из адреса вида /lots/<стоянка>/... (для MultiLotHTTPServer)
+        self.lot: Optional[str] = None
+
+        url = urlsplit(target)
+        self.path = url.path.rstrip('/') or '/'
+        self.query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+    @property
+    def keep_alive(self) -> bool:
+        """Оставлять ли соединение открытым после ответа"""
+        connection = self.headers.get('connection', '').lower()
+        if self.version == 'HTTP/1.0':
+            return connection == 'keep-alive'
+        return connection != 'close'
+
+    def json(self) -> Dict[str, Any]:
+        """Тело запроса в виде объекта JSON"""
+        if not self.body:
+            return {}
+        try:
+            data = json.loads(self.body.decode('utf-8'))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Некорректный JSON: {e}")
+        if not isinstance(data, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Тело запроса должно быть объектом JSON")
+        return data
+
+
+class ParkingHTTPServer:
+    """
+    HTTP/JSON API для одного общего ParkingService
+
+    Сервер работает на asyncio: соединения не закрываются между запросами
+    (keep-alive), а запросы, отправленные клиентом подряд без ожидания
+    ответа (pipelining), обрабатываются параллельно чтению следующих,
+    и ответы уходят в порядке запросов. Вызовы ParkingService выполняются
+    в ограниченном пуле потоков по одному, поэтому медленная запись
+    в хранилище не останавливает цикл событий.
+
+    Маршруты:
+        GET  /cars                   — автомобили на стоянке
+        POST /cars                   — въезд (car_brand, car_number, owner_name, discount, hourly_rate)
+        POST /cars/<номер>/exit      — выезд, возвращает стоимость
+        POST /cars/<номер>/pay       — оплата
+        POST /cars/<номер>/debt      — запись задолженности (amount)
+        GET  /search?q=&limit=&offset= — поиск
+        GET  /debtors                — должники
+        GET  /stats                  — сводные показатели
+        GET  /billing?at=            — расчет всех машин на стоянке на момент at (ISO)
+    """
+
+    def __init__(self, parking_service: ParkingService, host: str = '127.0.0.1', port: int = 8080,
+                 workers: int = 1, max_pending: int = 64, max_pipeline: int = 16,
+                 keep_alive_timeout: float = 15.0):
+        """
+        Args:
+            parking_service: Общий сервис автостоянки
+            host: Адрес для прослушивания
+            port: Порт
+            workers: Размер пула потоков для вызовов сервиса
+            max_pending: Сколько вызовов сервиса может ожидать выполнения одновременно
+            max_pipeline: Сколько запросов одного соединения может обрабатываться до отправки ответов
+            keep_alive_timeout: Через сколько секунд простоя закрывать соединение
+        """
+        self.parking_service = parking_service
+        self.host = host
+        self.port = port
+        self.max_pending = max_pending
+        self.max_pipeline = max_pipeline
+        self.keep_alive_timeout = keep_alive_timeout
+
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='parking-http')
+        # ParkingService не рассчитан на одновременные вызовы из нескольких потоков
+        self._service_lock = threading.Lock()
+        self._pending: Optional[asyncio.Semaphore] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+        self._routes: Dict[Tuple[str, str], Callable[[Request], Tuple[HTTPStatus, Any]]] = {
+            ('GET', 'cars'): self._current_cars,
+            ('POST', 'cars'): self._add_car,
+            ('POST', 'exit'): self._remove_car,
+            ('POST', 'pay'): self._pay,
+            ('POST', 'debt'): self._update_debt,
+            ('GET', 'search'): self._search,
+            ('GET', 'debtors'): self._debtors,
+            ('GET', 'stats'): self._stats,
+            ('GET', 'billing'): self._billing,
+        }
+
+    async def start(self):
+        """Запуск прослушивания порта"""
+        self._pending = asyncio.Semaphore(self.max_pending)
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port,
+                                                  limit=MAX_HEADER_SIZE)
+        # При port=0 система выбирает свободный порт
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        """Запуск сервера и обработка соединений до остановки"""
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self):
+        """Остановка приёма соединений и ожидание начатых вызовов сервиса"""
+        if self._server is not None:
+            self._server.close()
+        self._executor.shutdown(wait=True)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Обработка одного соединения: чтение запросов подряд и упорядоченная отправка ответов"""
+        responses: asyncio.Queue = asyncio.Queue(maxsize=self.max_pipeline)
+        writer_task = asyncio.ensure_future(self._write_responses(responses, writer))
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), self.keep_alive_timeout)
+                except HTTPError as e:
+                    await responses.put((self._ready(e.status, {'error': e.message}), False))
+                    break
+                except (asyncio.TimeoutError, ConnectionError):
+                    break
+                if request is None:
+                    break
+
+                # Обработка начинается сразу, не дожидаясь ответа на предыдущий запрос
+                await responses.put((asyncio.ensure_future(self._dispatch(request)), request.keep_alive))
+                if not request.keep_alive:
+                    break
+        finally:
+            await responses.put(None)
+            await writer_task
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    @staticmethod
+    def _ready(status: HTTPStatus, payload: Any) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        future.set_result((status, payload))
+        return future
+
+    async def _write_responses(self, responses: asyncio.Queue, writer: asyncio.StreamWriter):
+        """Отправка ответов в порядке поступления запросов"""
+        connected = True
+        while True:
+            item = await responses.get()
+            if item is None:
+                return
+            response, keep_alive = item
+            status, payload = await response
+            if not connected:
+                # Клиент отключился: дожидаемся оставшихся запросов, но ничего не отправляем
+                continue
+            try:
+                writer.write(self._encode_response(status, payload, keep_alive))
+                await writer.drain()
+            except ConnectionError:
+                connected = False
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Optional[Request]:
+        """
+        Чтение одного запроса из потока
+
+        Returns:
+            Запрос или None, если клиент закрыл соединение
+        """
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError as e:
+            if e.partial.strip():
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Запрос оборван")
+            return None
+        except asyncio.LimitOverrunError:
+            raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Слишком большие заголовки")
+
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, version = lines[0].split(' ')
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Некорректная строка запроса")
+
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+        if 'transfer-encoding' in headers:
+            raise HTTPError(HTTPStatus.NOT_IMPLEMENTED, "Передача частями не поддерживается")
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Некорректный Content-Length")
+        if length > MAX_BODY_SIZE:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Слишком большое тело запроса")
+
+        try:
+            body = await reader.readexactly(length) if length else b''
+        except asyncio.IncompleteReadError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Тело запроса оборвано")
+        return Request(method.upper(), target, version, headers, body)
+
+    @staticmethod
+    def _encode_response(status: HTTPStatus, payload: Any, keep_alive: bool) -> bytes:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            f"\r\n"
+        )
+        return head.encode('latin-1') + body
+
+    async def _dispatch(self, request: Request) -> Tuple[HTTPStatus, Any]:
+        """Выбор обработчика и его выполнение в пуле потоков"""
+        parts = [unquote(part) for part in request.path.strip('/').split('/')]
+        if len(parts) == 3 and parts[0] == 'cars':
+            request.car_number = parts[1].upper()
+            route = parts[2]
+        elif len(parts) == 1:
+            route = parts[0]
+        else:
+            return HTTPStatus.NOT_FOUND, {'error': "Неизвестный адрес"}
+
+        return await self._run(self._routes, route, request)
+
+    async def _run(self, routes: Dict[Tuple[str, str], Callable[[Request], Tuple[HTTPStatus, Any]]],
+                   route: str, request: Request) -> Tuple[HTTPStatus, Any]:
+        """Поиск обработчика маршрута и его выполнение в пуле потоков"""
+        handler = routes.get((request.method, route))
+        if handler is None:
+            if any(path == route for _, path in routes):
+                return HTTPStatus.METHOD_NOT_ALLOWED, {'error': "Метод не поддерживается"}
+            return HTTPStatus.NOT_FOUND, {'error': "Неизвестный адрес"}
+
+        async with self._pending:
+            try:
+                return await asyncio.get_running_loop().run_in_executor(self._executor, self._call, handler, request)
+            except HTTPError as e:
+                return e.status, {'error': e.message}
+            except ValueError as e:
+                return HTTPStatus.BAD_REQUEST, {'error': str(e)}
+            except Exception as e:
+                print(f"Ошибка обработки запроса {request.method} {request.path}: {e}")
+                return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': "Внутренняя ошибка сервера"}
+
+    def _call(self, handler: Callable[[Request], Tuple[HTTPStatus, Any]], request: Request):
+        """Вызов обработчика в потоке пула (вызовы сервиса идут по одному)"""
+        with self._service_lock:
+            return handler(request)
+
+    def _service(self, request: Request) -> ParkingService:
+        """Сервис, к которому относится запрос"""
+        return self.parking_service
+
+    @staticmethod
+    def _number(data: Dict[str, Any], field: str, default: Any = None) -> float:
+        """Неотрицательное конечное число из поля запроса (NaN и бесконечность отклоняются)"""
+        value = data.get(field, default)
+        if value is None:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Не указано поле {field}")
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Поле {field} должно быть числом")
+        if not math.isfinite(number) or number < 0:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Поле {field} должно быть неотрицательным числом")
+        return number
+
+    @staticmethod
+    def _count(data: Dict[str, Any], field: str, default: int) -> int:
+        """Неотрицательное целое число из поля запроса"""
+        try:
+            number = int(data.get(field, default))
+        except (TypeError, ValueError):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Поле {field} должно быть целым числом")
+        if number < 0:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Поле {field} должно быть неотрицательным")
+        return number
+
+    def _current_cars(self, request: Request) -> Tuple[HTTPStatus, Any]:
+        return HTTPStatus.OK, [car.to_dict() for car in self._service(request).get_current_cars()]
+
+    def _add_car(self, request: Request) -> Tuple[HTTPStatus, Any]:
+        data = request.json()
+        fields = {}
+        for field in ('car_brand', 'car_number', 'owner_name'):
+            value = str(data.get(field, '')).strip()
+            if not value:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, f"Не указано поле {field}")
+            fields[field] = value
+
+        discount = self._number(data, 'discount', 0)
+        # Без ставки берётся ставка тарифа клиента
+        hourly_rate = self._number(data, 'hourly_rate') if data.get('hourly_rate') is not None else None
+        if not 0 <= discount <= 100:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Скидка должна быть от 0 до 100")
+        if hourly_rate is not None and hourly_rate < 1:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Ставка должна быть не меньше 1")
+
+        car = self._service(request).add_car(
+            car_brand=fields['car_brand'],
+            car_number=fields['car_number'].upper(),
+            owner_name=fields['owner_name'],
+            discount=int(discount),
+            hourly_rate=hourly_rate
+        )
+        return HTTPStatus.CREATED, car.to_dict()
+
+    def _remove_car(self, request: Request) -> Tuple[HTTPStatus, Any]:
+        car, cost = self._service(request).remove_car(request.car_number)
+        if car is None:
+            return HTTPStatus.NOT_FOUND, {'error': "Автомобиль не найден"}
+        return HTTPStatus.OK, {'car': car.to_dict(), 'cost': cost}
+
+    def _pay(self, request: Request) -> Tuple[HTTPStatus, Any]:
+        if not self._service(request).pay_for_parking(request.car_number):
+            return HTTPStatus.NOT_FOUND, {'error': "Неоплаченных стоянок нет"}
+        return HTTPStatus.OK, {'paid': True}
+
+    def _update_debt(self, request: Request) -> Tuple[HTTPStatus, Any]:
+        amount = self._number(request.json(), 'amount')
+        if not self._service(request).update_car_debt(request.car_number, amount):
+            return HTTPStatus.NOT_FOUND, {'error': "Неоплаченных стоянок нет"}
+        return HTTPStatus.OK, {'debt': amount}
+
+    def _search_params(self, request: Request) -> Tuple[str, int, int]:
+        """Строка поиска, limit и offset из параметров запроса"""
+        term = request.query.get('q', '').strip()
+        if not term:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Не указана строка поиска q")
+        limit = self._count(request.query, 'limit', 50)
+        offset = self._count(request.query, 'offset', 0)
+        return term, limit, offset
+
+    def _search(self, request: Request) -> Tuple[HTTPStatus, Any]:
+        term, limit, offset = self._search_params(request)
+        cars = self._service(request).search_cars(term, limit=limit, offset=offset)
+        return HTTPStatus.OK, [car.to_dict() for car in cars]
+
+    def _debtors(self, request: Request) -> Tuple[HTTPStatus, Any]:
+        return HTTPStatus.OK, [car.to_dict() for car in self._service(request).get_debtors()]
+
+    def _stats(self, request: Request) -> Tuple[HTTPStatus, Any]:
+        return HTTPStatus.OK, self._service(request).get_stats()
+
+    def _billing(self, request: Request) -> Tuple[HTTPStatus, Any]:
+        reference_time = None
+        if request.query.get('at'):
+            try:
+                reference_time = datetime.fromisoformat(request.query['at'])
+            except ValueError:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Параметр at должен быть временем в формате ISO")
+        bill = self._service(request).bill_open_sessions(reference_time)
+        return HTTPStatus.OK, {
+            'reference_time': bill.reference_time.isoformat(),
+            'count': len(bill),
+            'total': bill.total,
+            'cars': list(bill.rows())
+        }
+
+
+class MultiLotHTTPServer(ParkingHTTPServer):
+    """
+    HTTP/JSON API для нескольких стоянок в одном процессе
+
+    Маршруты ParkingHTTPServer доступны для каждой стоянки с префиксом
+    /lots/<стоянка>, например POST /lots/north/cars/A123BC/exit. Вызовы
+    разных стоянок выполняются параллельно (у каждой своя блокировка),
+    поэтому пул потоков обычно делается по потоку на стоянку.
+
+    Маршруты по всем стоянкам (записи дополнены полем lot):
+        GET  /lots                   — сводные показатели каждой стоянки
+        GET  /cars                   — автомобили на всех стоянках
+        GET  /search?q=&limit=&offset= — поиск по всем стоянкам
+        GET  /debtors                — должники всех стоянок
+        GET  /stats                  — сводные показатели по всем стоянкам
+    """
+
+    def __init__(self, lots: MultiLotService, host: str = '127.0.0.1', port: int = 8080,
+                 workers: Optional[int] = None, **kwargs):
+        """
+        Args:
+            lots: Сервис нескольких стоянок
+            host: Адрес для прослушивания
+            port: Порт
+            workers: Размер пула потоков (по умолчанию — по потоку на стоянку)
+            **kwargs: Остальные параметры ParkingHTTPServer
+        """
+        super().__init__(None, host, port, workers or len(lots.names), **kwargs)
+        self.lots = lots
+        self._global_routes: Dict[Tuple[str, str], Callable[[Request], Tuple[HTTPStatus, Any]]] = {
+            ('GET', 'lots'): self._all_lots,
+            ('GET', 'cars'): self._all_current_cars,
+            ('GET', 'search'): self._search_all,
+            ('GET', 'debtors'): self._all_debtors,
+            ('GET', 'stats'): self._all_stats,
+        }
+
+    async def _dispatch(self, request: Request) -> Tuple[HTTPStatus, Any]:
+        """Запросы с префиксом /lots/<стоянка> передаются маршрутам стоянки, остальные — общим"""
+        parts = [unquote(part) for part in request.path.strip('/').split('/')]
+        if len(parts) >= 3 and parts[0] == 'lots':
+            if parts[1] not in self.lots:
+                return HTTPStatus.NOT_FOUND, {'error': f"Стоянка {parts[1]} не найдена"}
+            request.lot = parts[1]
+            request.path = '/' + '/'.join(request.path.strip('/').split('/')[2:])
+            return await super()._dispatch(request)
+        if len(parts) == 1:
+            if (request.method, parts[0]) not in self._global_routes and \
+                    any(path == parts[0] for _, path in self._routes):
+                return HTTPStatus.BAD_REQUEST, {'error': "Укажите стоянку в адресе: /lots/<стоянка>/..."}
+            return await self._run(self._global_routes, parts[0], request)
+        if len(parts) == 3 and parts[0] == 'cars':
+            return HTTPStatus.BAD_REQUEST, {'error': "Укажите стоянку в адресе: /lots/<стоянка>/..."}
+        return HTTPStatus.NOT_FOUND, {'error': "Неизвестный адрес"}
+
+    def _call(self, handler: Callable[[Request], Tuple[HTTPStatus, Any]], request: Request):
+        """Вызов обработчика в потоке пула (вызовы одной стоянки идут по одному)"""
+        return handler(request)
+
+    def _service(self, request: Request) -> ParkingService:
+        return self.lots.lot(request.lot)
+
+    @staticmethod
+    def _lot_cars(items: List[Tuple[str, Car]]) -> List[Dict[str, Any]]:
+        return [dict(car.to_dict(), lot=lot) for lot, car in items]
+
+    def _all_lots(self, request: Request) -> Tuple[HTTPStatus, Any]:
+        return HTTPStatus.OK, self.lots.get_lot_stats()
+
+    def _all_current_cars(self, request: Request) -> Tuple[HTTPStatus, Any]:
+        return HTTPStatus.OK, self._lot_cars(self.lots.get_current_cars())
+
+    def _search_all(self, request: Request) -> Tuple[HTTPStatus, Any]:
+        term, limit, offset = self._search_params(request)
+        return HTTPStatus.OK, self._lot_cars(self.lots.search_cars(term, limit=limit, offset=offset))
+
+    def _all_debtors(self, request: Request) -> Tuple[HTTPStatus, Any]:
+        return HTTPStatus.OK, self._lot_cars(self.lots.get_debtors())
+
+    def _all_stats(self, request: Request) -> Tuple[HTTPStatus, Any]:
+        return HTTPStatus.OK, self.lots.get_stats()
+
+
+def run_server(parking_service, host: str = '127.0.0.1', port: int = 8080, workers: Optional[int] = None):
+    """
+    Запуск HTTP API до прерывания (Ctrl+C)
+
+    Args:
+        parking_service: Общий сервис автостоянки (ParkingService) или нескольких стоянок (MultiLotService)
+        host: Адрес для прослушивания
+        port: Порт
+        workers: Размер пула потоков для вызовов сервиса (по умолчанию — 1, для нескольких
+            стоянок — по потоку на стоянку)
+    """
+    if isinstance(parking_service, MultiLotService):
+        server = MultiLotHTTPServer(parking_service, host, port, workers)
+    else:
+        server = ParkingHTTPServer(parking_service, host, port, workers or 1)
+    print(f"HTTP API автостоянки: http://{host}:{port}/")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("Остановка сервера...")
+    finally:
+        server.close()
@@ -0,0 +1,178 @@
+# parking_app/ui/virtual_tree.py
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class VirtualTreeview:
+    """
+    Таблица на основе ttk.Treeview, которая создаёт строки только по мере прокрутки
+
+    В дереве материализуется первая страница строк, следующая страница
+    добавляется, когда пользователь докручивает до конца. При обновлении
+    данных строки сравниваются по ключу: изменившиеся обновляются на месте,
+    исчезнувшие удаляются, новые вставляются — дерево не перестраивается.
+
+    Если задан fetch_more, объекты тоже приходят страницами: когда
+    прокрутка доходит до последнего полученного объекта, а источник
+    сообщил, что у него есть ещё, таблица запрашивает следующую страницу
+    и ждёт её в append_items.
+    """
+
+    def __init__(self, parent, columns: Sequence[Tuple[str, str]],
+                 row_values: Callable[[Any], tuple], row_key: Callable[[Any], str],
+                 page_size: int = 200, column_width: int = None,
+                 fetch_more: Optional[Callable[[int], None]] = None):
+        """
+        Args:
+            parent: Родительский виджет
+            columns: Пары (идентификатор колонки, заголовок)
+            row_values: Функция, формирующая значения ячеек строки по объекту
+            row_key: Функция, возвращающая уникальный ключ объекта (iid строки)
+            page_size: Сколько строк добавлять за одну подгрузку
+            column_width: Ширина колонок (по умолчанию — стандартная)
+            fetch_more: Запрос следующей страницы объектов у источника
+                (получает количество уже полученных объектов)
+        """
+        self.row_values = row_values
+        self.row_key = row_key
+        self.page_size = page_size
+        self.fetch_more = fetch_more
+        self._columns = [col for col, _ in columns]
+
+        self.frame = ttk.Frame(parent)
+        self.tree = ttk.Treeview(self.frame, columns=[col for col, _ in columns], show='headings')
+        for col, text in columns:
+            self.tree.heading(col, text=text)
+            if column_width is not None:
+                self.tree.column(col, width=column_width)
+
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._on_scroll)
+        self.scrollbar.pack(side='right', fill='y')
+        self.tree.pack(side='left', fill='both', expand=True)
+
+        self._items: Sequence[Any] = []
+        # Ключи строк в дереве в порядке отображения и их текущие значения
+        self._order: List[str] = []
+        self._values: Dict[str, tuple] = {}
+        # Есть ли у источника ещё объекты и ожидается ли ответ на запрос страницы
+        self._has_more = False
+        self._fetching = False
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def materialized_count(self) -> int:
+        """Количество строк, созданных в дереве"""
+        return len(self._order)
+
+    def set_items(self, items: Sequence[Any], has_more: bool = False):
+        """
+        Обновление данных таблицы
+
+        Пересчитываются только уже созданные строки (но не меньше одной страницы).
+
+        Args:
+            items: Объекты для отображения в нужном порядке
+            has_more: Есть ли у источника объекты после items (для fetch_more)
+        """
+        self._items = items
+        self._has_more = has_more
+        # Ответ на ранее запрошенную страницу (если придёт) отфильтрует повторы
+        self._fetching = False
+        count = min(len(items), max(len(self._order), self.page_size))
+        new_order = [self.row_key(item) for item in items[:count]]
+
+        new_keys = set(new_order)
+        stale = [key for key in self._order if key not in new_keys]
+        if stale:
+            self.tree.delete(*stale)
+            for key in stale:
+                del self._values[key]
+        # Текущий порядок строк в дереве, повторяющий вставки и перемещения
+        current = [key for key in self._order if key in new_keys]
+
+        for index, (key, item) in enumerate(zip(new_order, items)):
+            values = self.row_values(item)
+            if key not in self._values:
+                self.tree.insert('', index, iid=key, values=values)
+                current.insert(index, key)
+            else:
+                if current[index] != key:
+                    self.tree.move(key, '', index)
+                    current.remove(key)
+                    current.insert(index, key)
+                if self._values[key] != values:
+                    self.tree.item(key, values=values)
+            self._values[key] = values
+
+        self._order = new_order
+
+    def append_items(self, items: Sequence[Any], has_more: bool):
+        """
+        Добавление страницы объектов, полученной по запросу fetch_more
+
+        Объекты, которые уже есть в таблице (например, сдвинувшиеся
+        из-за вставки в начало источника), пропускаются.
+
+        Args:
+            items: Объекты следующей страницы
+            has_more: Есть ли у источника объекты после них
+        """
+        self._fetching = False
+        self._has_more = has_more
+        known = {self.row_key(item) for item in self._items}
+        self._items = list(self._items) + [item for item in items if self.row_key(item) not in known]
+        self.load_more()
+
+    def load_more(self) -> bool:
+        """
+        Добавление следующей страницы строк
+
+        Если полученные объекты закончились, у источника запрашивается
+        следующая страница (строки появятся после append_items).
+
+        Returns:
+            True, если строки были добавлены
+        """
+        start = len(self._order)
+        if start >= len(self._items):
+            if self.fetch_more is not None and self._has_more and not self._fetching:
+                self._fetching = True
+                self.fetch_more(len(self._items))
+            return False
+
+        for item in self._items[start:start + self.page_size]:
+            key = self.row_key(item)
+            values = self.row_values(item)
+            self.tree.insert('', 'end', iid=key, values=values)
+            self._values[key] = values
+            self._order.append(key)
+        return True
+
+    def update_column(self, column: str, values: Sequence[str]):
+        """
+        Обновление одной колонки созданных строк без пересчета остальных ячеек
+
+        Args:
+            column: Идентификатор колонки
+            values: Новые значения в порядке строк (для первых len(values) строк)
+        """
+        index = self._columns.index(column)
+        for key, value in zip(self._order, values):
+            row = self._values[key]
+            if row[index] != value:
+                self.tree.set(key, column, value)
+                self._values[key] = row[:index] + (value,) + row[index + 1:]
+
+    def _on_scroll(self, first: str, last: str):
+        """Обработчик прокрутки: подгрузка строк у нижней границы"""
+        self.scrollbar.set(first, last)
+        if float(last) >= 0.95:
+            self.load_more()
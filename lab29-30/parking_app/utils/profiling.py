@@ -0,0 +1,58 @@
+"""
+Замер времени этапов запуска приложения
+"""
+
+import sys
+import time
+import threading
+from contextlib import contextmanager
+from typing import List, Tuple
+
+
+class StartupProfile:
+    """
+    Время этапов запуска по потокам
+
+    Этапы могут идти одновременно (загрузка данных в фоне, построение окна
+    в главном потоке), поэтому для каждого записывается поток, момент
+    начала от старта приложения и продолжительность. Если профиль
+    выключен, этапы не записываются.
+    """
+
+    def __init__(self, enabled: bool = False):
+        """
+        Args:
+            enabled: Записывать ли этапы
+        """
+        self.enabled = enabled
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self.phases: List[Tuple[str, str, float, float]] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Замер одного этапа
+
+        Args:
+            name: Название этапа
+        """
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self.phases.append((name, threading.current_thread().name,
+                                    started - self._started, finished - started))
+
+    def report(self, file=sys.stderr):
+        """Вывод таблицы этапов (время в миллисекундах)"""
+        total = time.perf_counter() - self._started
+        print(f"{'Этап':<28} {'Поток':<16} {'Начало':>8} {'Время':>8}", file=file)
+        for name, thread, offset, duration in sorted(self.phases, key=lambda phase: phase[2]):
+            print(f"{name:<28} {thread:<16} {offset * 1000:>8.1f} {duration * 1000:>8.1f}", file=file)
+        print(f"{'Всего до готовности':<28} {'':<16} {'':>8} {total * 1000:>8.1f}", file=file)